@@ -0,0 +1,43 @@
+"""Executa a suíte de benchmarks offline e grava um JSON por benchmark.
+
+    cd monitor_backend
+    python -m benchmarks [--rapido] [--db arquivo.db]
+
+--rapido usa tamanhos menores (ingestão até 10k, API com 50k imóveis) para
+rodar em poucos segundos; os números de referência usam os padrões
+(ingestão 1k/10k/100k, API com 500k imóveis). Para comparar duas execuções:
+
+    python -m benchmarks.comparar antes.json depois.json
+"""
+import argparse
+import logging
+
+from benchmarks import bench_scrapers, bench_ingestao, bench_api, bench_serializacao
+from benchmarks.comum import salvar_resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rapido', action='store_true', help='tamanhos reduzidos')
+    parser.add_argument('--db', help='banco da API (padrão: benchmarks/dados/api_<linhas>.db)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    repeticoes = 5 if args.rapido else 20
+    tamanhos = (1000, 10000) if args.rapido else (1000, 10000, 100000)
+    linhas = 50000 if args.rapido else 500000
+
+    print('Scrapers sobre fixtures:')
+    arquivos = [salvar_resultados('scrapers', bench_scrapers.executar(repeticoes))]
+    print('\nIngestão (monitoramento completo):')
+    arquivos.append(salvar_resultados('ingestao', bench_ingestao.executar(tamanhos)))
+    print('\nLatência da API:')
+    arquivos.append(salvar_resultados('api', bench_api.executar(args.db, linhas, repeticoes * 2)))
+    print('\nSerialização da listagem:')
+    arquivos.append(salvar_resultados('serializacao', bench_serializacao.executar(args.db, linhas, repeticoes * 2)))
+
+    print()
+    for arquivo in arquivos:
+        print(f"💾 {arquivo}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark de latência da API (/imoveis e /estatisticas) num banco grande.
+
+Usa o test client do Flask (sem servidor nem rede) sobre um banco semeado com
+imóveis sintéticos; o banco é criado em benchmarks/dados na primeira execução
+e reaproveitado depois. Cada requisição "sem cache" limpa o cache de
+respostas antes, medindo a consulta real; os cenários "cache" medem a
+resposta guardada e a revalidação com If-None-Match (304).
+
+    cd monitor_backend
+    python -m benchmarks.bench_api [--db arquivo.db] [--linhas 500000] [--requisicoes 50]
+"""
+import argparse
+import logging
+import os
+import time
+
+from benchmarks.comum import DIRETORIO_DADOS, criar_app, imoveis_sinteticos, cronometrar, percentis, salvar_resultados
+from src.cache import cache_respostas
+from src.database import db
+from src.ingestao import ingerir_imoveis
+from src.models.imovel import Imovel
+
+LOTE_SEMEADURA = 50000
+
+CENARIOS = [
+    ('imoveis_padrao', '/api/monitor/imoveis'),
+    ('imoveis_locacao_bairro', '/api/monitor/imoveis?tipo_negocio=Locação&bairro=Centro'),
+    ('imoveis_faixa_preco', '/api/monitor/imoveis?tipo_negocio=Vendas&preco_min=300000&preco_max=600000&ordenar=preco&ordem=asc'),
+    ('imoveis_quartos_area', '/api/monitor/imoveis?quartos_min=3&area_min=100&ordenar=area'),
+    ('imoveis_imobiliaria', '/api/monitor/imoveis?imobiliaria=Santa Maria&limite=200'),
+    ('imoveis_pagina_2', None),  # cursor da primeira página
+    ('estatisticas', '/api/monitor/estatisticas'),
+]
+
+def semear(app, linhas):
+    """Popula o banco até `linhas` imóveis ativos (ingestão normal, em lotes)"""
+    with app.app_context():
+        existentes = db.session.query(Imovel.id).count()
+        if existentes >= linhas:
+            return existentes
+        print(f"🌱 Semeando {linhas - existentes} imóveis...")
+        inicio = time.perf_counter()
+        for posicao in range(existentes, linhas, LOTE_SEMEADURA):
+            ingerir_imoveis(imoveis_sinteticos(min(LOTE_SEMEADURA, linhas - posicao), inicio=posicao))
+            db.session.commit()
+        print(f"   {time.perf_counter() - inicio:.1f} s")
+        return db.session.query(Imovel.id).count()
+
+def url_pagina_2(cliente):
+    cache_respostas.limpar()
+    cursor = cliente.get('/api/monitor/imoveis').get_json()['next_cursor']
+    return f'/api/monitor/imoveis?cursor={cursor}'
+
+def executar(caminho_db=None, linhas=500000, requisicoes=50):
+    caminho_db = caminho_db or os.path.join(DIRETORIO_DADOS, f'api_{linhas}.db')
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_db)), exist_ok=True)
+    app = criar_app(os.path.abspath(caminho_db))
+    total = semear(app, linhas)
+    cliente = app.test_client()
+
+    def requisitar(url, status=200, **kwargs):
+        resposta = cliente.get(url, **kwargs)
+        assert resposta.status_code == status, (url, resposta.status_code)
+        return resposta
+
+    def sem_cache(url):
+        cache_respostas.limpar()
+        requisitar(url)
+
+    resultados = []
+    for nome, url in CENARIOS:
+        url = url or url_pagina_2(cliente)
+        resultado = {'cenario': nome, 'url': url, **percentis(cronometrar(lambda: sem_cache(url), requisicoes))}
+        print(f"  {nome:<24} p50 {resultado['p50_ms']:8.2f} ms  p95 {resultado['p95_ms']:8.2f} ms")
+        resultados.append(resultado)
+
+    # Mesma URL servida do cache de respostas e revalidada pelo ETag
+    url = CENARIOS[0][1]
+    etag = requisitar(url).headers['ETag'].strip('"')
+    for nome, func in [
+        ('imoveis_cache', lambda: requisitar(url)),
+        ('imoveis_304', lambda: requisitar(url, 304, headers={'If-None-Match': etag})),
+    ]:
+        resultado = {'cenario': nome, 'url': url, **percentis(cronometrar(func, requisicoes))}
+        print(f"  {nome:<24} p50 {resultado['p50_ms']:8.2f} ms  p95 {resultado['p95_ms']:8.2f} ms")
+        resultados.append(resultado)
+
+    return {'banco': caminho_db, 'imoveis': total, 'requisicoes': requisicoes, 'cenarios': resultados}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='banco SQLite (padrão: benchmarks/dados/api_<linhas>.db, semeado se preciso)')
+    parser.add_argument('--linhas', type=int, default=500000)
+    parser.add_argument('--requisicoes', type=int, default=50)
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/api_<data>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print('Latência da API:')
+    print(f"\n💾 {salvar_resultados('api', executar(args.db, args.linhas, args.requisicoes), args.saida)}")
+
+if __name__ == '__main__':
+    main()
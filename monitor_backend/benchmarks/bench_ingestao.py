@@ -0,0 +1,86 @@
+"""Benchmark da ingestão: monitoramento completo com imóveis sintéticos.
+
+Para cada tamanho roda executar_monitoramento_job (o mesmo corpo executado
+pelo worker de jobs) num banco temporário, com SCRAPERS trocado por sites
+sintéticos que devolvem os imóveis já prontos (sem rede nem parsing):
+
+  inicial          banco vazio, todos os imóveis são novos
+  sem_mudancas     mesma coleta de novo (só comparação de hash)
+  mudancas_10pct   10% dos imóveis com preço alterado (updates + snapshots)
+
+    cd monitor_backend
+    python -m benchmarks.bench_ingestao [--tamanhos 1000 10000 100000] [--saida resultado.json]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.comum import criar_app, imoveis_sinteticos, salvar_resultados
+import src.scrapers_gerais as scrapers_gerais
+from src.jobs import ContextoJob
+from src.monitoramento import executar_monitoramento_job
+
+CENARIOS = [
+    ('inicial', 0.0),
+    ('sem_mudancas', 0.0),
+    ('mudancas_10pct', 0.1),
+]
+
+def scrapers_sinteticos(imoveis):
+    """Um scraper por imobiliária devolvendo a sua parte dos imóveis"""
+    por_imobiliaria = defaultdict(list)
+    for imovel in imoveis:
+        por_imobiliaria[imovel['imobiliaria']].append(imovel)
+    return [(nome, lambda lista=lista: list(lista)) for nome, lista in por_imobiliaria.items()]
+
+def medir_tamanho(quantidade):
+    resultados = []
+    originais = list(scrapers_gerais.SCRAPERS)
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_app(os.path.join(diretorio, 'ingestao.db'))
+        try:
+            for cenario, variacao in CENARIOS:
+                scrapers_gerais.SCRAPERS[:] = scrapers_sinteticos(
+                    imoveis_sinteticos(quantidade, variacao_preco=variacao)
+                )
+                with app.app_context():
+                    inicio = time.perf_counter()
+                    resultado = executar_monitoramento_job(ContextoJob(0, 'benchmark'))
+                    segundos = time.perf_counter() - inicio
+                linha = {
+                    'imoveis': quantidade,
+                    'cenario': cenario,
+                    'segundos': round(segundos, 3),
+                    'imoveis_por_segundo': round(quantidade / segundos),
+                    'novos': resultado['novos_imoveis'],
+                    'atualizados': resultado['imoveis_atualizados'],
+                    'desativados': resultado['imoveis_desativados']
+                }
+                print(f"  {quantidade:>7d} {cenario:<15} {segundos:8.2f} s  {linha['imoveis_por_segundo']:>8d} imóveis/s  "
+                      f"novos {linha['novos']}  atualizados {linha['atualizados']}")
+                resultados.append(linha)
+        finally:
+            scrapers_gerais.SCRAPERS[:] = originais
+    return resultados
+
+def executar(tamanhos=(1000, 10000, 100000)):
+    resultados = []
+    for quantidade in tamanhos:
+        resultados.extend(medir_tamanho(quantidade))
+    return {'tamanhos': list(tamanhos), 'execucoes': resultados}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/ingestao_<data>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print('Ingestão (monitoramento completo):')
+    print(f"\n💾 {salvar_resultados('ingestao', executar(args.tamanhos), args.saida)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark do parsing das páginas de listagem (src/parsing.py).
+
+Compara, por página, o parser antigo dos scrapers (BeautifulSoup com
+html.parser + select) com BeautifulSoup/lxml, BeautifulSoup/lxml restrito
+por SoupStrainer e lxml com XPath pré-compilado. Sem acesso à rede: usa
+páginas sintéticas no formato de um portal de imobiliária (menu de bairros,
+cards de imóveis, scripts e estilos inline) ou arquivos HTML salvos.
+
+    cd monitor_backend
+    python -m benchmarks.bench_parsing [--paginas arquivo.html ...] [--saida resultado.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup, SoupStrainer
+from src.parsing import selecionar, texto
+from benchmarks.fixtures import pagina_sintetica
+
+def html_parser_select(conteudo):
+    """Implementação anterior do scraper Plaza Chapecó"""
+    soup = BeautifulSoup(conteudo, 'html.parser')
+    return [(link.get('href', ''), link.get_text(strip=True)) for link in soup.select('a[href*="/bairro-"]')]
+
+def lxml_bs4_select(conteudo):
+    soup = BeautifulSoup(conteudo, 'lxml')
+    return [(link.get('href', ''), link.get_text(strip=True)) for link in soup.select('a[href*="/bairro-"]')]
+
+def lxml_soupstrainer(conteudo):
+    soup = BeautifulSoup(conteudo, 'lxml', parse_only=SoupStrainer('a', href=re.compile('/bairro-')))
+    return [(link.get('href', ''), link.get_text(strip=True)) for link in soup.find_all('a')]
+
+def lxml_xpath(conteudo):
+    """Implementação atual (src/parsing.py)"""
+    return [(link.get('href', ''), texto(link)) for link in selecionar(conteudo, 'plaza_chapeco', 'links_bairros')]
+
+METODOS = [
+    ('html.parser + select (anterior)', html_parser_select),
+    ('bs4/lxml + select', lxml_bs4_select),
+    ('bs4/lxml + SoupStrainer', lxml_soupstrainer),
+    ('lxml + XPath compilado (atual)', lxml_xpath),
+]
+
+def medir(func, conteudo, repeticoes):
+    func(conteudo)  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func(conteudo)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paginas', nargs='*', help='arquivos HTML salvos (padrão: páginas sintéticas)')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--saida', help='grava o resultado em JSON')
+    args = parser.parse_args()
+
+    if args.paginas:
+        paginas = [(os.path.basename(caminho), open(caminho, 'rb').read()) for caminho in args.paginas]
+    else:
+        paginas = [(f'sintetica_{cards}_cards', pagina_sintetica(cards)) for cards in (20, 100, 400)]
+
+    resultados = []
+    for nome, conteudo in paginas:
+        referencia = lxml_xpath(conteudo)
+        print(f"\n{nome}: {len(conteudo) / 1024:.0f} KB, {len(referencia)} links de bairro")
+        base = None
+        for metodo, func in METODOS:
+            # Todas as implementações precisam extrair exatamente os mesmos links
+            assert func(conteudo) == referencia, metodo
+            mediana = medir(func, conteudo, args.repeticoes)
+            base = base or mediana
+            print(f"  {metodo:<34} {mediana:8.2f} ms   {base / mediana:5.1f}x")
+            resultados.append({
+                'pagina': nome, 'bytes': len(conteudo), 'metodo': metodo,
+                'mediana_ms': round(mediana, 3), 'aceleracao': round(base / mediana, 2)
+            })
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark dos scrapers sobre as fixtures HTML (sem rede).
+
+Cada scraper_* registrado em SCRAPERS roda com o cliente HTTP trocado pelo
+ClienteSimulado (benchmarks/fixtures.py); mede o tempo de parsing/extração
+por execução e quantos imóveis e bytes foram processados.
+
+    cd monitor_backend
+    python -m benchmarks.bench_scrapers [--repeticoes 20] [--saida resultado.json]
+"""
+import argparse
+import logging
+
+from benchmarks.comum import cronometrar, percentis, salvar_resultados
+from benchmarks.fixtures import http_simulado, FIXTURES, conteudo_fixture
+from src.scrapers_gerais import SCRAPERS
+
+def executar(repeticoes=20):
+    resultados = []
+    bytes_fixtures = {url: len(conteudo_fixture(url)) for url in FIXTURES}
+
+    with http_simulado() as cliente:
+        for nome, scraper_func in SCRAPERS:
+            requisicoes_antes = cliente.requisicoes
+            imoveis = list(scraper_func())
+            requisicoes = cliente.requisicoes - requisicoes_antes
+            tempos = cronometrar(lambda: list(scraper_func()), repeticoes)
+            resultado = {
+                'scraper': nome,
+                'imoveis': len(imoveis),
+                'requisicoes': requisicoes,
+                **percentis(tempos)
+            }
+            print(f"  {nome:<20} {len(imoveis):5d} imóveis  {requisicoes} páginas  "
+                  f"p50 {resultado['p50_ms']:8.2f} ms  p95 {resultado['p95_ms']:8.2f} ms")
+            resultados.append(resultado)
+
+    return {'repeticoes': repeticoes, 'bytes_fixtures': bytes_fixtures, 'scrapers': resultados}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/scrapers_<data>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # os scrapers logam cada página
+    print('Scrapers sobre fixtures:')
+    print(f"\n💾 {salvar_resultados('scrapers', executar(args.repeticoes), args.saida)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark da serialização da listagem: objetos ORM + to_dict + json vs tuplas + orjson.
+
+Mede, para páginas de 50 e 500 imóveis do mesmo banco do bench_api:
+
+  orm_json        caminho anterior: query de Imovel, to_dict() por imóvel e o
+                  json da biblioteca padrão (DefaultJSONProvider do Flask)
+  tuplas_orjson   caminho atual: só as colunas da resposta como tuplas e o
+                  ProvedorJSON (orjson)
+  http_<cod>      requisição completa sem cache de respostas, com
+                  Accept-Encoding identity, gzip e br (inclui a compressão)
+
+    cd monitor_backend
+    python -m benchmarks.bench_serializacao [--db arquivo.db] [--linhas 500000] [--requisicoes 50]
+"""
+import argparse
+import logging
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.bench_api import semear
+from benchmarks.comum import DIRETORIO_DADOS, criar_app, cronometrar, percentis, salvar_resultados
+from src.cache import cache_respostas
+from src.database import db
+from src.models.imovel import Imovel
+from src.respostas import brotli, orjson
+from src.routes.monitor import COLUNAS_LISTAGEM, _dicionarios, aplicar_filtros, aplicar_ordenacao
+
+PAGINAS = (50, 500)
+CODIFICACOES = ['identity', 'gzip'] + (['br'] if brotli else [])
+
+def _query(limite):
+    args = {'limite': str(limite)}
+    return aplicar_ordenacao(aplicar_filtros(Imovel.query, args), args)
+
+def executar(caminho_db=None, linhas=500000, requisicoes=50):
+    caminho_db = caminho_db or os.path.join(DIRETORIO_DADOS, f'api_{linhas}.db')
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_db)), exist_ok=True)
+    app = criar_app(os.path.abspath(caminho_db))
+    total = semear(app, linhas)
+    cliente = app.test_client()
+    provedor_padrao = DefaultJSONProvider(app)
+
+    resultados = []
+
+    def registrar(nome, limite, tempos, **extras):
+        resultado = {'cenario': nome, 'limite': limite, **extras, **percentis(tempos)}
+        tamanho = f"  {extras['bytes']:>8} B" if 'bytes' in extras else ''
+        print(f"  {nome:<16} {limite:>4}  p50 {resultado['p50_ms']:8.2f} ms  p95 {resultado['p95_ms']:8.2f} ms{tamanho}")
+        resultados.append(resultado)
+
+    with app.app_context():
+        for limite in PAGINAS:
+            def orm_json():
+                imoveis = _query(limite).limit(limite + 1).all()[:limite]
+                corpo = provedor_padrao.dumps({'imoveis': [imovel.to_dict() for imovel in imoveis]})
+                db.session.expunge_all()  # sem reaproveitar objetos do mapa de identidade
+                return corpo
+
+            def tuplas_orjson():
+                linhas_pagina = _query(limite).with_entities(*COLUNAS_LISTAGEM).limit(limite + 1).all()[:limite]
+                return app.json.dumps({'imoveis': _dicionarios(linhas_pagina)})
+
+            registrar('orm_json', limite, cronometrar(orm_json, requisicoes))
+            registrar('tuplas_orjson', limite, cronometrar(tuplas_orjson, requisicoes))
+
+    for limite in PAGINAS:
+        url = f'/api/monitor/imoveis?limite={limite}'
+        for codificacao in CODIFICACOES:
+            def requisitar():
+                cache_respostas.limpar()
+                resposta = cliente.get(url, headers={'Accept-Encoding': codificacao})
+                assert resposta.status_code == 200, (url, resposta.status_code)
+                return resposta
+            tamanho = len(requisitar().get_data())
+            registrar(f'http_{codificacao}', limite, cronometrar(requisitar, requisicoes), bytes=tamanho)
+
+    return {
+        'banco': caminho_db, 'imoveis': total, 'requisicoes': requisicoes,
+        'orjson': orjson is not None, 'brotli': brotli is not None, 'cenarios': resultados
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='banco SQLite (padrão: benchmarks/dados/api_<linhas>.db, semeado se preciso)')
+    parser.add_argument('--linhas', type=int, default=500000)
+    parser.add_argument('--requisicoes', type=int, default=50)
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/serializacao_<data>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print('Serialização da listagem:')
+    print(f"\n💾 {salvar_resultados('serializacao', executar(args.db, args.linhas, args.requisicoes), args.saida)}")
+
+if __name__ == '__main__':
+    main()
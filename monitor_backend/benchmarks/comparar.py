@@ -0,0 +1,50 @@
+"""Compara dois resultados do mesmo benchmark (JSON gravado pela suíte).
+
+    python -m benchmarks.comparar antes.json depois.json
+
+Casa as linhas pelos campos de identificação (scraper, cenário, tamanho) e
+mostra a variação percentual das métricas de tempo e vazão.
+"""
+import argparse
+import json
+
+METRICAS = ('p50_ms', 'p95_ms', 'segundos', 'imoveis_por_segundo')
+
+def linhas(documento):
+    """Linhas de medição de um resultado (a lista dentro de 'resultados')"""
+    for valor in documento['resultados'].values():
+        if isinstance(valor, list) and valor and isinstance(valor[0], dict):
+            return valor
+    return []
+
+def identificar(linha):
+    if 'scraper' in linha:
+        return (linha['scraper'],)
+    return tuple(linha[chave] for chave in ('imoveis', 'cenario') if chave in linha)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('antes')
+    parser.add_argument('depois')
+    args = parser.parse_args()
+
+    with open(args.antes, encoding='utf-8') as arquivo:
+        antes = json.load(arquivo)
+    with open(args.depois, encoding='utf-8') as arquivo:
+        depois = json.load(arquivo)
+
+    print(f"{antes['benchmark']}: {antes.get('commit')} -> {depois.get('commit')}")
+    anteriores = {identificar(linha): linha for linha in linhas(antes)}
+    for linha in linhas(depois):
+        chave = identificar(linha)
+        anterior = anteriores.get(chave)
+        if anterior is None:
+            continue
+        nome = ' '.join(str(valor) for valor in chave)
+        for metrica in METRICAS:
+            if metrica in linha and anterior.get(metrica):
+                variacao = (linha[metrica] - anterior[metrica]) / anterior[metrica] * 100
+                print(f"  {nome:<32} {metrica:<20} {anterior[metrica]:>12} -> {linha[metrica]:>12}  {variacao:+7.1f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Utilidades compartilhadas pelos benchmarks (app isolado, dados sintéticos, percentis e JSON)"""
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+DIRETORIO_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+DIRETORIO_DADOS = os.path.join(RAIZ, 'benchmarks', 'dados')
+
+IMOBILIARIAS = ['Plaza Chapecó', 'Casa Imóveis', 'Santa Maria', 'MOBG', 'Fenix Melhor Negócio', 'Markize',
+                'Firmesa', 'Smart Aluguel e Venda', 'Padra', 'Lunardi Imóveis', 'Sim Imóveis', 'Tucumã Imóveis',
+                'Imobiliária Chapecó']
+BAIRROS = ['Centro', 'Efapi', 'Universitário', 'Desbravador', 'Vila Real', 'Presidente Médici', 'São Cristóvão',
+           'Santa Maria', 'Jardim Itália', 'Passo dos Fortes', 'Palmital', 'Engenho Braun', 'Líder', 'Maria Goretti']
+TIPOS = ['Apartamento', 'Casa', 'Comercial', 'Terreno', 'Sala', 'Sobrado']
+
+def criar_app(caminho_db):
+    """App Flask com o monitor_bp sobre um banco próprio (não toca em src/database/app.db)"""
+    from flask import Flask
+    from src.database import init_database
+    import src.models.imovel, src.models.estatistica, src.models.versao_dados  # noqa: F401 (registram as tabelas)
+    import src.models.job, src.models.checkpoint, src.models.pagina_arquivada  # noqa: F401
+    import src.models.grupo_duplicata  # noqa: F401
+    from src.routes.monitor import monitor_bp
+    from src.respostas import ProvedorJSON, registrar_compressao
+
+    app = Flask('benchmarks')
+    app.json = ProvedorJSON(app)
+    registrar_compressao(app)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{caminho_db}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.register_blueprint(monitor_bp, url_prefix='/api/monitor')
+    init_database(app)
+    return app
+
+def imoveis_sinteticos(quantidade, inicio=0, imobiliarias=None, variacao_preco=0.0, semente=42):
+    """Imóveis no formato devolvido pelos scrapers.
+
+    variacao_preco é a fração dos imóveis com preço alterado (para simular
+    uma nova execução com mudanças); os demais campos são determinísticos.
+    """
+    imobiliarias = imobiliarias or IMOBILIARIAS
+    aleatorio = random.Random(semente)
+    imoveis = []
+    for i in range(inicio, inicio + quantidade):
+        tipo_negocio = 'LOCAÇÃO' if i % 3 == 0 else 'VENDA'
+        tipo = TIPOS[i % len(TIPOS)]
+        bairro = BAIRROS[(i * 7) % len(BAIRROS)]
+        quartos = 1 + i % 4
+        area = 35 + (i * 13) % 260
+        preco = (800 + (i * 37) % 6000) if tipo_negocio == 'LOCAÇÃO' else (150000 + (i * 7919) % 1850000)
+        if variacao_preco and aleatorio.random() < variacao_preco:
+            preco = int(preco * 0.95)
+        imoveis.append({
+            'imobiliaria': imobiliarias[i % len(imobiliarias)],
+            'codigo': str(100000 + i),
+            'titulo': f"{tipo} com {quartos} quartos, {area}m² no {bairro} em Chapecó",
+            'tipo_imovel': tipo,
+            'preco': f"R$ {preco:,.0f}".replace(',', '.'),
+            'area': f"{area}m²",
+            'quartos': str(quartos),
+            'banheiros': str(1 + quartos // 2),
+            'vagas': str(i % 3),
+            'endereco': f"{bairro}, Chapecó, SC",
+            'bairro': bairro,
+            'tipo_negocio': tipo_negocio,
+            'url': f"https://exemplo.com.br/imovel/{100000 + i}"
+        })
+    return imoveis
+
+def percentis(tempos_ms):
+    """p50 / p95 / máximo de uma lista de tempos em milissegundos"""
+    ordenados = sorted(tempos_ms)
+    quantis = statistics.quantiles(ordenados, n=100, method='inclusive') if len(ordenados) > 1 else ordenados * 99
+    return {
+        'amostras': len(ordenados),
+        'p50_ms': round(quantis[49], 3),
+        'p95_ms': round(quantis[94], 3),
+        'max_ms': round(ordenados[-1], 3)
+    }
+
+def cronometrar(func, repeticoes, aquecimento=1):
+    """Executa func repetidamente e devolve os tempos em milissegundos"""
+    for _ in range(aquecimento):
+        func()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def salvar_resultados(nome, resultados, saida=None):
+    """Grava os resultados com metadados da execução; devolve o caminho do arquivo"""
+    if saida is None:
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        saida = os.path.join(DIRETORIO_RESULTADOS, f"{nome}_{datetime.now():%Y%m%d-%H%M%S}.json")
+    documento = {
+        'benchmark': nome,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'resultados': resultados
+    }
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(documento, arquivo, ensure_ascii=False, indent=2)
+    return saida
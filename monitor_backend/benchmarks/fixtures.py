@@ -0,0 +1,140 @@
+"""Páginas de listagem usadas pelos benchmarks e camada HTTP simulada.
+
+Cada URL acessada pelos scrapers tem uma fixture. Se existir um HTML salvo
+em benchmarks/fixtures/<arquivo> (página real baixada do site), ele é usado;
+senão a página é gerada de forma determinística no formato do site. Os
+arquivos reais saem do arquivo de páginas dos scrapers (src/arquivo_paginas.py):
+
+    python -m benchmarks.fixtures [--db src/database/app.db]
+"""
+import argparse
+import json
+import os
+from contextlib import contextmanager
+
+DIRETORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+BAIRROS_LINKS = ['centro', 'efapi', 'universitario', 'desbravador', 'vila-real', 'presidente-medici',
+                 'sao-cristovao', 'santa-maria', 'jardim-italia', 'passo-dos-fortes', 'palmital', 'engenho-braun']
+
+def pagina_sintetica(cards, caminho_bairros='/alugar-imoveis-chapeco-sc'):
+    """Página de listagem com `cards` imóveis (o tamanho cresce ~1,3 KB por card)"""
+    partes = ['<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>Imóveis</title>']
+    partes.append('<style>' + '.card{margin:0;padding:4px}' * 200 + '</style>')
+    partes.append('<script>var dados = ' + json.dumps({'itens': list(range(2000))}) + ';</script></head><body>')
+    partes.append('<nav><ul>')
+    for i, bairro in enumerate(BAIRROS_LINKS * 5):
+        partes.append(f'<li><a href="{caminho_bairros}/bairro-{bairro}-{i}">Imóveis no {bairro} ({i})</a></li>')
+    partes.append('</ul></nav><main><div class="resultados">')
+    for i in range(cards):
+        partes.append(
+            f'<div class="card" data-id="{i}"><div class="foto"><img src="/img/{i}.jpg" alt="Foto {i}"></div>'
+            f'<div class="info"><h2><a href="/imovel/{14000 + i}/apartamento-alugar">Apartamento com 2 quartos</a></h2>'
+            f'<p class="endereco">Rua {i}, {BAIRROS_LINKS[i % len(BAIRROS_LINKS)]}, Chapecó - SC</p>'
+            f'<ul class="caracteristicas"><li><span>2</span> quartos</li><li><span>1</span> banheiro</li>'
+            f'<li><span>1</span> vaga</li><li><span>65</span> m²</li></ul>'
+            f'<p class="preco">R$ {1500 + i},00</p><p class="descricao">' + 'Ótima localização, próximo ao comércio. ' * 8 +
+            '</p></div></div>'
+        )
+    partes.append('</div></main><footer>' + '<p>Creci 1234-J</p>' * 20 + '</footer></body></html>')
+    return ''.join(partes).encode('utf-8')
+
+def pagina_javascript():
+    """Casca de SPA devolvida por sites que exigem JavaScript"""
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8"><script src="/app.js"></script></head>'
+            '<body><noscript>Habilite o Javascript para acessar o site</noscript><div id="app"></div>'
+            '</body></html>').encode('utf-8')
+
+# URL -> (arquivo salvo opcional, gerador sintético)
+FIXTURES = {
+    'https://plazachapeco.com.br/alugar-imoveis-chapeco-sc/': (
+        'plaza_alugar.html', lambda: pagina_sintetica(120, '/alugar-imoveis-chapeco-sc')),
+    'https://plazachapeco.com.br/comprar-imoveis-chapeco-sc/': (
+        'plaza_comprar.html', lambda: pagina_sintetica(200, '/comprar-imoveis-chapeco-sc')),
+    'https://santamaria.com.br/alugar': ('santa_maria_alugar.html', pagina_javascript),
+    'https://santamaria.com.br/comprar-prontos': ('santa_maria_comprar.html', pagina_javascript),
+}
+
+def conteudo_fixture(url):
+    arquivo, gerador = FIXTURES[url]
+    caminho = os.path.join(DIRETORIO_FIXTURES, arquivo)
+    if os.path.exists(caminho):
+        with open(caminho, 'rb') as f:
+            return f.read()
+    return gerador()
+
+
+class RespostaSimulada:
+    """Subconjunto de requests.Response usado pelos scrapers"""
+
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class ClienteSimulado:
+    """Substitui o ClienteHTTP: responde com as fixtures, sem rede"""
+
+    def __init__(self):
+        self._cache = {}
+        self.requisicoes = 0
+
+    def get(self, url, **kwargs):
+        self.requisicoes += 1
+        if url not in FIXTURES:
+            return RespostaSimulada(404, b'')
+        if url not in self._cache:
+            self._cache[url] = conteudo_fixture(url)
+        return RespostaSimulada(200, self._cache[url])
+
+    def estatisticas(self):
+        return {'simulado': {'requisicoes': self.requisicoes}}
+
+
+@contextmanager
+def http_simulado():
+    """Troca o cliente HTTP dos scrapers pelo ClienteSimulado durante o bloco"""
+    import src.incremental
+    original = src.incremental.cliente_http
+    cliente = ClienteSimulado()
+    src.incremental.cliente_http = cliente
+    try:
+        yield cliente
+    finally:
+        src.incremental.cliente_http = original
+
+
+def extrair_do_arquivo(caminho_db):
+    """Grava em benchmarks/fixtures/ a versão arquivada mais recente de cada URL"""
+    from benchmarks.comum import criar_app
+    from src.arquivo_paginas import arquivo_paginas
+
+    app = criar_app(caminho_db)
+    with app.app_context():
+        versoes = arquivo_paginas.ultimas_versoes()
+        os.makedirs(DIRETORIO_FIXTURES, exist_ok=True)
+        for url, (arquivo, _) in FIXTURES.items():
+            linha = versoes.get(url)
+            if linha is None:
+                print(f"  {arquivo:<28} sem página arquivada (continua sintética)")
+                continue
+            conteudo = arquivo_paginas.ler(linha.sha256, linha.compressao)
+            with open(os.path.join(DIRETORIO_FIXTURES, arquivo), 'wb') as f:
+                f.write(conteudo)
+            print(f"  {arquivo:<28} {len(conteudo):>9} bytes  ({linha.buscado_em:%Y-%m-%d %H:%M})")
+
+def main():
+    from src.database import CAMINHO_SQLITE
+
+    parser = argparse.ArgumentParser(description='Atualiza as fixtures a partir do arquivo de páginas')
+    parser.add_argument('--db', default=CAMINHO_SQLITE, help='banco com o índice paginas_arquivadas')
+    args = parser.parse_args()
+    extrair_do_arquivo(args.db)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import threading
+import numpy as np
+from sqlalchemy import select
+from src.cache import versao_dados
+from src.database import db
+from src.models.imovel import Imovel
+from src.normalizacao import normalizar_texto
+
+# Análise de mercado sobre os imóveis ativos. As colunas numéricas e as
+# dimensões (como códigos inteiros) são lidas do banco uma vez por versão dos
+# dados e ficam em arrays NumPy, junto com a ordem crescente de cada métrica;
+# cada consulta filtra com máscaras e calcula contagem, média e percentis de
+# todos os grupos de uma vez, sem laço em Python por imóvel.
+
+# Dimensões aceitas em ?agrupar= e como filtro. tipo_negocio sempre entra no
+# agrupamento: preços de locação e de venda não se misturam.
+DIMENSOES = {
+    'tipo_negocio': Imovel.tipo_negocio,
+    'bairro': Imovel.bairro,
+    'tipo_imovel': Imovel.tipo_imovel,
+    'quartos': Imovel.quartos_num,
+    'imobiliaria': Imovel.imobiliaria,
+}
+
+# Métricas aceitas em ?metrica= -> (coluna, divisor)
+METRICAS = {
+    'preco_m2': (Imovel.preco_m2, 1),
+    'preco': (Imovel.preco_centavos, 100),
+    'area': (Imovel.area_m2, 1),
+}
+
+PERCENTIS = (25, 50, 75)
+
+# Até este número de combinações possíveis os grupos são numerados por
+# contagem direta (bincount) em vez de np.unique
+MAX_CHAVES_DENSAS = 1 << 22
+
+
+def _codificar(valores):
+    """Códigos inteiros por valor normalizado e o rótulo (primeiro valor visto) de cada código"""
+    por_valor, por_chave, rotulos = {}, {}, []
+    codigos = np.empty(len(valores), dtype=np.int64)
+    for i, valor in enumerate(valores):
+        codigo = por_valor.get(valor)
+        if codigo is None:
+            chave = normalizar_texto(valor) if isinstance(valor, str) else valor
+            codigo = por_chave.get(chave)
+            if codigo is None:
+                codigo = por_chave[chave] = len(rotulos)
+                rotulos.append(valor)
+            por_valor[valor] = codigo
+        codigos[i] = codigo
+    return codigos, rotulos
+
+
+class BaseMercado:
+    """Arrays dos imóveis ativos de uma versão dos dados"""
+
+    def __init__(self, linhas):
+        colunas = list(zip(*linhas)) or [()] * (len(DIMENSOES) + len(METRICAS))
+        self.codigos, self.rotulos = {}, {}
+        for nome, valores in zip(DIMENSOES, colunas):
+            self.codigos[nome], self.rotulos[nome] = _codificar(valores)
+        self.metricas, self.ordens = {}, {}
+        for (nome, (_, divisor)), valores in zip(METRICAS.items(), colunas[len(DIMENSOES):]):
+            self.metricas[nome] = np.array(valores, dtype=np.float64) / divisor  # None -> nan
+            # Ordem crescente de cada métrica, calculada uma vez por versão (nan no fim)
+            self.ordens[nome] = np.argsort(self.metricas[nome], kind='stable')
+        self.total = len(linhas)
+
+    @classmethod
+    def carregar(cls):
+        colunas = list(DIMENSOES.values()) + [coluna for coluna, _ in METRICAS.values()]
+        consulta = select(*colunas).where(Imovel.ativo == True)
+        # Cursor do driver direto: montar 200k objetos Row custa mais que a própria consulta
+        conexao = db.session.connection()
+        sql = str(consulta.compile(dialect=conexao.dialect, compile_kwargs={'literal_binds': True}))
+        cursor = conexao.connection.cursor()
+        try:
+            cursor.execute(sql)
+            linhas = cursor.fetchall()
+        finally:
+            cursor.close()
+        return cls(linhas)
+
+    def codigo(self, dimensao, valor):
+        """Código do valor de filtro (comparação normalizada; None se não existir)"""
+        if dimensao == 'quartos':
+            valor = int(valor)
+        else:
+            valor = normalizar_texto(valor)
+        for codigo, rotulo in enumerate(self.rotulos[dimensao]):
+            if (normalizar_texto(rotulo) if isinstance(rotulo, str) else rotulo) == valor:
+                return codigo
+        return None
+
+    def analisar(self, agrupar, filtros=None, metrica='preco_m2', minimo=1):
+        """Estatísticas da métrica por grupo.
+
+        agrupar: dimensões do grupo (tipo_negocio é sempre incluída)
+        filtros: {dimensao: valor}
+        Devolve a lista de grupos ordenada pela quantidade de imóveis. Quando
+        o agrupamento inclui a imobiliária, cada grupo traz também a mediana
+        do mercado (o mesmo grupo sem a imobiliária) e o índice entre as duas.
+        """
+        agrupar = ['tipo_negocio'] + [d for d in agrupar if d != 'tipo_negocio']
+        mascara = ~np.isnan(self.metricas[metrica])
+        for dimensao, valor in (filtros or {}).items():
+            codigo = self.codigo(dimensao, valor)
+            if codigo is None:
+                return []
+            mascara &= self.codigos[dimensao] == codigo
+
+        # Imóveis selecionados já em ordem crescente da métrica
+        ordem = self.ordens[metrica]
+        indices = ordem[mascara[ordem]]
+        valores = self.metricas[metrica][indices]
+        codigos = {d: self.codigos[d][indices] for d in agrupar}
+        grupos = self._estatisticas(agrupar, codigos, valores, minimo)
+
+        if 'imobiliaria' in agrupar and grupos:
+            mercado_dims = [d for d in agrupar if d != 'imobiliaria']
+            mercado = {
+                tuple(g[d] for d in mercado_dims): g['mediana']
+                for g in self._estatisticas(mercado_dims, codigos, valores, 1)
+            }
+            for grupo in grupos:
+                mediana_mercado = mercado.get(tuple(grupo[d] for d in mercado_dims))
+                grupo['mediana_mercado'] = mediana_mercado
+                grupo['indice_mercado'] = round(grupo['mediana'] / mediana_mercado, 4) if mediana_mercado else None
+        return grupos
+
+    def _estatisticas(self, agrupar, codigos, valores, minimo):
+        if not len(valores):
+            return []
+        # Chave única por combinação das dimensões (base mista com a cardinalidade de cada uma)
+        chave = np.zeros(len(valores), dtype=np.int64)
+        cardinalidade = 1
+        for dimensao in agrupar:
+            chave = chave * len(self.rotulos[dimensao]) + codigos[dimensao]
+            cardinalidade *= len(self.rotulos[dimensao])
+        if cardinalidade <= MAX_CHAVES_DENSAS:
+            # Renumeração direta das chaves presentes, sem ordenar
+            chaves = np.flatnonzero(np.bincount(chave, minlength=cardinalidade))
+            densas = np.empty(cardinalidade, dtype=np.int64)
+            densas[chaves] = np.arange(len(chaves))
+            grupo = densas[chave]
+        else:
+            chaves, grupo = np.unique(chave, return_inverse=True)
+
+        # Os valores já estão em ordem: a ordenação estável só pelo grupo os
+        # deixa contíguos e ordenados dentro de cada grupo (radix sort em uint16)
+        tipo_grupo = np.uint16 if len(chaves) <= np.iinfo(np.uint16).max else np.int64
+        ordenados = valores[np.argsort(grupo.astype(tipo_grupo), kind='stable')]
+        contagens = np.bincount(grupo, minlength=len(chaves))
+        inicios = np.concatenate(([0], np.cumsum(contagens)[:-1]))
+        medias = np.bincount(grupo, weights=valores, minlength=len(chaves)) / contagens
+
+        # Percentil com interpolação linear (como np.percentile) dentro de cada grupo
+        percentis = {}
+        for p in PERCENTIS:
+            posicao = inicios + (contagens - 1) * (p / 100)
+            abaixo = np.floor(posicao).astype(np.int64)
+            acima = np.ceil(posicao).astype(np.int64)
+            percentis[p] = ordenados[abaixo] + (ordenados[acima] - ordenados[abaixo]) * (posicao - abaixo)
+
+        # Decodifica a chave de volta nos códigos de cada dimensão
+        decodificados = {}
+        resto = chaves
+        for dimensao in reversed(agrupar):
+            resto, decodificados[dimensao] = np.divmod(resto, len(self.rotulos[dimensao]))
+
+        resultado = []
+        for i in np.argsort(-contagens, kind='stable'):
+            if contagens[i] < minimo:
+                continue
+            grupo_dict = {d: self.rotulos[d][decodificados[d][i]] for d in agrupar}
+            grupo_dict.update({
+                'quantidade': int(contagens[i]),
+                'media': round(float(medias[i]), 2),
+                'p25': round(float(percentis[25][i]), 2),
+                'mediana': round(float(percentis[50][i]), 2),
+                'p75': round(float(percentis[75][i]), 2),
+                'minimo': round(float(ordenados[inicios[i]]), 2),
+                'maximo': round(float(ordenados[inicios[i] + contagens[i] - 1]), 2),
+            })
+            resultado.append(grupo_dict)
+        return resultado
+
+
+_base = {'versao': None, 'dados': None}
+_lock = threading.Lock()
+
+def base_mercado():
+    """BaseMercado da versão atual dos dados (recarregada quando a versão muda)"""
+    versao = versao_dados()
+    if _base['versao'] != versao:
+        with _lock:
+            if _base['versao'] != versao:
+                _base['dados'] = BaseMercado.carregar()
+                _base['versao'] = versao
+    return _base['dados']
@@ -0,0 +1,157 @@
+import json
+import os
+from datetime import datetime
+from threading import Lock
+from src.busca import casa_frase, casa_prefixos, termos
+from src.estatisticas import inicio_do_dia
+from src.models.imovel import Imovel
+from src.normalizacao import normalizar_texto
+
+# Arquivo usado quando a tabela de imóveis está vazia
+IMOVEIS_JSON = os.environ.get('IMOVEIS_JSON', 'imoveis_coletados.json')
+
+def _termos_normalizados(texto):
+    return [normalizar_texto(t) for t in termos(texto)]
+
+
+class ArmazemJSON:
+    """Armazém somente leitura dos imóveis do arquivo JSON de contingência.
+    
+    O arquivo é lido uma vez e só é recarregado quando mtime ou tamanho
+    mudam. Na carga os registros recebem os mesmos campos derivados da
+    ingestão (bairro, colunas numéricas), ficam ordenados por data_coleta
+    desc e são indexados por tipo_negocio, imobiliária, bairro e tipo de
+    imóvel normalizados, de modo que uma busca custa O(resultados) em vez
+    de reprocessar o arquivo inteiro.
+    """
+    
+    def __init__(self, caminho=IMOVEIS_JSON):
+        self.caminho = caminho
+        self._assinatura = None
+        # (registros, índices) da mesma carga: trocado de uma vez na recarga,
+        # para uma busca em andamento nunca misturar posições de cargas diferentes
+        self._estado = ([], {})
+        self._lock = Lock()
+    
+    def _recarregar_se_mudou(self):
+        estado = os.stat(self.caminho)  # FileNotFoundError propaga para a rota
+        assinatura = (estado.st_mtime_ns, estado.st_size)
+        if assinatura == self._assinatura:
+            return
+        with self._lock:
+            if assinatura == self._assinatura:
+                return
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                imoveis_json = json.load(f)
+            data_arquivo = datetime.utcfromtimestamp(estado.st_mtime)
+            self._estado = self._indexar(imoveis_json, data_arquivo)
+            self._assinatura = assinatura
+    
+    def _indexar(self, imoveis_json, data_arquivo):
+        registros = []
+        for imovel in imoveis_json:
+            registro = {**Imovel.valores_scraper(imovel), 'ativo': True}
+            del registro['hash_conteudo']  # só interessa à ingestão
+            registro['id'] = imovel.get('id') or imovel.get('codigo', '0')
+            data_coleta = imovel.get('data_coleta')
+            registro['data_coleta'] = datetime.fromisoformat(data_coleta) if data_coleta else data_arquivo
+            registros.append(registro)
+        registros.sort(key=lambda r: (r['data_coleta'], str(r['id'])), reverse=True)
+        
+        indices = {'tipo_negocio': {}, 'imobiliaria': {}, 'bairro': {}, 'tipo_imovel': {}, 'palavras': {}}
+        for posicao, registro in enumerate(registros):
+            # Índice invertido das palavras dos campos textuais (para ?q=)
+            texto = ' '.join(str(registro.get(campo) or '') for campo in ('titulo', 'endereco', 'bairro', 'tipo_imovel'))
+            for palavra in set(_termos_normalizados(texto)):
+                indices['palavras'].setdefault(palavra, set()).add(posicao)
+            indices['tipo_negocio'].setdefault(registro['tipo_negocio'], set()).add(posicao)
+            indices['imobiliaria'].setdefault(registro['imobiliaria'], set()).add(posicao)
+            indices['bairro'].setdefault(normalizar_texto(registro['bairro']), set()).add(posicao)
+            indices['tipo_imovel'].setdefault(normalizar_texto(registro['tipo_imovel']), set()).add(posicao)
+        return registros, indices
+    
+    def _por_chaves(self, indice, casa):
+        """União das posições do índice cujas chaves normalizadas satisfazem casa(chave)"""
+        posicoes = set()
+        for chave, conjunto in indice.items():
+            if casa(chave):
+                posicoes |= conjunto
+        return posicoes
+    
+    def buscar(self, args, faixas=(), ordenar='data_coleta', ordem='desc', limite=50):
+        """Aplica a mesma semântica de filtros da consulta SQL de listar_imoveis.
+        
+        faixas: [(campo, operador, valor)] já validados pela rota.
+        limite=None devolve todos os imóveis que passam pelos filtros.
+        """
+        self._recarregar_se_mudou()
+        registros, indices = self._estado
+        candidatos = []
+        
+        tipo_negocio = args.get('tipo_negocio')
+        if tipo_negocio in ('Locação', 'Vendas'):
+            valor = 'LOCAÇÃO' if tipo_negocio == 'Locação' else 'VENDA'
+            candidatos.append(indices['tipo_negocio'].get(valor, set()))
+        
+        imobiliaria = args.get('imobiliaria')
+        if imobiliaria and imobiliaria != 'Todas':
+            candidatos.append(indices['imobiliaria'].get(imobiliaria, set()))
+        
+        # Tipo: prefixo de cada termo; bairro: termos em sequência (como no FTS)
+        tipo_imovel = args.get('tipo_imovel')
+        if tipo_imovel and tipo_imovel != 'Todos' and termos(tipo_imovel):
+            candidatos.append(self._por_chaves(indices['tipo_imovel'], casa_prefixos(tipo_imovel)))
+        
+        bairro = args.get('bairro')
+        if bairro and bairro != 'Todos' and termos(bairro):
+            candidatos.append(self._por_chaves(indices['bairro'], casa_frase(bairro)))
+        
+        # Texto livre: cada termo como prefixo de alguma palavra (como no FTS)
+        for termo in _termos_normalizados(args.get('q')):
+            candidatos.append(self._por_chaves(indices['palavras'], lambda palavra: palavra.startswith(termo)))
+        
+        if candidatos:
+            candidatos.sort(key=len)
+            posicoes = sorted(set(candidatos[0]).intersection(*candidatos[1:]))
+        else:
+            posicoes = range(len(registros))  # já em ordem, sem materializar
+        
+        # Filtros residuais, avaliados só sobre os candidatos
+        hoje = inicio_do_dia() if args.get('apenas_novos', 'false').lower() == 'true' else None
+        
+        def aceita(registro):
+            if hoje and registro['data_coleta'] < hoje:
+                return False
+            for campo, operador, valor in faixas:
+                atual = registro.get(campo)
+                if atual is None or (atual < valor if operador == '>=' else atual > valor):
+                    return False
+            return True
+        
+        if ordenar == 'data_coleta' and ordem == 'desc':
+            # Posições já estão na ordem da listagem: parar ao completar a página
+            selecionados = []
+            for posicao in posicoes:
+                if aceita(registros[posicao]):
+                    selecionados.append(registros[posicao])
+                    if len(selecionados) == limite:
+                        break
+            return [self._publico(r) for r in selecionados]
+        
+        selecionados = [registros[p] for p in posicoes if aceita(registros[p])]
+        if ordenar != 'data_coleta':
+            selecionados = [r for r in selecionados if r.get(ordenar) is not None]
+            selecionados.sort(key=lambda r: r[ordenar], reverse=(ordem == 'desc'))
+        elif ordem == 'asc':
+            selecionados.reverse()
+        
+        return [self._publico(r) for r in selecionados[:limite]]
+    
+    def _publico(self, registro):
+        """Cópia serializável, no mesmo formato de Imovel.to_dict()"""
+        publico = dict(registro)
+        publico['data_coleta'] = registro['data_coleta'].isoformat()
+        return publico
+
+
+armazem_json = ArmazemJSON()
@@ -0,0 +1,291 @@
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import delete, func, insert, select
+
+from src.database import db
+from src.models.pagina_arquivada import PaginaArquivada
+
+try:
+    import zstandard
+except ImportError:  # opcional: sem ele as páginas são gravadas com gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Arquivo das páginas baixadas pelos scrapers. O cliente HTTP guarda o corpo
+# de cada GET 200 em disco, comprimido e endereçado pelo sha256
+# (<dir>/ab/abcd....html.gz); a tabela paginas_arquivadas registra URL, data
+# e hash de cada busca. Com isso um parser corrigido pode ser rodado de novo
+# sobre as páginas já baixadas (reprocessar_paginas), sem acessar os sites.
+# Como no incremental, as threads dos scrapers só gravam os arquivos; as
+# linhas do índice ficam em memória até salvar(), chamado na thread do job.
+# Só se arquiva dentro de coleta(): fora de um job que salva o índice (ex.:
+# executar_todos_scrapers pela linha de comando) os arquivos ficariam órfãos.
+ARQUIVO_PAGINAS = os.environ.get('ARQUIVO_PAGINAS', 'true').lower() == 'true'
+ARQUIVO_PAGINAS_DIR = os.environ.get(
+    'ARQUIVO_PAGINAS_DIR', os.path.join(os.path.dirname(__file__), 'database', 'paginas'))
+ARQUIVO_PAGINAS_COMPRESSAO = os.environ.get('ARQUIVO_PAGINAS_COMPRESSAO') or ('zstd' if zstandard else 'gzip')
+ARQUIVO_PAGINAS_RETENCAO_DIAS = int(os.environ.get('ARQUIVO_PAGINAS_RETENCAO_DIAS', 90))
+
+# Arquivos sem referência no índice só são apagados depois deste prazo (a
+# execução em andamento pode ter gravado o arquivo e ainda não o índice)
+CARENCIA_ORFAOS = timedelta(days=1)
+
+EXTENSOES = {'gzip': '.html.gz', 'zstd': '.html.zst'}
+
+
+def _comprimir(conteudo, compressao):
+    if compressao == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(conteudo)
+    return gzip.compress(conteudo, compresslevel=6)
+
+def _descomprimir(dados, compressao):
+    if compressao == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Página arquivada com zstd: instale o pacote zstandard para lê-la")
+        return zstandard.ZstdDecompressor().decompress(dados)
+    return gzip.decompress(dados)
+
+
+class RespostaArquivada:
+    """Subconjunto de requests.Response usado pelos scrapers, lido do arquivo"""
+
+    def __init__(self, status_code, content, headers=None, url=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class ArquivoPaginas:
+    """Páginas comprimidas em disco (endereçadas pelo sha256) e o índice de buscas"""
+
+    def __init__(self, diretorio=None, compressao=None):
+        self.diretorio = diretorio or ARQUIVO_PAGINAS_DIR
+        self.compressao = compressao or ARQUIVO_PAGINAS_COMPRESSAO
+        if self.compressao == 'zstd' and zstandard is None:
+            logger.warning("⚠️ zstandard não instalado: arquivo de páginas usando gzip")
+            self.compressao = 'gzip'
+        self._pendentes = []
+        self._coletas = 0
+        self._lock = threading.Lock()
+
+    def caminho(self, sha256, compressao):
+        return os.path.join(self.diretorio, sha256[:2], sha256 + EXTENSOES[compressao])
+
+    def guardar(self, conteudo):
+        """Grava o corpo (se ainda não existir) e devolve o sha256"""
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        caminho = self.caminho(sha256, self.compressao)
+        if os.path.exists(caminho):
+            os.utime(caminho)  # em uso: fora da poda de órfãos
+            return sha256
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Arquivo temporário + rename: nunca fica um arquivo pela metade no lugar do definitivo
+        descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                arquivo.write(_comprimir(conteudo, self.compressao))
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        return sha256
+
+    @contextmanager
+    def coleta(self):
+        """Ativa o arquivamento durante o bloco (quem abre chama salvar() depois)"""
+        with self._lock:
+            self._coletas += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._coletas -= 1
+
+    def arquivar(self, url, response):
+        """Chamado pelo cliente HTTP a cada GET 200 (ignorado fora de coleta())"""
+        if not self._coletas:
+            return
+        sha256 = self.guardar(response.content)
+        with self._lock:
+            self._pendentes.append({
+                'url': url,
+                'buscado_em': datetime.utcnow(),
+                'sha256': sha256,
+                'compressao': self.compressao,
+                'status_code': response.status_code,
+                'content_type': (response.headers.get('Content-Type') or '')[:100] or None,
+                'tamanho': len(response.content)
+            })
+
+    def ler(self, sha256, compressao):
+        with open(self.caminho(sha256, compressao), 'rb') as arquivo:
+            return _descomprimir(arquivo.read(), compressao)
+
+    def salvar(self):
+        """Grava as linhas pendentes do índice (sem commit)"""
+        with self._lock:
+            linhas, self._pendentes = self._pendentes, []
+        if linhas:
+            db.session.execute(insert(PaginaArquivada.__table__), linhas)
+        return len(linhas)
+
+    def ultimas_versoes(self, ate=None):
+        """{url: linha do índice} com a busca mais recente de cada URL (até a data `ate`)"""
+        tabela = PaginaArquivada.__table__
+        ultimas = select(func.max(tabela.c.id)).group_by(tabela.c.url)
+        if ate is not None:
+            ultimas = ultimas.where(tabela.c.buscado_em <= ate)
+        consulta = select(
+            tabela.c.url, tabela.c.sha256, tabela.c.compressao, tabela.c.status_code,
+            tabela.c.content_type, tabela.c.buscado_em
+        ).where(tabela.c.id.in_(ultimas))
+        return {linha.url: linha for linha in db.session.execute(consulta)}
+
+    def podar(self, dias=None):
+        """Apaga buscas mais antigas que `dias` e os arquivos que ficaram sem referência.
+
+        A busca mais recente de cada URL é mantida mesmo se for antiga, para a
+        reprodução sempre ter uma versão da página. Não faz commit.
+        """
+        dias = ARQUIVO_PAGINAS_RETENCAO_DIAS if dias is None else dias
+        tabela = PaginaArquivada.__table__
+        corte = datetime.utcnow() - timedelta(days=dias)
+        ultimas = select(func.max(tabela.c.id)).group_by(tabela.c.url)
+        linhas = db.session.execute(
+            delete(tabela).where(tabela.c.buscado_em < corte, tabela.c.id.not_in(ultimas))
+        ).rowcount
+
+        referenciados = set(db.session.execute(select(tabela.c.sha256).distinct()).scalars())
+        limite_orfao = time.time() - CARENCIA_ORFAOS.total_seconds()
+        arquivos = bytes_liberados = 0
+        for pasta, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                caminho = os.path.join(pasta, nome)
+                sha256 = nome.split('.', 1)[0]
+                if sha256 in referenciados or os.path.getmtime(caminho) >= limite_orfao:
+                    continue
+                bytes_liberados += os.path.getsize(caminho)
+                os.unlink(caminho)
+                arquivos += 1
+        return {'buscas': linhas, 'arquivos': arquivos, 'bytes': bytes_liberados}
+
+
+# Instância usada pelo cliente HTTP compartilhado
+arquivo_paginas = ArquivoPaginas()
+
+
+class ClienteReplay:
+    """Substitui o ClienteHTTP na reprodução: responde com as páginas arquivadas.
+
+    O índice é lido na criação (thread do job, com app context); as threads
+    dos scrapers só leem os arquivos do disco.
+    """
+
+    def __init__(self, arquivo=None, ate=None):
+        self.arquivo = arquivo or arquivo_paginas
+        self._paginas = self.arquivo.ultimas_versoes(ate)
+        self._contadores = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        linha = self._paginas.get(url)
+        if linha is None:
+            logger.warning(f"⚠️ Página não arquivada: {url}")
+            self._contar(nao_arquivadas=1)
+            return RespostaArquivada(404, b'', url=url)
+        conteudo = self.arquivo.ler(linha.sha256, linha.compressao)
+        self._contar(paginas=1, bytes=len(conteudo))
+        return RespostaArquivada(linha.status_code, conteudo, {'Content-Type': linha.content_type or ''}, url)
+
+    def _contar(self, **incrementos):
+        with self._lock:
+            self._contadores.update(incrementos)
+
+    def estatisticas(self):
+        with self._lock:
+            return {'arquivo': dict(self._contadores)}
+
+
+@contextmanager
+def http_arquivado(ate=None):
+    """Troca o cliente HTTP dos scrapers pelo ClienteReplay durante o bloco"""
+    import src.incremental
+    original = src.incremental.cliente_http
+    cliente = ClienteReplay(ate=ate)
+    src.incremental.cliente_http = cliente
+    try:
+        yield cliente
+    finally:
+        src.incremental.cliente_http = original
+
+def reprocessar_paginas(ate=None, gravar=True):
+    """Roda os scrapers sobre as páginas arquivadas, sem acessar os sites.
+
+    Com gravar=True os imóveis passam pela ingestão normal (commit por lote)
+    e pelo agrupamento de duplicatas, mas sem a varredura de ausentes: o
+    arquivo pode não ter todas as páginas.
+    Devolve (totais da ingestão, relatório por site, estatísticas do arquivo).
+    """
+    from src.scrapers_gerais import executar_scrapers
+    from src.ingestao import IngestaoEmLotes
+    from src.duplicatas import atualizar_duplicatas
+    from src.cache import incrementar_versao_dados
+
+    ingestao = IngestaoEmLotes() if gravar else None
+    coletados = Counter()
+
+    def ao_imoveis(imoveis):
+        coletados['coletados'] += len(imoveis)
+        if ingestao:
+            ingestao.adicionar(imoveis)
+
+    with http_arquivado(ate) as cliente:
+        db.session.commit()  # não segurar a transação de leitura durante a reprodução
+        _, relatorio = executar_scrapers(ao_imoveis=ao_imoveis)
+    if ingestao:
+        totais = ingestao.finalizar()
+        atualizar_duplicatas(commit=True)
+        incrementar_versao_dados()
+        db.session.commit()
+    else:
+        totais = dict(coletados)
+    return totais, relatorio, cliente.estatisticas()['arquivo']
+
+def registrar_comandos_arquivo(app):
+    """Registra `flask reprocessar-paginas` e `flask podar-paginas`"""
+    @app.cli.command('reprocessar-paginas')
+    @click.option('--ate', type=click.DateTime(), default=None, help='Usar as páginas buscadas até esta data (UTC)')
+    @click.option('--sem-gravar', is_flag=True, help='Só parsear e contar, sem gravar os imóveis')
+    def reprocessar_paginas_comando(ate, sem_gravar):
+        """Reparseia as páginas arquivadas com os scrapers atuais"""
+        inicio = time.perf_counter()
+        totais, relatorio, arquivo = reprocessar_paginas(ate, gravar=not sem_gravar)
+        for nome, info in relatorio.items():
+            click.echo(f"{nome}: {info['status']} | {info['imoveis']} imóveis")
+        click.echo(f"Páginas lidas: {arquivo.get('paginas', 0)} ({arquivo.get('nao_arquivadas', 0)} não arquivadas)")
+        click.echo(f"Imóveis: {totais} em {time.perf_counter() - inicio:.1f}s")
+
+    @app.cli.command('podar-paginas')
+    @click.option('--dias', type=int, default=None, help=f'Retenção em dias (padrão: {ARQUIVO_PAGINAS_RETENCAO_DIAS})')
+    def podar_paginas_comando(dias):
+        """Remove do arquivo as páginas mais antigas que a retenção"""
+        resultado = arquivo_paginas.podar(dias)
+        db.session.commit()
+        click.echo(f"{resultado['buscas']} buscas e {resultado['arquivos']} arquivos removidos "
+                   f"({resultado['bytes'] / 1024 / 1024:.1f} MB)")
@@ -0,0 +1,121 @@
+import re
+from sqlalchemy import text, or_, and_, select, table, column, literal_column, Integer
+from src.database import db
+from src.models.imovel import Imovel
+from src.normalizacao import normalizar_texto
+
+# Índice de texto completo (SQLite FTS5) sobre os campos textuais dos imóveis.
+# A tabela é "external content": o texto fica só em imoveis e os triggers
+# abaixo mantêm o índice sincronizado em INSERT, UPDATE e DELETE. O tokenizer
+# unicode61 com remove_diacritics faz "Médici" e "Medici" casarem.
+COLUNAS_FTS = ('titulo', 'endereco', 'bairro', 'tipo_imovel')
+
+SQL_FTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS imoveis_fts USING fts5(
+        {', '.join(COLUNAS_FTS)},
+        content='imoveis', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS imoveis_fts_insert AFTER INSERT ON imoveis BEGIN
+        INSERT INTO imoveis_fts (rowid, {', '.join(COLUNAS_FTS)})
+        VALUES (new.id, {', '.join('new.' + c for c in COLUNAS_FTS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS imoveis_fts_delete AFTER DELETE ON imoveis BEGIN
+        INSERT INTO imoveis_fts (imoveis_fts, rowid, {', '.join(COLUNAS_FTS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in COLUNAS_FTS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS imoveis_fts_update AFTER UPDATE OF {', '.join(COLUNAS_FTS)} ON imoveis BEGIN
+        INSERT INTO imoveis_fts (imoveis_fts, rowid, {', '.join(COLUNAS_FTS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in COLUNAS_FTS)});
+        INSERT INTO imoveis_fts (rowid, {', '.join(COLUNAS_FTS)})
+        VALUES (new.id, {', '.join('new.' + c for c in COLUNAS_FTS)});
+    END""",
+]
+
+_TERMO = re.compile(r'\w+', re.UNICODE)
+
+_tabela_fts = table('imoveis_fts', column('rowid', Integer))
+
+def criar_indice_fts(conexao):
+    """Cria a tabela FTS5 e os triggers (apenas SQLite) e reconstrói o índice"""
+    if conexao.dialect.name != 'sqlite':
+        return
+    for sql in SQL_FTS:
+        conexao.execute(text(sql))
+    conexao.execute(text("INSERT INTO imoveis_fts (imoveis_fts) VALUES ('rebuild')"))
+
+def fts_disponivel():
+    """Indica se o banco atual possui o índice FTS5"""
+    engine = db.engine
+    disponivel = getattr(engine, '_imoveis_fts', None)
+    if disponivel is None:
+        disponivel = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conexao:
+                disponivel = conexao.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'imoveis_fts'"
+                )).first() is not None
+        engine._imoveis_fts = disponivel
+    return disponivel
+
+def termos(texto):
+    """Quebra o texto em termos simples (descarta a sintaxe de consulta do FTS5)"""
+    return _TERMO.findall(texto or '')
+
+# Mesmas regras do FTS para filtrar valores fora do banco (arquivo JSON,
+# facetas): os predicados recebem o valor já normalizado
+def casa_prefixos(texto):
+    """Cada termo de `texto` é prefixo de alguma palavra do valor"""
+    buscados = [normalizar_texto(t) for t in termos(texto)]
+    return lambda valor: all(any(palavra.startswith(t) for palavra in termos(valor)) for t in buscados)
+
+def casa_frase(texto):
+    """Os termos de `texto` aparecem em sequência no valor"""
+    frase = ' '.join(normalizar_texto(t) for t in termos(texto))
+    return lambda valor: f' {frase} ' in f" {' '.join(termos(valor))} "
+
+def expressao_fts(texto, colunas=None, prefixo=False, frase=False):
+    """Monta uma expressão MATCH segura a partir de texto livre.
+
+    frase=True exige os termos em sequência; caso contrário todos os termos
+    precisam aparecer (AND). prefixo=True aceita termos incompletos no fim.
+    """
+    lista = termos(texto)
+    if not lista:
+        return None
+    if frase:
+        expressao = '"' + ' '.join(lista) + '"' + ('*' if prefixo else '')
+    else:
+        expressao = ' '.join(f'"{t}"' + ('*' if prefixo else '') for t in lista)
+    if colunas:
+        return '{' + ' '.join(colunas) + '} : (' + expressao + ')'
+    return expressao
+
+def filtrar_texto(query, condicoes):
+    """Restringe a query de Imovel aos registros que casam com todas as condições.
+    
+    Cada condição é uma tupla (texto, colunas, prefixo, frase) no formato de
+    expressao_fts. Com FTS5 as condições viram uma única expressão MATCH (a
+    interseção é feita dentro do índice); em outros bancos recorre a ILIKE
+    (sem índice e sem insensibilidade a acentos).
+    """
+    condicoes = [c for c in condicoes if termos(c[0])]
+    if not condicoes:
+        return query
+    if fts_disponivel():
+        expressao = ' AND '.join(
+            '(' + expressao_fts(texto, colunas, prefixo=prefixo, frase=frase) + ')'
+            for texto, colunas, prefixo, frase in condicoes
+        )
+        subquery = select(_tabela_fts.c.rowid).where(literal_column('imoveis_fts').op('MATCH')(expressao))
+        return query.filter(Imovel.id.in_(subquery))
+    
+    for texto, colunas, prefixo, frase in condicoes:
+        campos = [getattr(Imovel, coluna) for coluna in (colunas or COLUNAS_FTS)]
+        if frase:
+            query = query.filter(or_(*[campo.ilike(f'%{texto}%') for campo in campos]))
+        else:
+            query = query.filter(and_(*[
+                or_(*[campo.ilike(f'%{termo}%') for campo in campos]) for termo in termos(texto)
+            ]))
+    return query
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from flask import Response, g, request
+from sqlalchemy import update
+from src.database import db
+from src.models.versao_dados import VersaoDados
+
+# Cache das respostas de leitura do monitor_bp. A chave é a rota mais os
+# parâmetros normalizados; cada entrada guarda a versão dos dados com que foi
+# gerada e deixa de valer quando executar_scrapers_background incrementa a
+# versão. O ETag deriva de (versão, chave), então um If-None-Match válido é
+# respondido com 304 sem consultar os imóveis nem reenviar o corpo. Views
+# cujo resultado depende da data atual (novos de hoje, últimos N dias) levam
+# também a data UTC na chave, para não servir o dia anterior.
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 32 * 1024 * 1024))
+CACHE_TTL_VERSAO = float(os.environ.get('CACHE_TTL_VERSAO', 1))  # segundos
+
+_versao_lida = {'versao': None, 'lida_em': 0.0}
+
+def versao_dados():
+    """Versão atual dos dados (relida do banco no máximo a cada CACHE_TTL_VERSAO s)"""
+    agora = time.monotonic()
+    if _versao_lida['versao'] is None or agora - _versao_lida['lida_em'] >= CACHE_TTL_VERSAO:
+        registro = db.session.get(VersaoDados, 1)
+        _versao_lida['versao'] = registro.versao if registro else 0
+        _versao_lida['lida_em'] = agora
+    return _versao_lida['versao']
+
+def incrementar_versao_dados():
+    """Incrementa a versão na transação corrente (vale a partir do commit)"""
+    resultado = db.session.execute(
+        update(VersaoDados).where(VersaoDados.id == 1).values(versao=VersaoDados.versao + 1)
+    )
+    if resultado.rowcount == 0:
+        db.session.add(VersaoDados(id=1, versao=1))
+    _versao_lida['versao'] = None
+
+
+class CacheRespostas:
+    """Cache LRU de corpos de resposta limitado por memória (bytes)"""
+    
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obter(self, chave, versao):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            if entrada['versao'] != versao:
+                self._remover(chave)
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada
+    
+    def guardar(self, chave, versao, etag, corpo, mimetype):
+        """Guarda o corpo e devolve a entrada (None se não couber)"""
+        tamanho = len(corpo)
+        if tamanho > self.max_bytes // 8:
+            return None  # respostas grandes não compensam ocupar o cache
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave)
+            entrada = {
+                'chave': chave, 'versao': versao, 'etag': etag, 'corpo': corpo, 'mimetype': mimetype,
+                'comprimidos': {}, 'tamanho': tamanho
+            }
+            self._entradas[chave] = entrada
+            self.bytes += tamanho
+            self._liberar()
+        return entrada
+    
+    def guardar_comprimido(self, entrada, codificacao, corpo):
+        """Guarda o corpo comprimido (gzip/br) junto da entrada, se ela ainda estiver no cache"""
+        with self._lock:
+            if self._entradas.get(entrada['chave']) is not entrada or codificacao in entrada['comprimidos']:
+                return
+            entrada['comprimidos'][codificacao] = corpo
+            entrada['tamanho'] += len(corpo)
+            self.bytes += len(corpo)
+            self._liberar()
+    
+    def _liberar(self):
+        while self.bytes > self.max_bytes:
+            self._remover(next(iter(self._entradas)))
+    
+    def _remover(self, chave):
+        entrada = self._entradas.pop(chave)
+        self.bytes -= entrada['tamanho']
+    
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes = 0
+
+
+cache_respostas = CacheRespostas()
+
+def _chave_requisicao(por_dia=False):
+    """Rota + parâmetros ordenados, ignorando parâmetros vazios (e a data UTC com por_dia)"""
+    parametros = sorted((k, v) for k, v in request.args.items(multi=True) if v != '')
+    chave = request.path + '?' + '&'.join(f'{k}={v}' for k, v in parametros)
+    if por_dia:
+        chave += f'#{datetime.utcnow():%Y-%m-%d}'
+    return chave
+
+def resposta_cacheada(view=None, por_dia=False):
+    """Decorator: serve a resposta do cache enquanto a versão dos dados não mudar.
+    
+    por_dia: True (ou função dos request.args que devolve True) quando a
+    resposta depende da data atual; a data UTC entra na chave e no ETag.
+    A view pode marcar g.sem_cache = True para não guardar uma resposta
+    (por exemplo, quando os dados não vêm do banco).
+    """
+    if view is None:
+        return lambda view: resposta_cacheada(view, por_dia)
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        chave = _chave_requisicao(por_dia(request.args) if callable(por_dia) else por_dia)
+        versao = versao_dados()
+        etag = hashlib.sha1(f'{versao}:{chave}'.encode()).hexdigest()[:20]
+        
+        # Comparação fraca: a versão comprimida da resposta usa o mesmo ETag como W/
+        if request.if_none_match.contains_weak(etag):
+            resposta = Response(status=304)
+            resposta.set_etag(etag)
+            return resposta
+        
+        entrada = cache_respostas.obter(chave, versao)
+        if entrada is not None:
+            resposta = Response(entrada['corpo'], mimetype=entrada['mimetype'])
+        else:
+            resposta = view(*args, **kwargs)
+            if isinstance(resposta, tuple) or not isinstance(resposta, Response):
+                return resposta  # erros (corpo, status) não são cacheados
+            if resposta.status_code != 200 or resposta.is_streamed or g.get('sem_cache'):
+                return resposta
+            entrada = cache_respostas.guardar(chave, versao, etag, resposta.get_data(), resposta.mimetype)
+        # A compressão (src/respostas.py) reaproveita o corpo comprimido guardado na entrada
+        g.entrada_cache = entrada
+        
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = 'no-cache'  # sempre revalidar com If-None-Match
+        return resposta
+    return wrapper
@@ -0,0 +1,215 @@
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src import metricas
+from src.arquivo_paginas import ARQUIVO_PAGINAS, arquivo_paginas
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalhos enviados em todas as requisições dos scrapers
+HEADERS_PADRAO = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Status que justificam nova tentativa
+STATUS_RETENTATIVA = {429, 500, 502, 503, 504}
+
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10))
+HTTP_MAX_TENTATIVAS = int(os.environ.get('HTTP_MAX_TENTATIVAS', 3))
+HTTP_BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', 0.5))
+HTTP_BACKOFF_MAXIMO = float(os.environ.get('HTTP_BACKOFF_MAXIMO', 30))
+HTTP_TAXA_POR_HOST = float(os.environ.get('HTTP_TAXA_POR_HOST', 2))  # requisições por segundo
+HTTP_RAJADA_POR_HOST = int(os.environ.get('HTTP_RAJADA_POR_HOST', 4))
+HTTP_CONEXOES_POR_HOST = int(os.environ.get('HTTP_CONEXOES_POR_HOST', 4))
+
+
+class BaldeTokens:
+    """Token bucket: limita a taxa de requisições a um host permitindo rajadas curtas"""
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.atualizado_em = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consumir(self):
+        """Bloqueia até haver um token disponível e o consome"""
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado_em) * self.taxa)
+                self.atualizado_em = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = (1 - self.tokens) / self.taxa
+            time.sleep(espera)
+
+
+class ClienteHTTP:
+    """Cliente HTTP compartilhado pelos scrapers.
+
+    Mantém uma Session com pool de conexões (keep-alive) por host, aplica
+    limite de taxa por domínio, refaz requisições com backoff exponencial e
+    jitter e contabiliza requisições, bytes e retentativas por host. Com um
+    ArquivoPaginas (src/arquivo_paginas.py) o corpo de cada GET 200 é
+    arquivado para reprocessamento posterior.
+    """
+
+    def __init__(self, taxa_por_host=None, rajada_por_host=None, max_tentativas=None,
+                 backoff_base=None, backoff_maximo=None, timeout=None, limites_host=None, arquivo=None):
+        self.taxa_por_host = taxa_por_host or HTTP_TAXA_POR_HOST
+        self.rajada_por_host = rajada_por_host or HTTP_RAJADA_POR_HOST
+        self.max_tentativas = max_tentativas or HTTP_MAX_TENTATIVAS
+        self.backoff_base = backoff_base if backoff_base is not None else HTTP_BACKOFF_BASE
+        self.backoff_maximo = backoff_maximo or HTTP_BACKOFF_MAXIMO
+        self.timeout = timeout or HTTP_TIMEOUT
+        # Limites específicos: {'host': (taxa, rajada)}
+        self.limites_host = limites_host or {}
+        self.arquivo = arquivo
+
+        self._sessoes = {}
+        self._baldes = {}
+        self._estatisticas = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        return urlsplit(url).netloc.lower()
+
+    def _sessao(self, host):
+        with self._lock:
+            sessao = self._sessoes.get(host)
+            if sessao is None:
+                sessao = requests.Session()
+                sessao.headers.update(HEADERS_PADRAO)
+                adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_CONEXOES_POR_HOST)
+                sessao.mount('http://', adaptador)
+                sessao.mount('https://', adaptador)
+                self._sessoes[host] = sessao
+            return sessao
+
+    def _balde(self, host):
+        with self._lock:
+            balde = self._baldes.get(host)
+            if balde is None:
+                taxa, rajada = self.limites_host.get(host, (self.taxa_por_host, self.rajada_por_host))
+                balde = BaldeTokens(taxa, rajada)
+                self._baldes[host] = balde
+            return balde
+
+    def _registrar(self, host, **incrementos):
+        if incrementos.get('requisicoes'):
+            metricas.http_requisicoes.inc(host=host, status=incrementos.get('status', 'erro'))
+        if incrementos.get('bytes'):
+            metricas.http_bytes.inc(incrementos['bytes'], host=host)
+        if incrementos.get('retentativas'):
+            metricas.http_retentativas.inc(host=host)
+        with self._lock:
+            estat = self._estatisticas.setdefault(host, {
+                'requisicoes': 0, 'bytes': 0, 'retentativas': 0, 'erros': 0, 'status': {}
+            })
+            status = incrementos.pop('status', None)
+            if status is not None:
+                estat['status'][status] = estat['status'].get(status, 0) + 1
+            for campo, valor in incrementos.items():
+                estat[campo] += valor
+
+    def _espera_backoff(self, tentativa, response=None):
+        """Backoff exponencial com jitter completo, respeitando Retry-After quando presente"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_maximo)
+        teto = min(self.backoff_maximo, self.backoff_base * (2 ** tentativa))
+        return random.uniform(0, teto)
+
+    def get(self, url, **kwargs):
+        """GET com pool de conexões, limite de taxa e retentativas"""
+        return self.requisitar('GET', url, **kwargs)
+
+    def requisitar(self, metodo, url, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            response = self._requisitar(metodo, url, **kwargs)
+        finally:
+            # Inclui espera do limite de taxa e backoff: é o tempo de fetch visto pelo scraper
+            duracao = time.perf_counter() - inicio
+            metricas.http_duracao.observar(duracao, host=self._host(url))
+            metricas.acumular_etapa('fetch', duracao)
+
+        if self.arquivo is not None and metodo == 'GET' and response.status_code == 200:
+            try:
+                self.arquivo.arquivar(url, response)
+            except OSError as e:
+                # Falha no disco não interrompe a coleta
+                logger.warning(f"⚠️ Página não arquivada ({url}): {e}")
+        return response
+
+    def _requisitar(self, metodo, url, **kwargs):
+        host = self._host(url)
+        sessao = self._sessao(host)
+        balde = self._balde(host)
+        kwargs.setdefault('timeout', self.timeout)
+
+        for tentativa in range(self.max_tentativas):
+            ultima = tentativa == self.max_tentativas - 1
+            balde.consumir()
+            try:
+                response = sessao.request(metodo, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._registrar(host, requisicoes=1, erros=1)
+                if ultima:
+                    raise
+                espera = self._espera_backoff(tentativa)
+                logger.warning(f"🔁 {host}: {e.__class__.__name__}, nova tentativa em {espera:.1f}s")
+                self._registrar(host, retentativas=1)
+                time.sleep(espera)
+                continue
+
+            self._registrar(host, requisicoes=1, bytes=self._tamanho_resposta(response), status=response.status_code)
+            if response.status_code in STATUS_RETENTATIVA and not ultima:
+                espera = self._espera_backoff(tentativa, response)
+                logger.warning(f"🔁 {host}: status {response.status_code}, nova tentativa em {espera:.1f}s")
+                self._registrar(host, retentativas=1)
+                response.close()
+                time.sleep(espera)
+                continue
+            return response
+
+    def _tamanho_resposta(self, response):
+        """Bytes recebidos pela rede (comprimidos), com fallback para o corpo decodificado"""
+        try:
+            lidos = response.raw.tell()
+            if lidos:
+                return lidos
+        except Exception:
+            pass
+        return len(response.content)
+
+    def estatisticas(self):
+        """Retorna uma cópia dos contadores por host"""
+        with self._lock:
+            return {host: {**estat, 'status': dict(estat['status'])} for host, estat in self._estatisticas.items()}
+
+    def fechar(self):
+        with self._lock:
+            for sessao in self._sessoes.values():
+                sessao.close()
+            self._sessoes.clear()
+
+
+# Instância compartilhada por todos os scrapers do processo
+cliente_http = ClienteHTTP(arquivo=arquivo_paginas if ARQUIVO_PAGINAS else None)
@@ -0,0 +1,332 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import struct
+import time
+from collections import defaultdict
+
+import click
+from sqlalchemy import bindparam, delete, func, select, update
+
+from src.database import db, insert_upsert
+from src.models.grupo_duplicata import GrupoDuplicata
+from src.models.imovel import Imovel
+from src.normalizacao import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+# Detecção de anúncios do mesmo imóvel em imobiliárias diferentes, rodada
+# depois da ingestão. Nada é comparado par a par na base inteira:
+#
+# 1. Blocagem: só são candidatos imóveis com o mesmo negócio, bairro, tipo e
+#    quartos e na mesma faixa de preço e de área (faixas logarítmicas de
+#    DUPLICATAS_FAIXA, 20%). Anúncios na borda de uma faixa podem cair em
+#    blocos vizinhos e não ser agrupados: é o custo de manter os blocos
+#    independentes.
+# 2. Dentro do bloco, cada anúncio tem uma assinatura MinHash dos termos do
+#    título e do endereço; o LSH (bandas da assinatura) aponta os pares
+#    candidatos, confirmados pela similaridade estimada (DUPLICATAS_LIMIAR).
+# 3. Union-find junta os pares confirmados; o grupo_id é o menor imovel_id.
+#
+# É incremental: assinatura e bloco ficam em grupo_duplicata junto com o
+# hash_conteudo usado, então cada execução só calcula os imóveis novos ou
+# alterados e reagrupa apenas os blocos em que algo mudou.
+DUPLICATAS_LIMIAR = float(os.environ.get('DUPLICATAS_LIMIAR', 0.5))
+DUPLICATAS_FAIXA = float(os.environ.get('DUPLICATAS_FAIXA', 0.2))
+
+NUM_HASHES = 32
+LINHAS_POR_BANDA = 4  # 8 bandas: pares com similaridade acima de ~0,6 quase sempre viram candidatos
+_ASSINATURA = struct.Struct(f'<{NUM_HASHES}I')
+
+# Imóveis lidos por consulta e blocos reagrupados por consulta
+LOTE_DUPLICATAS = 5000
+BLOCOS_POR_CONSULTA = 500
+
+_TERMO = re.compile(r'\w+', re.UNICODE)
+_LOG_FAIXA = math.log1p(DUPLICATAS_FAIXA)
+
+
+def _faixa(valor):
+    if not valor or valor <= 0:
+        return '-'
+    return str(int(math.log(valor) / _LOG_FAIXA))
+
+def _normalizado(texto):
+    return ' '.join(_TERMO.findall(normalizar_texto(texto)))
+
+def bloco(valores):
+    """Chave de blocagem: negócio, bairro, tipo, quartos e faixas de preço e área"""
+    return '|'.join((
+        valores['tipo_negocio'] or '',
+        _normalizado(valores['bairro']),
+        _normalizado(valores['tipo_imovel']),
+        '-' if valores['quartos_num'] is None else str(valores['quartos_num']),
+        _faixa(valores['preco_centavos']),
+        _faixa(valores['area_m2']),
+    ))
+
+def termos(valores):
+    """Palavras e pares de palavras consecutivas do título e do endereço"""
+    palavras = _TERMO.findall(normalizar_texto(f"{valores['titulo'] or ''} {valores['endereco'] or ''}"))
+    return set(palavras) | {f'{a} {b}' for a, b in zip(palavras, palavras[1:])}
+
+
+class Assinador:
+    """Assinaturas MinHash: NUM_HASHES valores de 32 bits por termo (SHAKE-128).
+
+    O hash de cada termo vem de uma única chamada ao SHAKE, em vez de
+    NUM_HASHES permutações em Python; os termos se repetem muito entre
+    anúncios, então ficam em memória durante a execução.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+
+    def _hash(self, termo):
+        valores = self._hashes.get(termo)
+        if valores is None:
+            valores = _ASSINATURA.unpack(hashlib.shake_128(termo.encode('utf-8')).digest(_ASSINATURA.size))
+            self._hashes[termo] = valores
+        return valores
+
+    def assinatura(self, termos_imovel):
+        if not termos_imovel:
+            return None
+        return _ASSINATURA.pack(*map(min, zip(*[self._hash(termo) for termo in termos_imovel])))
+
+
+def similaridade(a, b):
+    """Similaridade de Jaccard estimada por duas assinaturas (tuplas)"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+def agrupar(membros, limiar=None):
+    """Agrupa os anúncios de um bloco; devolve {imovel_id: grupo_id}.
+
+    membros: [(imovel_id, imobiliaria, assinatura em tupla ou None)]. Só
+    anúncios de imobiliárias diferentes são ligados diretamente (a mesma
+    imobiliária costuma repetir o título em unidades do mesmo prédio). Em
+    cada balde do LSH o anúncio é comparado com um membro de cada grupo já
+    presente no balde, não com todos: baldes grandes de anúncios quase
+    iguais custam O(n), não O(n²).
+    """
+    limiar = DUPLICATAS_LIMIAR if limiar is None else limiar
+    pai = {imovel_id: imovel_id for imovel_id, _, _ in membros}
+
+    def raiz(imovel_id):
+        while pai[imovel_id] != imovel_id:
+            pai[imovel_id] = pai[pai[imovel_id]]
+            imovel_id = pai[imovel_id]
+        return imovel_id
+
+    baldes = defaultdict(list)
+    for membro in membros:
+        assinatura = membro[2]
+        if assinatura is None:
+            continue
+        for inicio in range(0, NUM_HASHES, LINHAS_POR_BANDA):
+            baldes[(inicio, assinatura[inicio:inicio + LINHAS_POR_BANDA])].append(membro)
+
+    for balde in baldes.values():
+        if len(balde) < 2:
+            continue
+        # Grupo -> {imobiliaria: membro} dos anúncios do balde já vistos
+        vistos = {}
+        for membro in balde:
+            imovel_id, imobiliaria, assinatura = membro
+            for grupo in list(vistos):
+                grupo_atual, raiz_membro = raiz(grupo), raiz(imovel_id)
+                if grupo_atual == raiz_membro:
+                    continue
+                outro = next((m for imob, m in vistos[grupo].items() if imob != imobiliaria), None)
+                if outro is not None and similaridade(assinatura, outro[2]) >= limiar:
+                    pai[max(grupo_atual, raiz_membro)] = min(grupo_atual, raiz_membro)
+            # Grupos já unidos passam a ser uma entrada só
+            reunidos = {}
+            for grupo, representantes in vistos.items():
+                reunidos.setdefault(raiz(grupo), {}).update(representantes)
+            reunidos.setdefault(raiz(imovel_id), {}).setdefault(imobiliaria, membro)
+            vistos = reunidos
+
+    return {imovel_id: raiz(imovel_id) for imovel_id in pai}
+
+
+def _lotes(linhas, tamanho):
+    for i in range(0, len(linhas), tamanho):
+        yield linhas[i:i + tamanho]
+
+def _marcar_blocos(blocos):
+    """grupo_id NULL = bloco a reagrupar (sobrevive a uma falha entre os commits)"""
+    grupos = GrupoDuplicata.__table__
+    for parte in _lotes(sorted(blocos), BLOCOS_POR_CONSULTA):
+        db.session.execute(update(grupos).where(grupos.c.bloco.in_(parte)).values(grupo_id=None))
+
+def _concluir(commit):
+    if commit:
+        db.session.commit()
+
+def _remover_inativos(commit):
+    """Tira do agrupamento os imóveis desativados (ou apagados)"""
+    grupos = GrupoDuplicata.__table__
+    imoveis = Imovel.__table__
+    consulta = select(grupos.c.imovel_id, grupos.c.bloco).outerjoin(
+        imoveis, imoveis.c.id == grupos.c.imovel_id
+    ).where((imoveis.c.id.is_(None)) | (imoveis.c.ativo == False))
+    removidos = db.session.execute(consulta).all()
+    for parte in _lotes([linha.imovel_id for linha in removidos], LOTE_DUPLICATAS):
+        db.session.execute(delete(grupos).where(grupos.c.imovel_id.in_(parte)))
+    _marcar_blocos({linha.bloco for linha in removidos})
+    _concluir(commit)
+    return len(removidos)
+
+def _assinar_pendentes(commit):
+    """Calcula bloco e assinatura dos imóveis ativos novos ou alterados"""
+    grupos = GrupoDuplicata.__table__
+    imoveis = Imovel.__table__
+    assinador = Assinador()
+    stmt = insert_upsert(grupos)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['imovel_id'],
+        set_={coluna: stmt.excluded[coluna] for coluna in ('grupo_id', 'bloco', 'assinatura', 'hash_conteudo')}
+    )
+
+    processados = 0
+    ultimo_id = 0
+    while True:
+        # Keyset por id: memória limitada ao lote mesmo na primeira execução
+        linhas = db.session.execute(
+            select(
+                imoveis.c.id, imoveis.c.tipo_negocio, imoveis.c.titulo, imoveis.c.endereco, imoveis.c.bairro,
+                imoveis.c.tipo_imovel, imoveis.c.quartos_num, imoveis.c.preco_centavos, imoveis.c.area_m2,
+                imoveis.c.hash_conteudo, grupos.c.bloco.label('bloco_anterior')
+            ).outerjoin(grupos, grupos.c.imovel_id == imoveis.c.id).where(
+                imoveis.c.id > ultimo_id,
+                imoveis.c.ativo == True,
+                grupos.c.imovel_id.is_(None) | grupos.c.hash_conteudo.is_distinct_from(imoveis.c.hash_conteudo)
+            ).order_by(imoveis.c.id).limit(LOTE_DUPLICATAS)
+        ).all()
+        if not linhas:
+            return processados
+
+        # O bloco antigo de um imóvel alterado perde um membro: também é reagrupado
+        _marcar_blocos({linha.bloco_anterior for linha in linhas if linha.bloco_anterior is not None})
+        db.session.execute(stmt, [
+            {
+                'imovel_id': linha.id,
+                'grupo_id': None,
+                'bloco': bloco(linha._mapping),
+                'assinatura': assinador.assinatura(termos(linha._mapping)),
+                'hash_conteudo': linha.hash_conteudo
+            }
+            for linha in linhas
+        ])
+        _concluir(commit)
+        processados += len(linhas)
+        ultimo_id = linhas[-1].id
+
+def _reagrupar(commit):
+    """Reagrupa os blocos marcados; devolve quantos blocos foram reagrupados"""
+    grupos = GrupoDuplicata.__table__
+    imoveis = Imovel.__table__
+    pendentes = db.session.execute(select(grupos.c.bloco).where(grupos.c.grupo_id.is_(None)).distinct()).scalars().all()
+    stmt = update(grupos).where(grupos.c.imovel_id == bindparam('b_id')).values(grupo_id=bindparam('b_grupo'))
+    for parte in _lotes(pendentes, BLOCOS_POR_CONSULTA):
+        por_bloco = defaultdict(list)
+        atuais = {}
+        consulta = select(
+            grupos.c.imovel_id, grupos.c.grupo_id, grupos.c.bloco, grupos.c.assinatura, imoveis.c.imobiliaria
+        ).join(imoveis, imoveis.c.id == grupos.c.imovel_id).where(grupos.c.bloco.in_(parte))
+        for linha in db.session.execute(consulta):
+            assinatura = _ASSINATURA.unpack(linha.assinatura) if linha.assinatura else None
+            por_bloco[linha.bloco].append((linha.imovel_id, linha.imobiliaria, assinatura))
+            atuais[linha.imovel_id] = linha.grupo_id
+
+        mudancas = [
+            {'b_id': imovel_id, 'b_grupo': grupo_id}
+            for membros in por_bloco.values()
+            for imovel_id, grupo_id in agrupar(membros).items()
+            if atuais[imovel_id] != grupo_id
+        ]
+        for lote in _lotes(mudancas, LOTE_DUPLICATAS):
+            db.session.execute(stmt, lote)
+        _concluir(commit)
+    return len(pendentes)
+
+def atualizar_duplicatas(commit=False):
+    """Atualiza grupo_duplicata com os imóveis gravados desde a última vez.
+
+    Com commit=True grava em várias transações curtas (uma por lote), sem
+    segurar o lock de escrita do SQLite durante todo o cálculo; sem commit
+    tudo fica na transação corrente.
+    """
+    inicio = time.perf_counter()
+    removidos = _remover_inativos(commit)
+    processados = _assinar_pendentes(commit)
+    blocos = _reagrupar(commit)
+    resultado = {
+        'processados': processados,
+        'removidos': removidos,
+        'blocos': blocos,
+        'tempo': time.perf_counter() - inicio
+    }
+    logger.info(f"🧩 Duplicatas: {processados} imóveis processados e {blocos} blocos reagrupados "
+                f"em {resultado['tempo']:.1f}s")
+    return resultado
+
+def anuncios_duplicados():
+    """Anúncios ativos que repetem um imóvel já anunciado por outra imobiliária"""
+    grupos = GrupoDuplicata.__table__
+    # Imóveis ainda sem grupo (grupo_id NULL) não entram na conta
+    anuncios, unicos = db.session.execute(
+        select(func.count(grupos.c.grupo_id), func.count(grupos.c.grupo_id.distinct()))
+    ).one()
+    return anuncios - unicos
+
+def grupos_duplicatas(imobiliaria=None, apos=None, limite=50):
+    """Grupos com anúncios em mais de uma imobiliária, em ordem de grupo_id.
+
+    apos pagina por keyset (último grupo_id da página anterior).
+    """
+    grupos = GrupoDuplicata.__table__
+    imoveis = Imovel.__table__
+    compartilhados = select(grupos.c.grupo_id).where(grupos.c.grupo_id.is_not(None)).group_by(
+        grupos.c.grupo_id).having(func.count() > 1)
+    if imobiliaria:
+        compartilhados = compartilhados.where(grupos.c.grupo_id.in_(
+            select(grupos.c.grupo_id).join(imoveis, imoveis.c.id == grupos.c.imovel_id)
+            .where(imoveis.c.imobiliaria == imobiliaria)
+        ))
+    if apos is not None:
+        compartilhados = compartilhados.where(grupos.c.grupo_id > apos)
+    ids = db.session.execute(compartilhados.order_by(grupos.c.grupo_id).limit(limite)).scalars().all()
+    if not ids:
+        return []
+
+    membros = defaultdict(list)
+    consulta = select(grupos.c.grupo_id, Imovel).join(Imovel, Imovel.id == grupos.c.imovel_id).where(
+        grupos.c.grupo_id.in_(ids)
+    ).order_by(grupos.c.grupo_id, Imovel.imobiliaria, Imovel.id)
+    for grupo_id, imovel in db.session.execute(consulta):
+        membros[grupo_id].append(imovel.to_dict())
+    return [
+        {
+            'grupo_id': grupo_id,
+            'imobiliarias': sorted({imovel['imobiliaria'] for imovel in membros[grupo_id]}),
+            'imoveis': membros[grupo_id]
+        }
+        for grupo_id in ids
+    ]
+
+def registrar_comandos_duplicatas(app):
+    """Registra o comando de CLI `flask agrupar-duplicatas`"""
+    @app.cli.command('agrupar-duplicatas')
+    @click.option('--refazer', is_flag=True, help='Descarta os grupos gravados e recalcula todos os imóveis')
+    def agrupar_duplicatas_comando(refazer):
+        """Atualiza os grupos de anúncios duplicados entre imobiliárias"""
+        if refazer:
+            db.session.execute(delete(GrupoDuplicata.__table__))
+            db.session.commit()
+        resultado = atualizar_duplicatas(commit=True)
+        click.echo(f"{resultado['processados']} imóveis processados e {resultado['blocos']} blocos reagrupados "
+                   f"em {resultado['tempo']:.1f}s")
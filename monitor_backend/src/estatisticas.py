@@ -0,0 +1,124 @@
+from collections import Counter
+from datetime import datetime, time
+import click
+from sqlalchemy import text, func
+from src.database import db, insert_upsert
+from src.models.estatistica import EstatisticaImovel, NovosPorDia
+from src.models.imovel import Imovel
+
+# Rollups de imóveis ativos mantidos pela própria ingestão. Cada execução
+# soma deltas (+1 para imóvel novo ou reativado, -1/+1 quando o imóvel muda
+# de tipo ou bairro, -1 quando é desativado) às linhas de
+# estatisticas_imoveis, na mesma transação que grava os imóveis. O comando
+# `flask reconstruir-estatisticas` recalcula tudo a partir de imoveis caso os
+# contadores se desviem.
+
+def dimensoes(valores):
+    """Chave do rollup: (imobiliaria, tipo_negocio, tipo_imovel, bairro)"""
+    return (
+        valores['imobiliaria'],
+        valores['tipo_negocio'],
+        valores.get('tipo_imovel') or '',
+        valores.get('bairro') or ''
+    )
+
+def aplicar_deltas(deltas, novos_por_dia=None):
+    """Soma os deltas às contagens (upsert total = total + delta). Não faz commit.
+
+    deltas: Counter {dimensoes: delta}
+    novos_por_dia: Counter {(data, imobiliaria, tipo_negocio): novos}
+    """
+    linhas = [
+        {'imobiliaria': d[0], 'tipo_negocio': d[1], 'tipo_imovel': d[2], 'bairro': d[3], 'total': delta}
+        for d, delta in deltas.items() if delta
+    ]
+    if linhas:
+        tabela = EstatisticaImovel.__table__
+        stmt = insert_upsert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['imobiliaria', 'tipo_negocio', 'tipo_imovel', 'bairro'],
+            set_={'total': tabela.c.total + stmt.excluded.total}
+        )
+        db.session.execute(stmt, linhas)
+
+    linhas = [
+        {'data': chave[0], 'imobiliaria': chave[1], 'tipo_negocio': chave[2], 'novos': novos}
+        for chave, novos in (novos_por_dia or {}).items() if novos
+    ]
+    if linhas:
+        tabela = NovosPorDia.__table__
+        stmt = insert_upsert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['data', 'imobiliaria', 'tipo_negocio'],
+            set_={'novos': tabela.c.novos + stmt.excluded.novos}
+        )
+        db.session.execute(stmt, linhas)
+
+def reconstruir_estatisticas(conexao):
+    """Recalcula os rollups a partir da tabela imoveis"""
+    conexao.execute(text("DELETE FROM estatisticas_imoveis"))
+    conexao.execute(text("""
+        INSERT INTO estatisticas_imoveis (imobiliaria, tipo_negocio, tipo_imovel, bairro, total)
+        SELECT imobiliaria, tipo_negocio, COALESCE(tipo_imovel, ''), COALESCE(bairro, ''), COUNT(*)
+        FROM imoveis WHERE ativo = :ativo
+        GROUP BY imobiliaria, tipo_negocio, COALESCE(tipo_imovel, ''), COALESCE(bairro, '')
+    """), {'ativo': True})
+
+    conexao.execute(text("DELETE FROM novos_por_dia"))
+    linhas = conexao.execute(text("""
+        SELECT data_coleta, imobiliaria, tipo_negocio FROM imoveis WHERE data_coleta IS NOT NULL
+    """))
+    contagem = Counter()
+    for data_coleta, imobiliaria, tipo_negocio in linhas:
+        if isinstance(data_coleta, str):
+            data_coleta = datetime.fromisoformat(data_coleta)
+        contagem[(data_coleta.date(), imobiliaria, tipo_negocio)] += 1
+    if contagem:
+        conexao.execute(
+            NovosPorDia.__table__.insert(),
+            [{'data': c[0], 'imobiliaria': c[1], 'tipo_negocio': c[2], 'novos': n} for c, n in contagem.items()]
+        )
+
+def inicio_do_dia():
+    """00:00 UTC de hoje: imóveis coletados a partir daí são os novos do painel"""
+    return datetime.combine(datetime.utcnow().date(), time.min)
+
+def resumo_estatisticas():
+    """Totais do painel lidos dos rollups (tabelas pequenas, sem varrer imoveis).
+
+    novos_hoje usa o mesmo critério de ?apenas_novos= na listagem (ativos
+    coletados desde 00:00 UTC), contado pelo índice (ativo, data_coleta).
+    """
+    por_imobiliaria = {}
+    por_negocio = Counter()
+    linhas = db.session.query(
+        EstatisticaImovel.imobiliaria,
+        EstatisticaImovel.tipo_negocio,
+        func.sum(EstatisticaImovel.total)
+    ).group_by(EstatisticaImovel.imobiliaria, EstatisticaImovel.tipo_negocio).all()
+    for imobiliaria, tipo_negocio, total in linhas:
+        if not total:
+            continue
+        por_imobiliaria[imobiliaria] = por_imobiliaria.get(imobiliaria, 0) + total
+        por_negocio[tipo_negocio] += total
+
+    novos_hoje = db.session.query(func.count(Imovel.id)).filter(
+        Imovel.ativo == True, Imovel.data_coleta >= inicio_do_dia()
+    ).scalar()
+
+    return {
+        'total_imoveis': sum(por_negocio.values()),
+        'locacao': por_negocio['LOCAÇÃO'],
+        'venda': por_negocio['VENDA'],
+        'novos_hoje': novos_hoje,
+        'por_imobiliaria': [{'nome': nome, 'total': total} for nome, total in por_imobiliaria.items()]
+    }
+
+def registrar_comandos(app):
+    """Registra o comando de CLI `flask reconstruir-estatisticas`"""
+    @app.cli.command('reconstruir-estatisticas')
+    def reconstruir_estatisticas_comando():
+        """Recalcula os rollups de estatísticas a partir dos imóveis"""
+        with db.engine.begin() as conexao:
+            reconstruir_estatisticas(conexao)
+        click.echo('Estatísticas reconstruídas')
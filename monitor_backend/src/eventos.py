@@ -0,0 +1,45 @@
+import json
+import queue
+import threading
+
+# Canal de eventos do monitoramento para o endpoint SSE /api/monitor/eventos.
+# O job de monitoramento publica um punhado de eventos por execução (início,
+# início/fim de cada scraper, ingestão, resultado final) e cada cliente
+# conectado recebe os eventos pela sua própria fila. O canal é local ao
+# processo: o estado de referência fica na tabela jobs (ver src/jobs.py).
+
+class CanalEventos:
+    """Pub/sub em memória com uma fila limitada por assinante"""
+
+    def __init__(self, tamanho_fila=100):
+        self.tamanho_fila = tamanho_fila
+        self._assinantes = set()
+        self._lock = threading.Lock()
+
+    def assinar(self):
+        fila = queue.Queue(maxsize=self.tamanho_fila)
+        with self._lock:
+            self._assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    def publicar(self, tipo, dados):
+        """Envia o evento a todos os assinantes (descarta para clientes travados)"""
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for fila in assinantes:
+            try:
+                fila.put_nowait((tipo, dados))
+            except queue.Full:
+                pass
+
+
+def formatar_sse(tipo, dados):
+    """Serializa um evento no formato text/event-stream"""
+    return f"event: {tipo}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n"
+
+
+canal_eventos = CanalEventos()
@@ -0,0 +1,163 @@
+import csv
+import io
+import tempfile
+import zlib
+from importlib.util import find_spec
+from sqlalchemy import BigInteger, DateTime, Float, Integer
+from src.database import db
+from src.models.imovel import Imovel
+
+# Exportação dos imóveis filtrados. As linhas são lidas do banco como tuplas
+# (sem objetos Imovel nem to_dict) em blocos de EXPORTACAO_LOTE, com cursor
+# no servidor quando o banco suporta, e cada bloco é escrito no formato de
+# saída antes de ler o próximo: a memória não cresce com o tamanho da
+# exportação. XLSX e Parquet usam openpyxl e pyarrow (requirements.txt);
+# sem eles instalados a rota responde 501 para esses formatos.
+EXPORTACAO_LOTE = 5000
+
+# Bytes por bloco ao enviar um arquivo temporário
+BLOCO_ARQUIVO = 64 * 1024
+
+COLUNAS = [
+    Imovel.id, Imovel.imobiliaria, Imovel.codigo, Imovel.titulo, Imovel.tipo_imovel,
+    Imovel.preco, Imovel.area, Imovel.quartos, Imovel.banheiros, Imovel.vagas,
+    Imovel.endereco, Imovel.bairro, Imovel.tipo_negocio, Imovel.url, Imovel.data_coleta,
+    Imovel.preco_centavos, Imovel.area_m2, Imovel.preco_m2,
+    Imovel.quartos_num, Imovel.banheiros_num, Imovel.vagas_num
+]
+NOMES = [coluna.key for coluna in COLUNAS]
+
+# formato -> (pacote necessário, extensão, mimetype)
+FORMATOS = {
+    'csv': (None, 'csv', 'text/csv'),
+    'xlsx': ('openpyxl', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': ('pyarrow', 'parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def pacote_ausente(formato):
+    """Nome do pacote que falta para o formato (None se disponível)"""
+    pacote = FORMATOS[formato][0]
+    if pacote and find_spec(pacote) is None:
+        return pacote
+    return None
+
+def lotes_exportacao(query, tamanho=EXPORTACAO_LOTE):
+    """Gera listas de tuplas (na ordem de NOMES) lidas do banco em blocos"""
+    consulta = query.with_entities(*COLUNAS).statement
+    resultado = db.session.execute(consulta, execution_options={'yield_per': tamanho})
+    try:
+        for lote in resultado.partitions():
+            yield lote
+    finally:
+        resultado.close()
+
+
+def csv_em_blocos(lotes, comprimir=True):
+    """CSV (UTF-8) em blocos de bytes; com comprimir=True o fluxo é um gzip"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None  # wbits 31 = cabeçalho gzip
+    texto = io.StringIO()
+    escritor = csv.writer(texto)
+
+    def drenar():
+        dados = texto.getvalue().encode('utf-8')
+        texto.seek(0)
+        texto.truncate()
+        return compressor.compress(dados) if compressor else dados
+
+    escritor.writerow(NOMES)
+    for lote in lotes:
+        escritor.writerows(lote)
+        if dados := drenar():
+            yield dados
+    final = drenar() + (compressor.flush() if compressor else b'')
+    if final:
+        yield final
+
+
+def _ler_em_blocos(arquivo):
+    arquivo.seek(0)
+    while bloco := arquivo.read(BLOCO_ARQUIVO):
+        yield bloco
+
+def xlsx_em_blocos(lotes):
+    """Planilha XLSX em modo write-only (as linhas vão para disco, não para a memória).
+
+    O formato é um zip com índice no final, então o arquivo só começa a ser
+    enviado depois da última linha.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet('Imóveis')
+    planilha.append(NOMES)
+    for lote in lotes:
+        for linha in lote:
+            # Caracteres de controle vindos dos sites invalidam o XML da planilha
+            planilha.append([ILLEGAL_CHARACTERS_RE.sub('', v) if isinstance(v, str) else v for v in linha])
+    with tempfile.TemporaryFile() as arquivo:
+        livro.save(arquivo)
+        yield from _ler_em_blocos(arquivo)
+
+
+class _SaidaEmBlocos(io.RawIOBase):
+    """Arquivo só de escrita que acumula os bytes até serem drenados"""
+
+    def __init__(self):
+        self._blocos = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._blocos.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def drenar(self):
+        blocos, self._blocos = self._blocos, []
+        return b''.join(blocos)
+
+def _tipo_arrow(coluna):
+    import pyarrow as pa
+    if isinstance(coluna.type, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(coluna.type, Float):
+        return pa.float64()
+    if isinstance(coluna.type, DateTime):
+        return pa.timestamp('us')
+    return pa.string()
+
+def parquet_em_blocos(lotes):
+    """Parquet com um row group por lote, enviado à medida que cada lote é gravado"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([(coluna.key, _tipo_arrow(coluna)) for coluna in COLUNAS])
+    saida = _SaidaEmBlocos()
+    with pq.ParquetWriter(saida, esquema, compression='snappy') as escritor:
+        for lote in lotes:
+            colunas = list(zip(*lote))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+                schema=esquema
+            ))
+            if dados := saida.drenar():
+                yield dados
+    if dados := saida.drenar():
+        yield dados
+
+
+def exportar(query, formato, comprimir=True):
+    """Gera os bytes da exportação da query no formato pedido"""
+    lotes = lotes_exportacao(query)
+    if formato == 'xlsx':
+        return xlsx_em_blocos(lotes)
+    if formato == 'parquet':
+        return parquet_em_blocos(lotes)
+    return csv_em_blocos(lotes, comprimir)
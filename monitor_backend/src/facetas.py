@@ -0,0 +1,108 @@
+from collections import Counter
+from sqlalchemy import func, select
+from src.busca import casa_frase, casa_prefixos, termos
+from src.database import db
+from src.models.estatistica import EstatisticaImovel
+from src.models.imovel import Imovel
+from src.normalizacao import normalizar_texto
+
+# Facetas dos filtros do painel: os valores de cada dimensão com a
+# quantidade de imóveis que o filtro atual encontraria. A contagem de uma
+# dimensão ignora o filtro da própria dimensão (trocar de bairro mostra os
+# outros bairros possíveis) e respeita os demais. A entrada é sempre a lista
+# de combinações (tipo_negocio, tipo_imovel, bairro, imobiliaria, total):
+# lida dos rollups quando só há filtros dessas dimensões, ou de uma única
+# consulta agrupada sobre imoveis quando há busca textual, faixas ou novos.
+DIMENSOES_FACETA = ('tipo_negocio', 'tipo_imovel', 'bairro', 'imobiliaria')
+
+# Dimensões com valores agrupados pela forma normalizada ('Efapi' e 'EFAPI')
+_NORMALIZADAS = ('tipo_imovel', 'bairro')
+
+
+def linhas_rollup():
+    """Combinações com imóveis ativos, dos rollups da ingestão"""
+    tabela = EstatisticaImovel.__table__
+    return db.session.execute(select(
+        tabela.c.tipo_negocio, tabela.c.tipo_imovel, tabela.c.bairro, tabela.c.imobiliaria, tabela.c.total
+    ).where(tabela.c.total > 0)).all()
+
+def linhas_consulta(query):
+    """Combinações da query de Imovel já filtrada, em um único GROUP BY"""
+    dimensoes = (
+        Imovel.tipo_negocio, func.coalesce(Imovel.tipo_imovel, ''),
+        func.coalesce(Imovel.bairro, ''), Imovel.imobiliaria
+    )
+    return query.with_entities(*dimensoes, func.count(Imovel.id)).group_by(*dimensoes).all()
+
+def linhas_registros(registros):
+    """Combinações de uma lista de imóveis em dicionário (arquivo JSON)"""
+    contagem = Counter(
+        (r['tipo_negocio'], r.get('tipo_imovel') or '', r.get('bairro') or '', r['imobiliaria'])
+        for r in registros
+    )
+    return [(*chave, total) for chave, total in contagem.items()]
+
+
+def _predicados(filtros):
+    """{dimensao: predicado(valor gravado)} dos filtros informados"""
+    predicados = {}
+    tipo_negocio = filtros.get('tipo_negocio')
+    if tipo_negocio:
+        predicados['tipo_negocio'] = lambda valor: valor == tipo_negocio
+    imobiliaria = filtros.get('imobiliaria')
+    if imobiliaria:
+        predicados['imobiliaria'] = lambda valor: valor == imobiliaria
+    # Tipo por prefixo e bairro por frase, como o filtro da listagem
+    if termos(filtros.get('tipo_imovel')):
+        casa = casa_prefixos(filtros['tipo_imovel'])
+        predicados['tipo_imovel'] = lambda valor: casa(normalizar_texto(valor))
+    if termos(filtros.get('bairro')):
+        casa = casa_frase(filtros['bairro'])
+        predicados['bairro'] = lambda valor: casa(normalizar_texto(valor))
+    return predicados
+
+def contar_facetas(linhas, filtros):
+    """Conta os valores de cada dimensão.
+
+    filtros: {dimensao: valor} com tipo_negocio já no valor gravado.
+    Devolve ({dimensao: [{'valor', 'total'}]}, total de imóveis que passam
+    por todos os filtros).
+    """
+    predicados = _predicados(filtros)
+    cache = {dimensao: {} for dimensao in predicados}
+    contagens = {dimensao: Counter() for dimensao in DIMENSOES_FACETA}
+    total = 0
+
+    for *valores, quantidade in linhas:
+        falhas = []
+        for posicao, dimensao in enumerate(DIMENSOES_FACETA):
+            predicado = predicados.get(dimensao)
+            if predicado is None:
+                continue
+            valor = valores[posicao]
+            aceito = cache[dimensao].get(valor)
+            if aceito is None:
+                aceito = cache[dimensao][valor] = predicado(valor)
+            if not aceito:
+                falhas.append(dimensao)
+                if len(falhas) > 1:
+                    break  # reprovado em duas dimensões: não conta em nenhuma faceta
+        if not falhas:
+            total += quantidade
+        for posicao, dimensao in enumerate(DIMENSOES_FACETA):
+            if (not falhas or falhas == [dimensao]) and valores[posicao]:
+                contagens[dimensao][valores[posicao]] += quantidade
+
+    return {dimensao: _agrupar_valores(dimensao, contagem) for dimensao, contagem in contagens.items()}, total
+
+def _agrupar_valores(dimensao, contagem):
+    if dimensao not in _NORMALIZADAS:
+        return [{'valor': valor, 'total': n} for valor, n in sorted(contagem.items(), key=lambda i: normalizar_texto(i[0]))]
+    # Grafias diferentes do mesmo valor viram uma opção, com a grafia mais frequente
+    grupos = {}
+    for valor, n in contagem.items():
+        grupos.setdefault(normalizar_texto(valor), []).append((n, valor))
+    return [
+        {'valor': max(grafias)[1], 'total': sum(n for n, _ in grafias)}
+        for _, grafias in sorted(grupos.items())
+    ]
@@ -0,0 +1,58 @@
+from sqlalchemy import select, func
+from src.database import db
+from src.models.imovel import Imovel, ImovelSnapshot
+
+# Consultas sobre imoveis_snapshots. O LAG compara cada snapshot com o
+# anterior do mesmo imóvel; a janela só percorre os imóveis que têm snapshot
+# no período (idx_snapshot_data) e cada partição é lida pelo índice
+# (imovel_id, data).
+
+def mudancas_preco(desde, imobiliaria=None, tipo_negocio=None, limite=50):
+    """Mudanças de preço registradas a partir de `desde`, mais recentes primeiro"""
+    snapshots = ImovelSnapshot.__table__
+    imoveis = Imovel.__table__
+
+    com_snapshot = select(snapshots.c.imovel_id).where(snapshots.c.data >= desde)
+    janela = select(
+        snapshots.c.imovel_id,
+        snapshots.c.data,
+        snapshots.c.preco_centavos,
+        func.lag(snapshots.c.preco_centavos).over(
+            partition_by=snapshots.c.imovel_id, order_by=(snapshots.c.data, snapshots.c.id)
+        ).label('preco_anterior')
+    ).where(snapshots.c.imovel_id.in_(com_snapshot)).subquery()
+
+    consulta = select(
+        janela.c.imovel_id, janela.c.data, janela.c.preco_centavos, janela.c.preco_anterior,
+        imoveis.c.imobiliaria, imoveis.c.codigo, imoveis.c.titulo, imoveis.c.tipo_negocio,
+        imoveis.c.bairro, imoveis.c.url, imoveis.c.ativo
+    ).join(imoveis, imoveis.c.id == janela.c.imovel_id).where(
+        janela.c.data >= desde,
+        janela.c.preco_anterior != janela.c.preco_centavos
+    )
+    if imobiliaria:
+        consulta = consulta.where(imoveis.c.imobiliaria == imobiliaria)
+    if tipo_negocio:
+        consulta = consulta.where(imoveis.c.tipo_negocio == tipo_negocio)
+    consulta = consulta.order_by(janela.c.data.desc(), janela.c.imovel_id).limit(limite)
+
+    mudancas = []
+    for linha in db.session.execute(consulta):
+        anterior = linha.preco_anterior / 100
+        atual = linha.preco_centavos / 100
+        mudancas.append({
+            'imovel_id': linha.imovel_id,
+            'imobiliaria': linha.imobiliaria,
+            'codigo': linha.codigo,
+            'titulo': linha.titulo,
+            'tipo_negocio': linha.tipo_negocio,
+            'bairro': linha.bairro,
+            'url': linha.url,
+            'ativo': linha.ativo,
+            'data': linha.data.isoformat(),
+            'preco_anterior': anterior,
+            'preco_atual': atual,
+            'variacao': round(atual - anterior, 2),
+            'variacao_percentual': round((atual - anterior) / anterior * 100, 2) if anterior else None
+        })
+    return mudancas
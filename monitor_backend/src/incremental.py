@@ -0,0 +1,191 @@
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import select
+from src.database import db, insert_upsert
+from src.models.checkpoint import CheckpointPagina
+from src.cliente_http import cliente_http
+
+logger = logging.getLogger(__name__)
+
+# Coleta incremental. Cada página de listagem tem um checkpoint com ETag,
+# Last-Modified, sha256 do corpo e os imóveis extraídos dela. A requisição é
+# condicional (If-None-Match / If-Modified-Since); se o servidor responder
+# 304 ou o corpo tiver a mesma impressão digital, a página não é parseada e
+# os imóveis do checkpoint são devolvidos ao scraper. Os checkpoints são
+# carregados antes da execução e gravados depois, na thread do job: as
+# threads dos scrapers só mexem no ControleIncremental em memória.
+CRAWL_INCREMENTAL = os.environ.get('CRAWL_INCREMENTAL', 'true').lower() == 'true'
+
+# ColetaSite do scraper em execução na thread atual
+coleta_atual = contextvars.ContextVar('coleta_atual', default=None)
+
+
+class PaginaColetada:
+    """Resultado de buscar_pagina: resposta nova ou imóveis reaproveitados"""
+
+    def __init__(self, response=None, imoveis=None):
+        self.response = response
+        self.imoveis = imoveis
+        self.inalterada = imoveis is not None
+
+
+class ColetaSite:
+    """Checkpoints e contadores das páginas de um scraper"""
+
+    def __init__(self, controle, nome):
+        self.controle = controle
+        self.nome = nome
+        self.paginas = 0
+        self.paginas_inalteradas = 0
+        self.paginas_com_falha = 0
+        self._pendentes = {}
+
+    def buscar(self, url, **kwargs):
+        """GET condicional; devolve PaginaColetada"""
+        self.paginas += 1
+        checkpoint = self.controle.checkpoint(url)
+        headers = dict(kwargs.pop('headers', None) or {})
+        if checkpoint and CRAWL_INCREMENTAL:
+            if checkpoint.get('etag'):
+                headers['If-None-Match'] = checkpoint['etag']
+            if checkpoint.get('last_modified'):
+                headers['If-Modified-Since'] = checkpoint['last_modified']
+
+        try:
+            response = cliente_http.get(url, headers=headers, **kwargs)
+        except Exception:
+            self.paginas_com_falha += 1
+            raise
+
+        if response.status_code == 304 and checkpoint:
+            return self._inalterada(url, checkpoint)
+        if response.status_code != 200:
+            self.paginas_com_falha += 1
+            return PaginaColetada(response)
+
+        fingerprint = hashlib.sha256(response.content).hexdigest()
+        if checkpoint and CRAWL_INCREMENTAL and checkpoint.get('fingerprint') == fingerprint:
+            return self._inalterada(url, checkpoint)
+
+        self._pendentes[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fingerprint': fingerprint
+        }
+        return PaginaColetada(response)
+
+    def _inalterada(self, url, checkpoint):
+        self.paginas_inalteradas += 1
+        self.controle.verificar(url)
+        imoveis = json.loads(checkpoint['imoveis'])
+        logger.info(f"⏭️ {self.nome}: página sem alterações, {len(imoveis)} imóveis reaproveitados ({url})")
+        return PaginaColetada(imoveis=imoveis)
+
+    def registrar(self, url, imoveis):
+        """Grava o checkpoint da página depois de parseada com sucesso"""
+        validadores = self._pendentes.pop(url, None)
+        if validadores is not None:
+            self.controle.atualizar(url, self.nome, validadores, imoveis)
+
+    def relatorio(self):
+        # Página baixada mas nunca registrada = o parse falhou no scraper
+        return {
+            'paginas': self.paginas,
+            'paginas_inalteradas': self.paginas_inalteradas,
+            'paginas_com_falha': self.paginas_com_falha + len(self._pendentes)
+        }
+
+
+class ControleIncremental:
+    """Checkpoints de todas as páginas durante uma execução"""
+
+    def __init__(self, checkpoints=None):
+        self._checkpoints = checkpoints or {}
+        self._alterados = {}
+        self._verificados = set()
+        self._lock = threading.Lock()
+        self.sites = {}
+
+    def site(self, nome):
+        coleta = ColetaSite(self, nome)
+        with self._lock:
+            self.sites[nome] = coleta
+        return coleta
+
+    def checkpoint(self, url):
+        return self._checkpoints.get(url)
+
+    def verificar(self, url):
+        with self._lock:
+            self._verificados.add(url)
+
+    def atualizar(self, url, scraper, validadores, imoveis):
+        with self._lock:
+            self._alterados[url] = {
+                'url': url,
+                'scraper': scraper,
+                **validadores,
+                'imoveis': json.dumps(imoveis, ensure_ascii=False),
+                'total_imoveis': len(imoveis)
+            }
+
+    def salvar(self):
+        """Grava os checkpoints alterados e a data de verificação dos demais (sem commit)"""
+        agora = datetime.utcnow()
+        tabela = CheckpointPagina.__table__
+        if self._alterados:
+            linhas = [{**valores, 'alterado_em': agora, 'verificado_em': agora} for valores in self._alterados.values()]
+            stmt = insert_upsert(tabela)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['url'],
+                set_={coluna: stmt.excluded[coluna] for coluna in linhas[0] if coluna != 'url'}
+            )
+            db.session.execute(stmt, linhas)
+        verificados = self._verificados - set(self._alterados)
+        if verificados:
+            db.session.execute(
+                tabela.update().where(tabela.c.url.in_(verificados)).values(verificado_em=agora)
+            )
+
+
+def carregar_controle():
+    """ControleIncremental com todos os checkpoints gravados"""
+    tabela = CheckpointPagina.__table__
+    checkpoints = {
+        linha.url: dict(linha._mapping)
+        for linha in db.session.execute(select(
+            tabela.c.url, tabela.c.etag, tabela.c.last_modified, tabela.c.fingerprint, tabela.c.imoveis
+        ))
+    }
+    return ControleIncremental(checkpoints)
+
+def buscar_pagina(url, **kwargs):
+    """Usado pelos scrapers: GET condicional pelo checkpoint da execução atual.
+
+    Fora de uma execução com controle incremental (ex.: executar_todos_scrapers
+    pela linha de comando) faz um GET comum.
+    """
+    coleta = coleta_atual.get()
+    if coleta is None:
+        return PaginaColetada(cliente_http.get(url, **kwargs))
+    return coleta.buscar(url, **kwargs)
+
+def registrar_pagina(url, imoveis):
+    """Usado pelos scrapers: registra os imóveis extraídos de uma página nova"""
+    coleta = coleta_atual.get()
+    if coleta is not None:
+        coleta.registrar(url, imoveis)
+
+def imobiliarias_completas(relatorio):
+    """Imobiliárias cujos scrapers rodaram sem falhas (aptas à varredura de ausentes)"""
+    return {
+        imobiliaria
+        for info in relatorio.values()
+        if info['status'] == 'SUCESSO' and not info.get('paginas_com_falha')
+        for imobiliaria in info.get('imobiliarias', [])
+    }
@@ -0,0 +1,248 @@
+import os
+from collections import Counter, defaultdict
+from datetime import datetime
+from sqlalchemy import select, update, insert, bindparam
+from src.database import db, insert_upsert
+from src.models.imovel import Imovel, ImovelSnapshot
+from src.estatisticas import aplicar_deltas, dimensoes
+from src.cache import incrementar_versao_dados
+
+# Quantidade de linhas por executemany
+INGESTAO_TAMANHO_LOTE = int(os.environ.get('INGESTAO_TAMANHO_LOTE', 1000))
+
+# Imóveis gravados por commit na ingestão em streaming
+INGESTAO_COMMIT_LOTE = int(os.environ.get('INGESTAO_COMMIT_LOTE', 5000))
+
+# Códigos por consulta de chaves existentes (abaixo do limite de parâmetros do SQLite)
+INGESTAO_CHAVES_CONSULTA = 500
+
+# Execuções completas seguidas sem o imóvel até ele ser desativado
+IMOVEL_MAX_AUSENCIAS = int(os.environ.get('IMOVEL_MAX_AUSENCIAS', 3))
+
+# Colunas de exibição reescritas quando o conteúdo do imóvel muda
+CAMPOS_ATUALIZAVEIS = ('titulo', 'tipo_imovel', 'preco', 'area', 'quartos', 'banheiros', 'vagas', 'endereco', 'bairro', 'url')
+
+# Colunas derivadas dos campos acima (reescritas junto com eles); a mudança
+# é detectada comparando apenas hash_conteudo
+CAMPOS_NUMERICOS = ('preco_centavos', 'area_m2', 'preco_m2', 'quartos_num', 'banheiros_num', 'vagas_num')
+CAMPOS_GRAVADOS = CAMPOS_ATUALIZAVEIS + CAMPOS_NUMERICOS + ('hash_conteudo',)
+
+# Colunas copiadas para imoveis_snapshots
+CAMPOS_SNAPSHOT = ('hash_conteudo', 'preco_centavos', 'area_m2', 'quartos_num', 'banheiros_num', 'vagas_num')
+
+def _chave(valores):
+    return (valores['imobiliaria'], valores['codigo'], valores['tipo_negocio'])
+
+def _lotes(linhas, tamanho):
+    for i in range(0, len(linhas), tamanho):
+        yield linhas[i:i + tamanho]
+
+def _snapshot(imovel_id, valores, data):
+    return {'imovel_id': imovel_id, 'data': data, **{campo: valores[campo] for campo in CAMPOS_SNAPSHOT}}
+
+class IngestaoEmLotes:
+    """Grava os imóveis à medida que chegam, com commit a cada lote.
+
+    adicionar() recebe os imóveis de uma página ou de um site; a cada
+    commit_lote imóveis o lote é gravado (e, com commit=True, commitado),
+    então a memória fica limitada ao lote e uma falha no fim da execução
+    não perde o que já foi gravado. Para cada lote as chaves existentes são
+    lidas com uma consulta por imobiliária/tipo de negócio (codigo IN (...),
+    pelo idx_imovel_unique), a comparação é feita pelo hash_conteudo e a
+    escrita usa executemany em lotes de tamanho_lote. Novos e alterados
+    ganham uma linha em imoveis_snapshots; os deltas das estatísticas
+    (src/estatisticas.py) vão na mesma transação do lote. O INSERT usa ON
+    CONFLICT sobre idx_imovel_unique para continuar correto caso outra
+    execução tenha inserido a mesma chave no meio do caminho.
+
+    Da execução inteira só ficam em memória os ids vistos, usados em
+    finalizar() para a varredura dos imóveis ausentes.
+    """
+
+    def __init__(self, tamanho_lote=None, commit_lote=None, commit=True, ao_lote=None):
+        self.tamanho_lote = tamanho_lote or INGESTAO_TAMANHO_LOTE
+        self.commit_lote = commit_lote or INGESTAO_COMMIT_LOTE
+        self.commit = commit
+        self.ao_lote = ao_lote
+        self.contadores = Counter({campo: 0 for campo in ('coletados', 'novos', 'atualizados', 'inalterados', 'snapshots')})
+        self.lotes = 0
+        self._pendentes = {}
+        self._vistos = set()
+        self._imobiliarias = set()
+
+    def adicionar(self, imoveis_coletados):
+        # Deduplicar a própria coleta (a última ocorrência prevalece)
+        for imovel_data in imoveis_coletados:
+            valores = Imovel.valores_scraper(imovel_data)
+            self._pendentes[_chave(valores)] = valores
+            if len(self._pendentes) >= self.commit_lote:
+                self.gravar()
+
+    def gravar(self):
+        """Grava (e commita) os imóveis pendentes"""
+        if not self._pendentes:
+            return
+        coletados, self._pendentes = self._pendentes, {}
+        self.contadores.update(self._gravar_lote(coletados))
+        self.lotes += 1
+        self._concluir_lote()
+
+    def _concluir_lote(self):
+        if self.commit:
+            incrementar_versao_dados()  # cada lote commitado já aparece na API
+            db.session.commit()
+        if self.ao_lote:
+            self.ao_lote(self.resultado())
+
+    def resultado(self):
+        return dict(self.contadores)
+
+    def _existentes(self, chaves):
+        tabela = Imovel.__table__
+        colunas = [
+            tabela.c.id, tabela.c.imobiliaria, tabela.c.codigo, tabela.c.tipo_negocio, tabela.c.ativo,
+            tabela.c.ausencias, tabela.c.hash_conteudo, tabela.c.tipo_imovel, tabela.c.bairro
+        ]
+        grupos = defaultdict(list)
+        for imobiliaria, codigo, tipo_negocio in chaves:
+            grupos[(imobiliaria, tipo_negocio)].append(codigo)
+
+        existentes = {}
+        for (imobiliaria, tipo_negocio), codigos in grupos.items():
+            for parte in _lotes(codigos, INGESTAO_CHAVES_CONSULTA):
+                consulta = select(*colunas).where(
+                    tabela.c.imobiliaria == imobiliaria,
+                    tabela.c.tipo_negocio == tipo_negocio,
+                    tabela.c.codigo.in_(parte)
+                )
+                for linha in db.session.execute(consulta):
+                    existentes[(linha.imobiliaria, linha.codigo, linha.tipo_negocio)] = linha
+        return existentes
+
+    def _gravar_lote(self, coletados):
+        tabela = Imovel.__table__
+        existentes = self._existentes(list(coletados))
+
+        novos = []
+        alterados = []
+        reapareceram = []
+        snapshots = []
+        agora = datetime.utcnow()
+        deltas = Counter()
+        novos_por_dia = Counter()
+        hoje = agora.date()
+        for chave, valores in coletados.items():
+            self._imobiliarias.add(chave[0])
+            atual = existentes.get(chave)
+            if atual is None:
+                novos.append(valores)
+                deltas[dimensoes(valores)] += 1
+                novos_por_dia[(hoje, valores['imobiliaria'], valores['tipo_negocio'])] += 1
+                continue
+            self._vistos.add(atual.id)
+            if atual.ausencias:
+                reapareceram.append({'b_id': atual.id})
+            mudou = atual.hash_conteudo != valores['hash_conteudo']
+            if mudou:
+                snapshots.append(_snapshot(atual.id, valores, agora))
+            if mudou or not atual.ativo:
+                alterados.append({'b_id': atual.id, 'ativo': True, **{campo: valores[campo] for campo in CAMPOS_GRAVADOS}})
+                if atual.ativo:
+                    deltas[dimensoes(atual._mapping)] -= 1
+                deltas[dimensoes(valores)] += 1
+
+        if novos:
+            stmt = insert_upsert(tabela)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['imobiliaria', 'codigo', 'tipo_negocio'],
+                set_={campo: stmt.excluded[campo] for campo in CAMPOS_GRAVADOS}
+            )
+            stmt = stmt.returning(tabela.c.id, tabela.c.imobiliaria, tabela.c.codigo, tabela.c.tipo_negocio)
+            for lote in _lotes(novos, self.tamanho_lote):
+                for linha in db.session.execute(stmt, lote):
+                    self._vistos.add(linha.id)
+                    snapshots.append(_snapshot(linha.id, coletados[tuple(linha[1:])], agora))
+
+        if alterados:
+            stmt = update(tabela).where(tabela.c.id == bindparam('b_id')).values(
+                ativo=bindparam('ativo'),
+                **{campo: bindparam(campo) for campo in CAMPOS_GRAVADOS}
+            )
+            for lote in _lotes(alterados, self.tamanho_lote):
+                db.session.execute(stmt, lote)
+
+        if reapareceram:
+            stmt = update(tabela).where(tabela.c.id == bindparam('b_id')).values(ausencias=0)
+            for lote in _lotes(reapareceram, self.tamanho_lote):
+                db.session.execute(stmt, lote)
+
+        if snapshots:
+            stmt = insert(ImovelSnapshot.__table__)
+            for lote in _lotes(snapshots, self.tamanho_lote):
+                db.session.execute(stmt, lote)
+
+        # Rollups do painel na mesma transação
+        aplicar_deltas(deltas, novos_por_dia)
+
+        return {
+            'coletados': len(coletados),
+            'novos': len(novos),
+            'atualizados': len(alterados),
+            'inalterados': len(coletados) - len(novos) - len(alterados),
+            'snapshots': len(snapshots)
+        }
+
+    def finalizar(self, varrer=None, max_ausencias=None):
+        """Grava o último lote e faz a varredura dos ausentes; devolve os totais.
+
+        varrer é o conjunto de imobiliárias coletadas por completo nesta
+        execução (ver imobiliarias_completas): seus imóveis ativos que não
+        apareceram têm o contador de ausências incrementado e os que chegam
+        a max_ausencias são desativados em um único UPDATE.
+        """
+        self.gravar()
+        max_ausencias = max_ausencias or IMOVEL_MAX_AUSENCIAS
+        tabela = Imovel.__table__
+
+        # Só varre imobiliárias que também estão na coleta (nunca um site que voltou vazio)
+        varrer = set(varrer or ()) & self._imobiliarias
+        ausentes = []
+        if varrer:
+            consulta = select(
+                tabela.c.id, tabela.c.imobiliaria, tabela.c.tipo_negocio, tabela.c.tipo_imovel,
+                tabela.c.bairro, tabela.c.ausencias
+            ).where(tabela.c.ativo == True, tabela.c.imobiliaria.in_(varrer))
+            ausentes = [linha for linha in db.session.execute(consulta) if linha.id not in self._vistos]
+
+        desativados = [linha for linha in ausentes if linha.ausencias + 1 >= max_ausencias]
+        if ausentes:
+            stmt = update(tabela).where(tabela.c.id == bindparam('b_id')).values(ausencias=tabela.c.ausencias + 1)
+            for lote in _lotes([{'b_id': linha.id} for linha in ausentes], self.tamanho_lote):
+                db.session.execute(stmt, lote)
+
+        # Varredura: um único UPDATE desativa os que atingiram o limite
+        if desativados:
+            db.session.execute(update(tabela).where(
+                tabela.c.ativo == True,
+                tabela.c.imobiliaria.in_(varrer),
+                tabela.c.ausencias >= max_ausencias
+            ).values(ativo=False))
+            deltas = Counter()
+            for linha in desativados:
+                deltas[dimensoes(linha._mapping)] -= 1
+            aplicar_deltas(deltas)
+
+        self.contadores.update({'ausentes': len(ausentes), 'desativados': len(desativados)})
+        if ausentes:
+            self._concluir_lote()
+        return self.resultado()
+
+
+def ingerir_imoveis(imoveis_coletados, tamanho_lote=None, varrer=None, max_ausencias=None):
+    """Grava uma coleta inteira em uma única transação (não faz commit).
+
+    Mesmo processamento da IngestaoEmLotes, para quem já tem a lista pronta.
+    """
+    ingestao = IngestaoEmLotes(tamanho_lote, commit_lote=max(len(imoveis_coletados), 1), commit=False)
+    ingestao.adicionar(imoveis_coletados)
+    return ingestao.finalizar(varrer, max_ausencias)
@@ -0,0 +1,320 @@
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+import click
+from flask import request
+from sqlalchemy import and_, or_, select, update, insert
+from sqlalchemy.exc import IntegrityError
+from src.database import db
+from src.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Execução de tarefas em background segura com vários processos da API.
+# O estado fica na tabela jobs: enfileirar é um INSERT (o índice único
+# parcial impede dois jobs ativos do mesmo tipo), reivindicar é um UPDATE
+# condicional (compare-and-set) que só um worker vence, e o worker dono
+# renova o lease periodicamente. Se o processo morrer, o lease vence e outro
+# worker retoma o job. Agendamentos cron viram jobs com agendado_para
+# preenchido; a chave única (tipo, agendado_para) evita que cada processo
+# crie o seu. Horários em UTC, como o restante do banco.
+JOBS_LEASE = float(os.environ.get('JOBS_LEASE', 60))  # segundos
+JOBS_HEARTBEAT = float(os.environ.get('JOBS_HEARTBEAT', 10))  # segundos
+JOBS_INTERVALO = float(os.environ.get('JOBS_INTERVALO', 5))  # segundos entre verificações da fila
+JOBS_MAX_TENTATIVAS = int(os.environ.get('JOBS_MAX_TENTATIVAS', 2))
+JOBS_WORKER_EMBUTIDO = os.environ.get('JOBS_WORKER_EMBUTIDO', 'true').lower() == 'true'
+MONITORAMENTO_CRON = os.environ.get('MONITORAMENTO_CRON', '')  # ex.: '0 */6 * * *'
+
+# Tarefas conhecidas: tipo -> função(contexto) que devolve o resultado (JSON)
+TAREFAS = {}
+
+def tarefa(tipo):
+    """Registra a função que executa os jobs de um tipo"""
+    def registrar(func):
+        TAREFAS[tipo] = func
+        return func
+    return registrar
+
+
+class ExpressaoCron:
+    """Expressão cron de 5 campos: minuto hora dia-do-mês mês dia-da-semana.
+
+    Aceita '*', números, intervalos 'a-b', listas 'a,b' e passos '*/n' ou
+    'a-b/n'. Dia da semana vai de 0 (domingo) a 6; 7 também é domingo.
+    """
+    LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expressao):
+        campos = expressao.split()
+        if len(campos) != 5:
+            raise ValueError(f"Expressão cron inválida (esperados 5 campos): {expressao!r}")
+        self.expressao = expressao
+        self.minutos, self.horas, self.dias, self.meses, self.dias_semana = (
+            self._campo(campo, minimo, maximo) for campo, (minimo, maximo) in zip(campos, self.LIMITES)
+        )
+        if 7 in self.dias_semana:
+            self.dias_semana = (self.dias_semana - {7}) | {0}
+        self._dia_livre = campos[2] == '*'
+        self._semana_livre = campos[4] == '*'
+
+    @staticmethod
+    def _campo(campo, minimo, maximo):
+        valores = set()
+        for parte in campo.split(','):
+            intervalo, barra, passo = parte.partition('/')
+            passo = int(passo) if barra else 1
+            if intervalo == '*':
+                inicio, fim = minimo, maximo
+            elif '-' in intervalo:
+                inicio, fim = (int(v) for v in intervalo.split('-', 1))
+            else:
+                inicio = int(intervalo)
+                fim = maximo if barra else inicio
+            if inicio < minimo or fim > maximo or inicio > fim or passo < 1:
+                raise ValueError(f"Campo cron fora do intervalo {minimo}-{maximo}: {parte!r}")
+            valores.update(range(inicio, fim + 1, passo))
+        return valores
+
+    def _dia_confere(self, momento):
+        dia = momento.day in self.dias
+        semana = momento.isoweekday() % 7 in self.dias_semana
+        # Como no cron: com os dois campos restritos, basta um deles casar
+        if self._dia_livre:
+            return semana
+        if self._semana_livre:
+            return dia
+        return dia or semana
+
+    def proximo(self, apos):
+        """Primeiro horário da expressão estritamente posterior a `apos`"""
+        momento = apos.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = momento + timedelta(days=366 * 4)
+        while momento < limite:
+            if momento.month not in self.meses:
+                ano, mes = divmod(momento.month, 12)
+                momento = momento.replace(year=momento.year + ano, month=mes + 1, day=1, hour=0, minute=0)
+            elif not self._dia_confere(momento):
+                momento = momento.replace(hour=0, minute=0) + timedelta(days=1)
+            elif momento.hour not in self.horas:
+                momento = momento.replace(minute=0) + timedelta(hours=1)
+            elif momento.minute not in self.minutos:
+                momento += timedelta(minutes=1)
+            else:
+                return momento
+        raise ValueError(f"Expressão cron sem horário válido: {self.expressao!r}")
+
+
+def enfileirar_job(tipo, agendado_para=None):
+    """Cria um job PENDENTE; devolve None se já existe job ativo do tipo (ou o agendamento já foi criado)"""
+    try:
+        with db.engine.begin() as conexao:
+            resultado = conexao.execute(insert(Job).values(
+                tipo=tipo, status='PENDENTE', agendado_para=agendado_para,
+                criado_em=datetime.utcnow(), tentativas=0
+            ))
+            return resultado.inserted_primary_key[0]
+    except IntegrityError:
+        return None
+
+def _reivindicavel(agora):
+    return or_(
+        Job.status == 'PENDENTE',
+        and_(Job.status == 'EM_EXECUCAO', Job.lease_ate < agora)
+    )
+
+def expirar_jobs():
+    """Encerra com ERRO os jobs abandonados que já esgotaram as tentativas"""
+    agora = datetime.utcnow()
+    with db.engine.begin() as conexao:
+        conexao.execute(update(Job).where(
+            Job.status == 'EM_EXECUCAO', Job.lease_ate < agora, Job.tentativas >= JOBS_MAX_TENTATIVAS
+        ).values(
+            status='ERRO', finalizado_em=agora, lease_ate=None,
+            erro=f"Lease expirado após {JOBS_MAX_TENTATIVAS} tentativa(s)"
+        ))
+
+def reivindicar_job(worker_id, tipos=None):
+    """Reivindica atomicamente o job pendente (ou abandonado) mais antigo; devolve o id ou None"""
+    tipos = list(tipos or TAREFAS)
+    agora = datetime.utcnow()
+    with db.engine.connect() as conexao:
+        candidatos = conexao.execute(
+            select(Job.id).where(Job.tipo.in_(tipos), _reivindicavel(agora)).order_by(Job.criado_em).limit(5)
+        ).scalars().all()
+
+    for job_id in candidatos:
+        # Só um worker consegue mudar a linha enquanto ela ainda está reivindicável
+        with db.engine.begin() as conexao:
+            resultado = conexao.execute(update(Job).where(Job.id == job_id, _reivindicavel(agora)).values(
+                status='EM_EXECUCAO', worker_id=worker_id, iniciado_em=agora, heartbeat_em=agora,
+                lease_ate=agora + timedelta(seconds=JOBS_LEASE), tentativas=Job.tentativas + 1
+            ))
+        if resultado.rowcount == 1:
+            return job_id
+    return None
+
+def renovar_lease(job_id, worker_id, progresso=None):
+    """Heartbeat: estende o lease (e grava o progresso); False se o job não pertence mais ao worker"""
+    agora = datetime.utcnow()
+    valores = {'heartbeat_em': agora, 'lease_ate': agora + timedelta(seconds=JOBS_LEASE)}
+    if progresso is not None:
+        valores['progresso'] = json.dumps(progresso, ensure_ascii=False, default=str)
+    with db.engine.begin() as conexao:
+        resultado = conexao.execute(update(Job).where(
+            Job.id == job_id, Job.worker_id == worker_id, Job.status == 'EM_EXECUCAO'
+        ).values(**valores))
+    return resultado.rowcount == 1
+
+def finalizar_job(job_id, worker_id, status, resultado=None, erro=None):
+    """Grava o desfecho do job (ignorado se outro worker já o reivindicou)"""
+    with db.engine.begin() as conexao:
+        conexao.execute(update(Job).where(Job.id == job_id, Job.worker_id == worker_id).values(
+            status=status, finalizado_em=datetime.utcnow(), lease_ate=None, erro=erro,
+            resultado=json.dumps(resultado, ensure_ascii=False, default=str) if resultado is not None else None
+        ))
+
+
+class ContextoJob:
+    """Dados do job em execução passados à tarefa"""
+
+    def __init__(self, job_id, worker_id):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.progresso = {}
+        self.lease_perdido = threading.Event()
+
+    def atualizar_progresso(self, **dados):
+        """Atualiza o progresso (gravado no banco pelo próximo heartbeat)"""
+        self.progresso = {**self.progresso, **dados}
+
+
+class WorkerJobs:
+    """Loop que agenda, reivindica e executa jobs em uma thread"""
+
+    def __init__(self, app, worker_id=None, intervalo=None, cron=None):
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.intervalo = intervalo or JOBS_INTERVALO
+        self.cron = ExpressaoCron(cron) if cron else None
+        self.proximo_agendamento = self.cron.proximo(datetime.utcnow()) if self.cron else None
+        self._despertar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self.executar_loop, name='worker-jobs', daemon=True)
+        self._thread.start()
+        logger.info(f"👷 Worker de jobs iniciado ({self.worker_id})")
+
+    def parar(self):
+        self._parar.set()
+        self._despertar.set()
+
+    def despertar(self):
+        """Verifica a fila imediatamente (chamado ao enfileirar neste processo)"""
+        self._despertar.set()
+
+    def executar_loop(self):
+        while not self._parar.is_set():
+            try:
+                self.executar_pendentes()
+            except Exception:
+                logger.exception("Erro no worker de jobs")
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def executar_pendentes(self):
+        with self.app.app_context():
+            self._agendar()
+            expirar_jobs()
+            while not self._parar.is_set():
+                job_id = reivindicar_job(self.worker_id)
+                if job_id is None:
+                    break
+                self._executar(job_id)
+
+    def _agendar(self):
+        agora = datetime.utcnow()
+        if self.proximo_agendamento and agora >= self.proximo_agendamento:
+            if enfileirar_job('monitoramento', agendado_para=self.proximo_agendamento):
+                logger.info(f"⏰ Monitoramento agendado para {self.proximo_agendamento.isoformat()} enfileirado")
+            self.proximo_agendamento = self.cron.proximo(agora)
+
+    def _heartbeat(self, contexto, parar):
+        with self.app.app_context():
+            while not parar.wait(JOBS_HEARTBEAT):
+                try:
+                    if not renovar_lease(contexto.job_id, self.worker_id, contexto.progresso):
+                        logger.error(f"Job {contexto.job_id}: lease perdido para outro worker")
+                        contexto.lease_perdido.set()
+                        return
+                except Exception as e:
+                    # Ex.: SQLite ocupado durante a ingestão; tenta no próximo ciclo
+                    logger.warning(f"Job {contexto.job_id}: falha no heartbeat: {e}")
+
+    def _executar(self, job_id):
+        tipo = db.session.get(Job, job_id).tipo
+        funcao = TAREFAS[tipo]
+        db.session.remove()
+
+        contexto = ContextoJob(job_id, self.worker_id)
+        parar_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(contexto, parar_heartbeat), daemon=True)
+        heartbeat.start()
+        inicio = datetime.utcnow()
+        try:
+            resultado = funcao(contexto)
+            finalizar_job(job_id, self.worker_id, 'SUCESSO', resultado=resultado)
+        except Exception as e:
+            logger.exception(f"Job {job_id} ({tipo}) falhou")
+            finalizar_job(job_id, self.worker_id, 'ERRO', erro=str(e), resultado={
+                'status': 'erro',
+                'erro': str(e),
+                'tempo_execucao': (datetime.utcnow() - inicio).total_seconds(),
+                'data_execucao': datetime.utcnow().isoformat()
+            })
+        finally:
+            parar_heartbeat.set()
+            db.session.remove()
+
+
+_worker_embutido = {'worker': None}
+_lock_worker = threading.Lock()
+
+def iniciar_worker_embutido(app):
+    """Inicia (uma vez por processo) o worker de jobs dentro do servidor web"""
+    if not JOBS_WORKER_EMBUTIDO:
+        return None
+    with _lock_worker:
+        if _worker_embutido['worker'] is None:
+            worker = WorkerJobs(app, cron=MONITORAMENTO_CRON or None)
+            worker.iniciar()
+            _worker_embutido['worker'] = worker
+    return _worker_embutido['worker']
+
+def despertar_worker():
+    """Acorda o worker embutido deste processo, se houver"""
+    if _worker_embutido['worker']:
+        _worker_embutido['worker'].despertar()
+
+def registrar_worker(app):
+    """Inicia o worker embutido na primeira requisição e registra `flask executar-worker`.
+
+    Iniciar na primeira requisição (e não no import) evita workers em
+    processos de CLI, como `flask reconstruir-estatisticas`.
+    """
+    @app.before_request
+    def _iniciar_worker():
+        if _worker_embutido['worker'] is None and request.endpoint != 'static':
+            iniciar_worker_embutido(app)
+
+    @app.cli.command('executar-worker')
+    def executar_worker_comando():
+        """Executa o worker de jobs em primeiro plano (processo separado da API)"""
+        worker = WorkerJobs(app, cron=MONITORAMENTO_CRON or None)
+        click.echo(f"Worker {worker.worker_id} aguardando jobs")
+        worker.executar_loop()
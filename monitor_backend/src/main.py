@@ -3,28 +3,61 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, Response, send_from_directory
 from flask_cors import CORS
-from src.database import db, init_database
-from src.models.imovel import Imovel, ExecucaoScraper
+from src.database import db, init_database, url_banco
+from src.models.imovel import Imovel, ExecucaoScraper, ImovelSnapshot
+from src.models.estatistica import EstatisticaImovel, NovosPorDia
+from src.models.versao_dados import VersaoDados
+from src.models.job import Job
+from src.models.checkpoint import CheckpointPagina
+from src.models.pagina_arquivada import PaginaArquivada
+from src.models.grupo_duplicata import GrupoDuplicata
 from src.routes.monitor import monitor_bp
+from src.estatisticas import registrar_comandos
+from src.arquivo_paginas import registrar_comandos_arquivo
+from src.duplicatas import registrar_comandos_duplicatas
+from src.jobs import registrar_worker, iniciar_worker_embutido
+from src.metricas import registro as registro_metricas, registrar_metricas_http
+from src.respostas import ProvedorJSON, registrar_compressao
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
+# JSON das respostas com orjson
+app.json = ProvedorJSON(app)
+
 # Habilitar CORS para todas as rotas
 CORS(app)
 
+# Latência por endpoint (exposta em /metrics)
+registrar_metricas_http(app)
+
+# Compressão gzip/brotli das respostas grandes
+registrar_compressao(app)
+
 # Registrar blueprints
 app.register_blueprint(monitor_bp, url_prefix='/api/monitor')
 
 # Configuração do banco de dados
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = url_banco()  # DATABASE_URL ou src/database/app.db
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Inicializar banco de dados
 init_database(app)
 
+# Comandos de manutenção (flask --app src.main reconstruir-estatisticas)
+registrar_comandos(app)
+
+# Arquivo de páginas: reprocessar-paginas e podar-paginas
+registrar_comandos_arquivo(app)
+
+# Grupos de anúncios duplicados entre imobiliárias: agrupar-duplicatas
+registrar_comandos_duplicatas(app)
+
+# Worker de jobs embutido (monitoramento manual e agendado) e `flask executar-worker`
+registrar_worker(app)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -41,6 +74,11 @@ def serve(path):
         else:
             return "index.html not found", 404
 
+# Métricas no formato texto do Prometheus
+@app.route('/metrics')
+def metrics():
+    return Response(registro_metricas.exposicao(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # Rota de health check
 @app.route('/health')
 def health_check():
@@ -48,5 +86,6 @@ def health_check():
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
+    iniciar_worker_embutido(app)
     app.run(host='0.0.0.0', port=port, debug=False)
 
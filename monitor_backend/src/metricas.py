@@ -0,0 +1,161 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Métricas do processo no formato texto do Prometheus (GET /metrics).
+# Contadores e histogramas ficam em memória, com um conjunto de valores por
+# combinação de labels; cada worker/processo expõe os próprios números (o
+# worker embutido roda no processo web e aparece no /metrics dele).
+
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _formatar_labels(pares):
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+def _numero(valor):
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda, labels=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.nome}: labels esperados {self.labels}, recebidos {tuple(labels)}")
+        return tuple(str(labels[nome]) for nome in self.labels)
+
+    def exposicao(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        with self._lock:
+            itens = sorted(self._valores.items())
+            linhas.extend(self._linhas(list(zip(self.labels, chave)), valor) for chave, valor in itens)
+        return '\n'.join(linhas)
+
+
+class Contador(Metrica):
+    """Valor que só cresce (requisições, bytes, retentativas...)"""
+    tipo = 'counter'
+
+    def inc(self, valor=1, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def _linhas(self, pares, valor):
+        return f'{self.nome}{_formatar_labels(pares)} {_numero(valor)}'
+
+
+class Histograma(Metrica):
+    """Distribuição de durações em buckets cumulativos, com soma e contagem"""
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, labels=(), buckets=BUCKETS_PADRAO):
+        super().__init__(nome, ajuda, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            contagens, soma = self._valores.get(chave, ([0] * (len(self.buckets) + 1), 0.0))
+            contagens[bisect_left(self.buckets, valor)] += 1
+            self._valores[chave] = (contagens, soma + valor)
+
+    def _linhas(self, pares, valor):
+        contagens, soma = valor
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.buckets + (float('inf'),), contagens):
+            acumulado += contagem
+            le = '+Inf' if limite == float('inf') else _numero(limite)
+            linhas.append(f'{self.nome}_bucket{_formatar_labels(pares + [("le", le)])} {acumulado}')
+        linhas.append(f'{self.nome}_sum{_formatar_labels(pares)} {_numero(soma)}')
+        linhas.append(f'{self.nome}_count{_formatar_labels(pares)} {acumulado}')
+        return '\n'.join(linhas)
+
+
+class RegistroMetricas:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            return self._metricas.setdefault(metrica.nome, metrica)
+
+    def contador(self, nome, ajuda, labels=()):
+        return self._registrar(Contador(nome, ajuda, labels))
+
+    def histograma(self, nome, ajuda, labels=(), buckets=BUCKETS_PADRAO):
+        return self._registrar(Histograma(nome, ajuda, labels, buckets))
+
+    def exposicao(self):
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return '\n'.join(metrica.exposicao() for metrica in metricas) + '\n'
+
+
+registro = RegistroMetricas()
+
+# Coleta (cliente HTTP e scrapers)
+http_requisicoes = registro.contador(
+    'monitor_http_requisicoes_total', 'Requisições HTTP dos scrapers por host e status', ('host', 'status'))
+http_bytes = registro.contador(
+    'monitor_http_bytes_total', 'Bytes recebidos pelos scrapers por host', ('host',))
+http_retentativas = registro.contador(
+    'monitor_http_retentativas_total', 'Novas tentativas de requisição por host', ('host',))
+http_duracao = registro.histograma(
+    'monitor_http_requisicao_segundos', 'Duração das requisições dos scrapers (com retentativas)', ('host',))
+scraper_etapas = registro.histograma(
+    'monitor_scraper_etapa_segundos', 'Tempo por site e etapa (fetch, parse, ingestao, duplicatas)', ('site', 'etapa'))
+scraper_execucoes = registro.contador(
+    'monitor_scraper_execucoes_total', 'Execuções de cada site por status', ('site', 'status'))
+scraper_imoveis = registro.contador(
+    'monitor_scraper_imoveis_total', 'Imóveis coletados por site', ('site',))
+
+# API
+api_requisicoes = registro.contador(
+    'monitor_api_requisicoes_total', 'Requisições atendidas pela API', ('endpoint', 'metodo', 'status'))
+api_duracao = registro.histograma(
+    'monitor_api_requisicao_segundos', 'Latência das requisições da API por endpoint', ('endpoint', 'metodo'))
+
+# Tempo acumulado por etapa do site em execução na thread/contexto atual
+# (o cliente HTTP soma o tempo de fetch; o restante do scraper é parse)
+etapas_atuais = ContextVar('etapas_atuais', default=None)
+
+def acumular_etapa(etapa, segundos):
+    etapas = etapas_atuais.get()
+    if etapas is not None:
+        etapas[etapa] = etapas.get(etapa, 0.0) + segundos
+
+def registrar_metricas_http(app):
+    """Mede a latência de cada requisição do app por regra de rota"""
+    from flask import g, request
+
+    @app.before_request
+    def iniciar_cronometro():
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def registrar_requisicao(response):
+        inicio = g.pop('inicio_requisicao', None)
+        if inicio is not None:
+            # Regra da rota (ex.: /api/monitor/imoveis), não a URL: cardinalidade fixa
+            endpoint = request.url_rule.rule if request.url_rule else 'sem_rota'
+            api_duracao.observar(time.perf_counter() - inicio, endpoint=endpoint, metodo=request.method)
+            api_requisicoes.inc(endpoint=endpoint, metodo=request.method, status=response.status_code)
+        return response
@@ -0,0 +1,181 @@
+import logging
+from datetime import datetime
+from sqlalchemy import text, inspect
+from src.database import db
+from src.normalizacao import campos_numericos, bairro_do_endereco, hash_conteudo
+
+logger = logging.getLogger(__name__)
+
+# Migrações de schema para bancos já existentes. O db.create_all() cria as
+# tabelas novas, mas não altera tabelas antigas: cada migração abaixo deve ser
+# idempotente e roda uma única vez por banco (registrada em migracoes_schema).
+MIGRACOES = []
+
+def migracao(nome):
+    """Registra uma função de migração na ordem de declaração"""
+    def registrar(func):
+        MIGRACOES.append((nome, func))
+        return func
+    return registrar
+
+@migracao('001_imoveis_indice_unico')
+def _indice_unico_imoveis(conexao):
+    """Remove duplicatas antigas e torna idx_imovel_unique realmente único"""
+    conexao.execute(text("""
+        DELETE FROM imoveis WHERE id NOT IN (
+            SELECT MIN(id) FROM imoveis GROUP BY imobiliaria, codigo, tipo_negocio
+        )
+    """))
+    conexao.execute(text("DROP INDEX IF EXISTS idx_imovel_unique"))
+    conexao.execute(text(
+        "CREATE UNIQUE INDEX idx_imovel_unique ON imoveis (imobiliaria, codigo, tipo_negocio)"
+    ))
+
+def _adicionar_colunas(conexao, tabela, colunas):
+    """ALTER TABLE ADD COLUMN apenas para as colunas que ainda não existem"""
+    existentes = {coluna['name'] for coluna in inspect(conexao).get_columns(tabela)}
+    for nome, tipo in colunas:
+        if nome not in existentes:
+            conexao.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {nome} {tipo}"))
+
+@migracao('002_imoveis_colunas_numericas')
+def _colunas_numericas_imoveis(conexao):
+    """Cria as colunas numéricas, preenche as linhas existentes e cria os índices compostos"""
+    _adicionar_colunas(conexao, 'imoveis', [
+        ('preco_centavos', 'BIGINT'),
+        ('area_m2', 'FLOAT'),
+        ('preco_m2', 'FLOAT'),
+        ('quartos_num', 'INTEGER'),
+        ('banheiros_num', 'INTEGER'),
+        ('vagas_num', 'INTEGER'),
+    ])
+    
+    # Backfill em lotes a partir dos textos de exibição
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(text(
+            "SELECT id, preco, area, quartos, banheiros, vagas FROM imoveis "
+            "WHERE id > :ultimo ORDER BY id LIMIT 5000"
+        ), {'ultimo': ultimo_id}).all()
+        if not linhas:
+            break
+        conexao.execute(text(
+            "UPDATE imoveis SET preco_centavos = :preco_centavos, area_m2 = :area_m2, preco_m2 = :preco_m2, "
+            "quartos_num = :quartos_num, banheiros_num = :banheiros_num, vagas_num = :vagas_num WHERE id = :id"
+        ), [{'id': linha.id, **campos_numericos(linha.preco, linha.area, linha.quartos, linha.banheiros, linha.vagas)}
+            for linha in linhas])
+        ultimo_id = linhas[-1].id
+    
+    for indice, colunas in [
+        ('idx_imovel_data', 'ativo, data_coleta'),
+        ('idx_imovel_preco', 'ativo, tipo_negocio, preco_centavos'),
+        ('idx_imovel_area', 'ativo, tipo_negocio, area_m2'),
+        ('idx_imovel_preco_m2', 'ativo, tipo_negocio, preco_m2'),
+        ('idx_imovel_quartos', 'ativo, tipo_negocio, quartos_num, preco_centavos'),
+    ]:
+        conexao.execute(text(f"CREATE INDEX IF NOT EXISTS {indice} ON imoveis ({colunas})"))
+
+@migracao('003_imoveis_busca_texto')
+def _busca_texto_imoveis(conexao):
+    """Cria a coluna bairro (preenchida a partir do endereço) e o índice FTS5"""
+    from src.busca import criar_indice_fts
+    
+    _adicionar_colunas(conexao, 'imoveis', [('bairro', 'VARCHAR(100)')])
+    linhas = conexao.execute(text("SELECT id, endereco FROM imoveis WHERE bairro IS NULL")).all()
+    if linhas:
+        conexao.execute(text("UPDATE imoveis SET bairro = :bairro WHERE id = :id"),
+                        [{'id': linha.id, 'bairro': bairro_do_endereco(linha.endereco)} for linha in linhas])
+    criar_indice_fts(conexao)
+
+@migracao('004_imoveis_indices_ordenacao')
+def _indices_ordenacao_imoveis(conexao):
+    """Troca os índices (ativo, tipo_negocio, coluna) por (ativo, coluna).
+    
+    Assim a ordenação e a paginação por keyset usam o índice mesmo sem
+    filtro de tipo_negocio (que passa a ser checado durante a varredura).
+    """
+    for indice, colunas in [
+        ('idx_imovel_preco', 'ativo, preco_centavos'),
+        ('idx_imovel_area', 'ativo, area_m2'),
+        ('idx_imovel_preco_m2', 'ativo, preco_m2'),
+        ('idx_imovel_quartos', 'ativo, quartos_num'),
+    ]:
+        conexao.execute(text(f"DROP INDEX IF EXISTS {indice}"))
+        conexao.execute(text(f"CREATE INDEX {indice} ON imoveis ({colunas})"))
+
+@migracao('005_estatisticas_materializadas')
+def _estatisticas_materializadas(conexao):
+    """Preenche os rollups de estatísticas e indexa o histórico de execuções"""
+    from src.estatisticas import reconstruir_estatisticas
+    
+    conexao.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_execucoes_scraper_data_execucao ON execucoes_scraper (data_execucao)"
+    ))
+    reconstruir_estatisticas(conexao)
+
+@migracao('006_versao_dados')
+def _versao_dados(conexao):
+    """Cria a linha única de versao_dados usada pelo cache de respostas"""
+    if conexao.execute(text("SELECT 1 FROM versao_dados WHERE id = 1")).first() is None:
+        conexao.execute(text("INSERT INTO versao_dados (id, versao) VALUES (1, 1)"))
+
+@migracao('007_imoveis_ausencias')
+def _ausencias_imoveis(conexao):
+    """Contador de execuções sem o imóvel, usado na desativação dos removidos"""
+    _adicionar_colunas(conexao, 'imoveis', [('ausencias', 'INTEGER NOT NULL DEFAULT 0')])
+
+@migracao('008_imoveis_historico')
+def _historico_imoveis(conexao):
+    """Cria hash_conteudo, preenche as linhas existentes e grava o snapshot inicial de cada imóvel"""
+    _adicionar_colunas(conexao, 'imoveis', [('hash_conteudo', 'VARCHAR(32)')])
+    
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(text(
+            "SELECT id, titulo, tipo_imovel, endereco, bairro, url, data_coleta, preco_centavos, area_m2, "
+            "quartos_num, banheiros_num, vagas_num FROM imoveis "
+            "WHERE id > :ultimo AND hash_conteudo IS NULL ORDER BY id LIMIT 5000"
+        ), {'ultimo': ultimo_id}).all()
+        if not linhas:
+            break
+        valores = [{**linha._mapping, 'hash_conteudo': hash_conteudo(linha._mapping)} for linha in linhas]
+        conexao.execute(text("UPDATE imoveis SET hash_conteudo = :hash_conteudo WHERE id = :id"), valores)
+        conexao.execute(text(
+            "INSERT INTO imoveis_snapshots (imovel_id, data, hash_conteudo, preco_centavos, area_m2, "
+            "quartos_num, banheiros_num, vagas_num) VALUES (:id, :data, :hash_conteudo, :preco_centavos, "
+            ":area_m2, :quartos_num, :banheiros_num, :vagas_num)"
+        ), [{**v, 'data': v['data_coleta'] or datetime.utcnow()} for v in valores])
+        ultimo_id = linhas[-1].id
+
+@migracao('009_execucoes_por_site')
+def _execucoes_por_site(conexao):
+    """Execuções por site (filhas da execução geral) e tempos por etapa"""
+    _adicionar_colunas(conexao, 'execucoes_scraper', [
+        ('execucao_pai_id', 'INTEGER REFERENCES execucoes_scraper (id)'),
+        ('tempo_fetch', 'FLOAT'),
+        ('tempo_parse', 'FLOAT'),
+        ('tempo_ingestao', 'FLOAT'),
+    ])
+    conexao.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_execucoes_scraper_execucao_pai_id ON execucoes_scraper (execucao_pai_id)"
+    ))
+
+def aplicar_migracoes():
+    """Aplica as migrações pendentes, cada uma em sua própria transação"""
+    with db.engine.begin() as conexao:
+        conexao.execute(text(
+            "CREATE TABLE IF NOT EXISTS migracoes_schema ("
+            "nome VARCHAR(100) PRIMARY KEY, data_aplicacao TIMESTAMP NOT NULL)"
+        ))
+        aplicadas = {linha[0] for linha in conexao.execute(text("SELECT nome FROM migracoes_schema"))}
+
+    for nome, func in MIGRACOES:
+        if nome in aplicadas:
+            continue
+        logger.info(f"Aplicando migração {nome}")
+        with db.engine.begin() as conexao:
+            func(conexao)
+            conexao.execute(
+                text("INSERT INTO migracoes_schema (nome, data_aplicacao) VALUES (:nome, :data)"),
+                {'nome': nome, 'data': datetime.utcnow()}
+            )
@@ -0,0 +1,22 @@
+from datetime import datetime
+from src.database import db
+
+class CheckpointPagina(db.Model):
+    """Estado da última coleta de uma página de listagem (ver src/incremental.py).
+
+    Guarda os validadores HTTP (ETag / Last-Modified), a impressão digital do
+    corpo e os imóveis extraídos da página, reaproveitados quando a página
+    não muda entre execuções.
+    """
+    __tablename__ = 'checkpoints_pagina'
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), nullable=False, unique=True)
+    scraper = db.Column(db.String(100), nullable=False)
+    etag = db.Column(db.String(200), nullable=True)
+    last_modified = db.Column(db.String(100), nullable=True)
+    fingerprint = db.Column(db.String(64), nullable=True)  # sha256 do corpo
+    imoveis = db.Column(db.Text, nullable=False, default='[]')  # JSON dos imóveis extraídos (códigos vistos)
+    total_imoveis = db.Column(db.Integer, nullable=False, default=0)
+    alterado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    verificado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,35 @@
+from src.database import db
+
+class EstatisticaImovel(db.Model):
+    """Contagem de imóveis ativos por imobiliária × negócio × tipo × bairro.
+
+    Mantida incrementalmente pela ingestão (ver src/estatisticas.py); tipo e
+    bairro desconhecidos são gravados como '' para caberem na chave única.
+    """
+    __tablename__ = 'estatisticas_imoveis'
+
+    id = db.Column(db.Integer, primary_key=True)
+    imobiliaria = db.Column(db.String(100), nullable=False)
+    tipo_negocio = db.Column(db.String(20), nullable=False)
+    tipo_imovel = db.Column(db.String(50), nullable=False, default='')
+    bairro = db.Column(db.String(100), nullable=False, default='')
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('idx_estatistica_dimensoes', 'imobiliaria', 'tipo_negocio', 'tipo_imovel', 'bairro', unique=True),
+    )
+
+
+class NovosPorDia(db.Model):
+    """Imóveis novos (primeira coleta) por dia, imobiliária e tipo de negócio"""
+    __tablename__ = 'novos_por_dia'
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Date, nullable=False)
+    imobiliaria = db.Column(db.String(100), nullable=False)
+    tipo_negocio = db.Column(db.String(20), nullable=False)
+    novos = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('idx_novos_por_dia', 'data', 'imobiliaria', 'tipo_negocio', unique=True),
+    )
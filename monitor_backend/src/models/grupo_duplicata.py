@@ -0,0 +1,17 @@
+from src.database import db
+
+class GrupoDuplicata(db.Model):
+    """Grupo de duplicatas de cada imóvel ativo (ver src/duplicatas.py).
+
+    Anúncios do mesmo imóvel em imobiliárias diferentes compartilham o
+    grupo_id (o menor imovel_id do grupo); um anúncio sem duplicata forma um
+    grupo sozinho. O bloco e a assinatura MinHash ficam gravados para que a
+    próxima execução só recalcule os imóveis novos ou alterados.
+    """
+    __tablename__ = 'grupo_duplicata'
+
+    imovel_id = db.Column(db.Integer, db.ForeignKey('imoveis.id'), primary_key=True)
+    grupo_id = db.Column(db.Integer, nullable=True, index=True)  # NULL = bloco aguardando reagrupamento
+    bloco = db.Column(db.String(300), nullable=False, index=True)
+    assinatura = db.Column(db.LargeBinary, nullable=True)  # MinHash (None = sem texto para comparar)
+    hash_conteudo = db.Column(db.String(32), nullable=True)  # versão do imóvel usada no cálculo
@@ -1,5 +1,6 @@
 from datetime import datetime
 from src.database import db
+from src.normalizacao import campos_numericos, bairro_do_endereco, hash_conteudo
 
 class Imovel(db.Model):
     __tablename__ = 'imoveis'
@@ -15,14 +16,44 @@ class Imovel(db.Model):
     banheiros = db.Column(db.String(10), nullable=True)
     vagas = db.Column(db.String(10), nullable=True)
     endereco = db.Column(db.String(200), nullable=True)
+    bairro = db.Column(db.String(100), nullable=True)
     tipo_negocio = db.Column(db.String(20), nullable=False)  # LOCAÇÃO ou VENDA
     url = db.Column(db.String(500), nullable=True)
     data_coleta = db.Column(db.DateTime, default=datetime.utcnow)
     ativo = db.Column(db.Boolean, default=True)
+    ausencias = db.Column(db.Integer, nullable=False, default=0)  # execuções seguidas sem aparecer no site
     
-    # Índice único para evitar duplicatas
+    # Valores numéricos derivados dos campos de exibição (preenchidos na ingestão)
+    preco_centavos = db.Column(db.BigInteger, nullable=True)
+    area_m2 = db.Column(db.Float, nullable=True)
+    preco_m2 = db.Column(db.Float, nullable=True)  # R$/m²
+    quartos_num = db.Column(db.Integer, nullable=True)
+    banheiros_num = db.Column(db.Integer, nullable=True)
+    vagas_num = db.Column(db.Integer, nullable=True)
+    
+    # Hash dos campos normalizados: a ingestão compara só ele para detectar mudanças
+    hash_conteudo = db.Column(db.String(32), nullable=True)
+    
+    # Índice único para evitar duplicatas (usado pelo upsert da ingestão)
+    # e índices compostos para os filtros por faixa e ordenações da listagem.
+    # Os índices de ordenação terminam implicitamente no id, então também
+    # atendem a paginação por keyset em (coluna, id).
     __table_args__ = (
-        db.Index('idx_imovel_unique', 'imobiliaria', 'codigo', 'tipo_negocio'),
+        db.Index('idx_imovel_unique', 'imobiliaria', 'codigo', 'tipo_negocio', unique=True),
+        db.Index('idx_imovel_data', 'ativo', 'data_coleta'),
+        db.Index('idx_imovel_preco', 'ativo', 'preco_centavos'),
+        db.Index('idx_imovel_area', 'ativo', 'area_m2'),
+        db.Index('idx_imovel_preco_m2', 'ativo', 'preco_m2'),
+        db.Index('idx_imovel_quartos', 'ativo', 'quartos_num'),
+    )
+    
+    # Campos de to_dict(), na mesma ordem. A listagem lê só essas colunas como
+    # tuplas (sem montar objetos Imovel); data_coleta fica como datetime e o
+    # provedor JSON a converte para ISO 8601.
+    CAMPOS_DICT = (
+        'id', 'imobiliaria', 'codigo', 'titulo', 'tipo_imovel', 'preco', 'area', 'quartos',
+        'banheiros', 'vagas', 'endereco', 'bairro', 'tipo_negocio', 'url', 'data_coleta', 'ativo',
+        'preco_centavos', 'area_m2', 'preco_m2', 'quartos_num', 'banheiros_num', 'vagas_num'
     )
     
     def to_dict(self):
@@ -39,41 +70,69 @@ class Imovel(db.Model):
             'banheiros': self.banheiros,
             'vagas': self.vagas,
             'endereco': self.endereco,
+            'bairro': self.bairro,
             'tipo_negocio': self.tipo_negocio,
             'url': self.url,
             'data_coleta': self.data_coleta.isoformat() if self.data_coleta else None,
-            'ativo': self.ativo
+            'ativo': self.ativo,
+            'preco_centavos': self.preco_centavos,
+            'area_m2': self.area_m2,
+            'preco_m2': self.preco_m2,
+            'quartos_num': self.quartos_num,
+            'banheiros_num': self.banheiros_num,
+            'vagas_num': self.vagas_num
         }
     
+    @staticmethod
+    def valores_scraper(data):
+        """Converte os dados do scraper nos valores das colunas da tabela.
+        
+        Inclui a etapa de normalização que deriva as colunas numéricas
+        (preço em centavos, área, R$/m² e contagens) dos textos de exibição
+        e o hash de conteúdo usado para detectar mudanças.
+        """
+        valores = {
+            'imobiliaria': data.get('imobiliaria', ''),
+            'codigo': data.get('codigo', ''),
+            'titulo': data.get('titulo', ''),
+            'tipo_imovel': data.get('tipo_imovel', ''),
+            'preco': data.get('preco', ''),
+            'area': data.get('area', ''),
+            'quartos': data.get('quartos', ''),
+            'banheiros': data.get('banheiros', ''),
+            'vagas': data.get('vagas', ''),
+            'endereco': data.get('endereco', ''),
+            'bairro': data.get('bairro') or bairro_do_endereco(data.get('endereco')),
+            'tipo_negocio': data.get('tipo_negocio', ''),
+            'url': data.get('url', '')
+        }
+        valores.update(campos_numericos(
+            valores['preco'], valores['area'], valores['quartos'], valores['banheiros'], valores['vagas']
+        ))
+        valores['hash_conteudo'] = hash_conteudo(valores)
+        return valores
+    
     @staticmethod
     def from_scraper_data(data):
         """Cria um objeto Imovel a partir dos dados do scraper"""
-        return Imovel(
-            imobiliaria=data.get('imobiliaria', ''),
-            codigo=data.get('codigo', ''),
-            titulo=data.get('titulo', ''),
-            tipo_imovel=data.get('tipo_imovel', ''),
-            preco=data.get('preco', ''),
-            area=data.get('area', ''),
-            quartos=data.get('quartos', ''),
-            banheiros=data.get('banheiros', ''),
-            vagas=data.get('vagas', ''),
-            endereco=data.get('endereco', ''),
-            tipo_negocio=data.get('tipo_negocio', ''),
-            url=data.get('url', '')
-        )
+        return Imovel(**Imovel.valores_scraper(data))
 
 
 class ExecucaoScraper(db.Model):
     __tablename__ = 'execucoes_scraper'
     
     id = db.Column(db.Integer, primary_key=True)
-    data_execucao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_execucao = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     scraper_nome = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(20), nullable=False)  # SUCESSO, ERRO, EM_ANDAMENTO
     imoveis_coletados = db.Column(db.Integer, default=0)
     tempo_execucao = db.Column(db.Float, nullable=True)  # em segundos
     erro_mensagem = db.Column(db.Text, nullable=True)
+    # Linhas filhas (uma por site) apontam para a execução "Todos os Scrapers"
+    execucao_pai_id = db.Column(db.Integer, db.ForeignKey('execucoes_scraper.id'), nullable=True, index=True)
+    tempo_fetch = db.Column(db.Float, nullable=True)
+    tempo_parse = db.Column(db.Float, nullable=True)
+    tempo_ingestao = db.Column(db.Float, nullable=True)  # só na execução pai
     
     def to_dict(self):
         return {
@@ -83,6 +142,44 @@ class ExecucaoScraper(db.Model):
             'status': self.status,
             'imoveis_coletados': self.imoveis_coletados,
             'tempo_execucao': self.tempo_execucao,
+            'tempo_fetch': self.tempo_fetch,
+            'tempo_parse': self.tempo_parse,
+            'tempo_ingestao': self.tempo_ingestao,
             'erro_mensagem': self.erro_mensagem
         }
 
+class ImovelSnapshot(db.Model):
+    """Histórico compacto de um imóvel: uma linha por mudança de conteúdo.
+
+    A ingestão só acrescenta uma linha quando o hash_conteudo do imóvel muda
+    (ou na primeira coleta); imóveis inalterados não custam nada. Guarda os
+    valores numéricos, suficientes para o histórico de preços.
+    """
+    __tablename__ = 'imoveis_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    imovel_id = db.Column(db.Integer, db.ForeignKey('imoveis.id'), nullable=False)
+    data = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    hash_conteudo = db.Column(db.String(32), nullable=False)
+    preco_centavos = db.Column(db.BigInteger, nullable=True)
+    area_m2 = db.Column(db.Float, nullable=True)
+    quartos_num = db.Column(db.Integer, nullable=True)
+    banheiros_num = db.Column(db.Integer, nullable=True)
+    vagas_num = db.Column(db.Integer, nullable=True)
+    
+    __table_args__ = (
+        db.Index('idx_snapshot_imovel_data', 'imovel_id', 'data'),
+        db.Index('idx_snapshot_data', 'data'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'imovel_id': self.imovel_id,
+            'data': self.data.isoformat() if self.data else None,
+            'preco': self.preco_centavos / 100 if self.preco_centavos is not None else None,
+            'area_m2': self.area_m2,
+            'quartos': self.quartos_num,
+            'banheiros': self.banheiros_num,
+            'vagas': self.vagas_num
+        }
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+from sqlalchemy import text
+from src.database import db
+
+# Status em que o job ainda ocupa a vaga do seu tipo
+STATUS_ATIVOS = ('PENDENTE', 'EM_EXECUCAO')
+
+class Job(db.Model):
+    """Execução em background persistida no banco.
+
+    Um worker reivindica o job gravando worker_id e lease_ate; enquanto roda
+    renova o lease (heartbeat). Job EM_EXECUCAO com lease vencido pertence a
+    um worker que morreu e pode ser reivindicado de novo. O índice único
+    parcial garante no máximo um job ativo por tipo, qualquer que seja o
+    número de processos da API.
+    """
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='PENDENTE')  # PENDENTE, EM_EXECUCAO, SUCESSO, ERRO
+    agendado_para = db.Column(db.DateTime, nullable=True)  # horário do agendamento cron (None = manual)
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    finalizado_em = db.Column(db.DateTime, nullable=True)
+    worker_id = db.Column(db.String(100), nullable=True)
+    lease_ate = db.Column(db.DateTime, nullable=True)
+    heartbeat_em = db.Column(db.DateTime, nullable=True)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    progresso = db.Column(db.Text, nullable=True)  # JSON
+    resultado = db.Column(db.Text, nullable=True)  # JSON
+    erro = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.Index(
+            'idx_job_ativo', 'tipo', unique=True,
+            sqlite_where=text("status IN ('PENDENTE', 'EM_EXECUCAO')"),
+            postgresql_where=text("status IN ('PENDENTE', 'EM_EXECUCAO')")
+        ),
+        db.Index('idx_job_agendamento', 'tipo', 'agendado_para', unique=True),
+        db.Index('idx_job_status', 'status', 'criado_em'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'agendado_para': self.agendado_para.isoformat() if self.agendado_para else None,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None,
+            'worker_id': self.worker_id,
+            'heartbeat_em': self.heartbeat_em.isoformat() if self.heartbeat_em else None,
+            'tentativas': self.tentativas,
+            'progresso': json.loads(self.progresso) if self.progresso else None,
+            'resultado': json.loads(self.resultado) if self.resultado else None,
+            'erro': self.erro
+        }
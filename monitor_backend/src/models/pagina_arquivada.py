@@ -0,0 +1,26 @@
+from datetime import datetime
+from src.database import db
+
+class PaginaArquivada(db.Model):
+    """Página baixada pelos scrapers (ver src/arquivo_paginas.py).
+
+    O corpo fica comprimido em disco, endereçado pelo sha256; cada linha
+    registra uma busca (URL, data e hash), então o mesmo conteúdo baixado
+    várias vezes ocupa um único arquivo.
+    """
+    __tablename__ = 'paginas_arquivadas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), nullable=False)
+    buscado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    compressao = db.Column(db.String(10), nullable=False)  # gzip ou zstd
+    status_code = db.Column(db.Integer, nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    tamanho = db.Column(db.Integer, nullable=False)  # bytes do corpo sem compressão
+
+    # Última versão de cada URL (reprodução) e poda por data
+    __table_args__ = (
+        db.Index('idx_pagina_arquivada_url', 'url', 'buscado_em'),
+        db.Index('idx_pagina_arquivada_data', 'buscado_em'),
+    )
@@ -0,0 +1,12 @@
+from src.database import db
+
+class VersaoDados(db.Model):
+    """Versão dos dados exibidos pela API (linha única, id = 1).
+    
+    Incrementada na mesma transação que grava o resultado de uma execução
+    dos scrapers; o cache de respostas usa o número para invalidar entradas.
+    """
+    __tablename__ = 'versao_dados'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=1)
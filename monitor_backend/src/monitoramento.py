@@ -0,0 +1,189 @@
+import json
+import logging
+import time
+import traceback
+from datetime import datetime
+from sqlalchemy import select
+from src.database import db, engine_leitura
+from src.models.imovel import ExecucaoScraper
+from src.models.job import Job, STATUS_ATIVOS
+from src.scrapers_gerais import SCRAPERS, executar_scrapers
+from src.cliente_http import cliente_http
+from src.ingestao import IngestaoEmLotes
+from src.cache import incrementar_versao_dados
+from src.eventos import canal_eventos
+from src.jobs import tarefa
+from src.incremental import carregar_controle, imobiliarias_completas
+from src.arquivo_paginas import arquivo_paginas
+from src.duplicatas import atualizar_duplicatas
+from src import metricas
+
+logger = logging.getLogger(__name__)
+
+def _registrar_sites(execucao, relatorio_sites):
+    """Uma linha de ExecucaoScraper por site, filha da execução geral"""
+    for nome, info in relatorio_sites.items():
+        db.session.add(ExecucaoScraper(
+            execucao_pai_id=execucao.id,
+            data_execucao=execucao.data_execucao,
+            scraper_nome=nome,
+            status=info['status'],
+            imoveis_coletados=info['imoveis'],
+            tempo_execucao=info['tempo_execucao'],
+            tempo_fetch=info.get('tempo_fetch'),
+            tempo_parse=info.get('tempo_parse'),
+            erro_mensagem=info['erro']
+        ))
+
+def _agrupar_duplicatas():
+    """Atualiza os grupos de duplicatas; uma falha aqui não invalida a coleta já gravada"""
+    try:
+        resultado = atualizar_duplicatas(commit=True)
+        incrementar_versao_dados()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception("❌ Erro ao agrupar duplicatas")
+        return None
+    metricas.scraper_etapas.observar(resultado['tempo'], site='todos', etapa='duplicatas')
+    return resultado
+
+@tarefa('monitoramento')
+def executar_monitoramento_job(contexto):
+    """Executa os scrapers e salva no banco (roda no worker de jobs)"""
+    inicio = time.time()
+    contexto.atualizar_progresso(concluidos=0, total=len(SCRAPERS))
+    canal_eventos.publicar('inicio', {'total_scrapers': len(SCRAPERS)})
+
+    def ao_evento(tipo, dados):
+        # Progresso vai para o canal SSE local e, pelo heartbeat, para o banco
+        if tipo == 'scraper_fim':
+            contexto.atualizar_progresso(concluidos=dados['concluidos'], total=dados['total'], scraper=dados['scraper'])
+        canal_eventos.publicar(tipo, dados)
+
+    resultado = None
+    relatorio_sites = None
+    ingestao = None
+    tempo_ingestao = 0.0
+    try:
+        # Registrar início da execução
+        execucao = ExecucaoScraper(
+            scraper_nome='Todos os Scrapers',
+            status='EM_ANDAMENTO'
+        )
+        db.session.add(execucao)
+        incrementar_versao_dados()
+        db.session.commit()
+
+        # Imóveis gravados em lotes (com commit) à medida que os sites entregam
+        def ao_lote(totais):
+            contexto.atualizar_progresso(gravados=totais['coletados'], novos=totais['novos'])
+            canal_eventos.publicar('ingestao', {
+                'gravados': totais['coletados'], 'novos': totais['novos'], 'atualizados': totais['atualizados']
+            })
+
+        ingestao = IngestaoEmLotes(ao_lote=ao_lote)
+
+        def ao_imoveis(imoveis):
+            nonlocal tempo_ingestao
+            if contexto.lease_perdido.is_set():
+                raise RuntimeError('Job reivindicado por outro worker; coleta interrompida')
+            inicio_lote = time.perf_counter()
+            ingestao.adicionar(imoveis)
+            tempo_ingestao += time.perf_counter() - inicio_lote
+
+        # Executar scrapers (páginas sem alteração reaproveitam o checkpoint)
+        controle = carregar_controle()
+        db.session.commit()  # não segurar a transação de leitura durante a coleta
+        with arquivo_paginas.coleta():
+            _, relatorio_sites = executar_scrapers(ao_evento=ao_evento, controle=controle, ao_imoveis=ao_imoveis)
+
+        if contexto.lease_perdido.is_set():
+            raise RuntimeError('Job reivindicado por outro worker; coleta interrompida')
+
+        # Último lote, varredura dos ausentes e checkpoints das páginas
+        contexto.atualizar_progresso(etapa='ingestao')
+        inicio_ingestao = time.perf_counter()
+        resultado_ingestao = ingestao.finalizar(varrer=imobiliarias_completas(relatorio_sites))
+        controle.salvar()
+        arquivo_paginas.salvar()
+        tempo_ingestao += time.perf_counter() - inicio_ingestao
+        metricas.scraper_etapas.observar(tempo_ingestao, site='todos', etapa='ingestao')
+        novos_imoveis = resultado_ingestao['novos']
+
+        # Atualizar execução com sucesso (mesma transação dos imóveis)
+        tempo_execucao = time.time() - inicio
+        execucao.status = 'SUCESSO'
+        execucao.imoveis_coletados = novos_imoveis
+        execucao.tempo_execucao = tempo_execucao
+        execucao.tempo_ingestao = tempo_ingestao
+        _registrar_sites(execucao, relatorio_sites)
+        incrementar_versao_dados()
+        db.session.commit()
+
+        contexto.atualizar_progresso(etapa='duplicatas')
+        duplicatas = _agrupar_duplicatas()
+
+        resultado = {
+            'status': 'sucesso',
+            'total_coletados': resultado_ingestao['coletados'],
+            'novos_imoveis': novos_imoveis,
+            'imoveis_atualizados': resultado_ingestao['atualizados'],
+            'imoveis_desativados': resultado_ingestao['desativados'],
+            'duplicatas': duplicatas,
+            'tempo_execucao': tempo_execucao,
+            'sites': relatorio_sites,
+            'http': cliente_http.estatisticas(),
+            'data_execucao': datetime.utcnow().isoformat()
+        }
+        return resultado
+
+    except Exception as e:
+        # Registrar erro e repassar ao worker, que marca o job como ERRO
+        erro_detalhado = traceback.format_exc()
+        print(f"ERRO NA EXECUÇÃO DOS SCRAPERS: {erro_detalhado}")
+
+        db.session.rollback()
+        tempo_execucao = time.time() - inicio
+        execucao.status = 'ERRO'
+        execucao.erro_mensagem = str(e)
+        execucao.tempo_execucao = tempo_execucao
+        execucao.tempo_ingestao = tempo_ingestao
+        if ingestao:
+            # Lotes já commitados continuam gravados
+            execucao.imoveis_coletados = ingestao.contadores['novos']
+        if relatorio_sites:
+            _registrar_sites(execucao, relatorio_sites)
+        incrementar_versao_dados()
+        db.session.commit()
+
+        resultado = {
+            'status': 'erro',
+            'erro': str(e),
+            'tempo_execucao': tempo_execucao,
+            'data_execucao': datetime.utcnow().isoformat()
+        }
+        raise
+
+    finally:
+        canal_eventos.publicar('fim', resultado)
+
+def estado_monitoramento():
+    """Estado do monitoramento lido da tabela jobs (vale para qualquer processo da API)"""
+    with engine_leitura().connect() as conexao:
+        ativo = conexao.execute(
+            select(Job.id, Job.status, Job.progresso)
+            .where(Job.tipo == 'monitoramento', Job.status.in_(STATUS_ATIVOS))
+        ).first()
+        ultimo = conexao.execute(
+            select(Job.id, Job.resultado)
+            .where(Job.tipo == 'monitoramento', Job.status.in_(('SUCESSO', 'ERRO')))
+            .order_by(Job.id.desc()).limit(1)
+        ).first()
+    return {
+        'em_execucao': ativo is not None,
+        'job_id': ativo.id if ativo else None,
+        'status_job': ativo.status if ativo else None,
+        'progresso': json.loads(ativo.progresso) if ativo and ativo.progresso else None,
+        'resultado': json.loads(ultimo.resultado) if ultimo and ultimo.resultado else None
+    }
@@ -0,0 +1,85 @@
+import hashlib
+import re
+import unicodedata
+
+# Números no formato brasileiro: "350.000", "1.500,50", "65,5"
+_NUMERO = re.compile(r'\d[\d.]*(?:,\d+)?')
+
+def _numero_brasileiro(texto):
+    """Extrai o primeiro número de um texto em formato brasileiro"""
+    if texto is None:
+        return None
+    if isinstance(texto, (int, float)):
+        return float(texto)
+    match = _NUMERO.search(str(texto))
+    if not match:
+        return None
+    bruto = match.group(0)
+    inteiro, _, decimal = bruto.partition(',')
+    # Ponto como separador de milhar ("350.000") ou decimal isolado ("65.5")
+    partes = inteiro.split('.')
+    if len(partes) > 1 and all(len(p) == 3 for p in partes[1:]):
+        inteiro = ''.join(partes)
+    elif len(partes) == 2 and not decimal:
+        inteiro, decimal = partes
+    else:
+        inteiro = ''.join(partes)
+    try:
+        return float(f"{inteiro}.{decimal}" if decimal else inteiro)
+    except ValueError:
+        return None
+
+def preco_em_centavos(preco):
+    """'R$ 350.000' -> 35000000; None quando o preço não é informado"""
+    valor = _numero_brasileiro(preco)
+    return int(round(valor * 100)) if valor else None
+
+def area_em_m2(area):
+    """'65m²' -> 65.0"""
+    valor = _numero_brasileiro(area)
+    return valor if valor else None
+
+def inteiro(valor):
+    """'2', '2 quartos' -> 2"""
+    numero = _numero_brasileiro(valor)
+    return int(numero) if numero is not None else None
+
+def campos_numericos(preco, area, quartos, banheiros, vagas):
+    """Valores numéricos derivados dos campos de exibição do imóvel"""
+    centavos = preco_em_centavos(preco)
+    m2 = area_em_m2(area)
+    return {
+        'preco_centavos': centavos,
+        'area_m2': m2,
+        'preco_m2': round(centavos / 100 / m2, 2) if centavos and m2 else None,
+        'quartos_num': inteiro(quartos),
+        'banheiros_num': inteiro(banheiros),
+        'vagas_num': inteiro(vagas)
+    }
+
+def bairro_do_endereco(endereco):
+    """'Efapi, Chapecó, SC' -> 'Efapi' (os scrapers gravam o bairro como primeiro trecho)"""
+    if not endereco:
+        return None
+    return endereco.split(',')[0].strip() or None
+
+def normalizar_texto(texto):
+    """Minúsculas e sem acentos: 'Presidente Médici' -> 'presidente medici'"""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+# Campos que entram no hash de conteúdo do imóvel (textos normalizados + números)
+CAMPOS_HASH_TEXTO = ('titulo', 'tipo_imovel', 'endereco', 'bairro', 'url')
+CAMPOS_HASH_NUMERICOS = ('preco_centavos', 'area_m2', 'quartos_num', 'banheiros_num', 'vagas_num')
+
+def hash_conteudo(valores):
+    """Hash (32 hex) dos campos normalizados: muda só quando o anúncio muda de fato.
+
+    Espaços, caixa e acentos não contam; preço e área entram pelos valores
+    numéricos, então 'R$ 350.000' e 'R$350.000,00' geram o mesmo hash.
+    """
+    partes = [' '.join(normalizar_texto(valores.get(campo)).split()) for campo in CAMPOS_HASH_TEXTO]
+    partes += ['' if valores.get(campo) is None else repr(valores[campo]) for campo in CAMPOS_HASH_NUMERICOS]
+    return hashlib.blake2b('\x1f'.join(partes).encode('utf-8'), digest_size=16).hexdigest()
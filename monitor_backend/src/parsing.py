@@ -0,0 +1,34 @@
+from functools import lru_cache
+from lxml import etree, html
+
+# Camada de parsing compartilhada pelos scrapers. O HTML é parseado pelo
+# lxml (C) e os nós são extraídos com XPath pré-compilado, registrado por
+# site em SELETORES: compilar uma vez e reaproveitar em todas as páginas
+# evita reinterpretar a expressão a cada chamada.
+SELETORES = {
+    'plaza_chapeco': {
+        'links_bairros': "//a[contains(@href, '/bairro-')]",
+    },
+}
+
+@lru_cache(maxsize=None)
+def seletor(site, nome):
+    """XPath compilado (e cacheado) de um seletor registrado em SELETORES"""
+    return etree.XPath(SELETORES[site][nome])
+
+def documento(conteudo):
+    """Árvore lxml de uma página (bytes: o lxml respeita o charset declarado)"""
+    if not conteudo or not conteudo.strip():
+        return None
+    return html.fromstring(conteudo)
+
+def selecionar(conteudo, site, nome):
+    """Nós de uma página (bytes, str ou árvore já parseada) para um seletor do site"""
+    arvore = conteudo if isinstance(conteudo, etree._Element) else documento(conteudo)
+    if arvore is None:
+        return []
+    return seletor(site, nome)(arvore)
+
+def texto(no):
+    """Texto de um nó com os espaços internos colapsados em um só e sem espaços nas pontas"""
+    return ' '.join(no.text_content().split())
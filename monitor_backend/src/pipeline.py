@@ -0,0 +1,185 @@
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import NamedTuple
+from src.incremental import buscar_pagina, registrar_pagina
+from src.metricas import acumular_etapa
+
+logger = logging.getLogger(__name__)
+
+# Pipeline de coleta em duas etapas. O fetch (I/O) roda nas threads dos
+# sites; o HTML bruto de cada página vai para um pool de processos que faz o
+# parse (CPU), fora do GIL do processo web. No máximo PARSE_FILA páginas
+# ficam entre as duas etapas: quando o parse atrasa, o fetch espera
+# (backpressure) em vez de acumular HTML em memória. Os imóveis de cada
+# página voltam para a thread do site assim que ficam prontos.
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', max(1, (os.cpu_count() or 2) - 1)))  # 0 = parse na própria thread
+PARSE_FILA = int(os.environ.get('PARSE_FILA', 0)) or 2 * max(PARSE_WORKERS, 1)
+
+# Imóveis por lote entregue pelos scrapers escritos como geradores
+LOTE_GERADOR = 100
+
+# Os processos de parse não podem nascer de fork do processo web: ele tem
+# threads (sites, worker de jobs, servidor) e um fork copia locks que podem
+# estar presos por elas, travando o filho. O forkserver cria os processos a
+# partir de um servidor limpo (spawn onde não existe, como no Windows).
+_METODO_INICIO = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class Pagina(NamedTuple):
+    """Página de listagem de um site e os parâmetros repassados ao parse"""
+    url: str
+    parametros: dict = {}
+
+
+def _parse_cronometrado(parse, conteudo, status_code, parametros):
+    """Roda no processo de parse: devolve (imóveis, segundos)"""
+    inicio = time.perf_counter()
+    imoveis = parse(conteudo, status_code, **parametros)
+    return imoveis, time.perf_counter() - inicio
+
+
+class EtapaParse:
+    """Pool de processos do parse com fila limitada a `fila` páginas"""
+
+    def __init__(self, workers=None, fila=None):
+        self.workers = PARSE_WORKERS if workers is None else workers
+        self._vagas = threading.BoundedSemaphore(fila or PARSE_FILA)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Criado na primeira página: execuções sem scrapers de páginas não sobem processos
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(_METODO_INICIO)
+                )
+            return self._executor
+
+    def enviar(self, parse, conteudo, status_code, parametros):
+        """Agenda o parse de uma página; bloqueia enquanto a fila estiver cheia"""
+        if self.workers <= 0:
+            futuro = Future()
+            try:
+                futuro.set_result(_parse_cronometrado(parse, conteudo, status_code, parametros))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+
+        self._vagas.acquire()
+        try:
+            futuro = self._pool().submit(_parse_cronometrado, parse, conteudo, status_code, parametros)
+        except Exception:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return futuro
+
+    def fechar(self):
+        # Parses ainda na fila (sites em timeout) são cancelados; só os que já
+        # estão rodando são aguardados, para os processos encerrarem limpos
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+# EtapaParse da execução atual (definida por executar_scrapers em cada thread de site)
+etapa_parse_atual = contextvars.ContextVar('etapa_parse_atual', default=None)
+
+
+class ScraperPaginas:
+    """Scraper dividido em páginas (fetch) e uma função de parse pura.
+
+    parse(conteudo, status_code, **parametros) recebe os bytes da página e
+    devolve a lista de imóveis; precisa ser uma função de módulo (é enviada
+    ao processo de parse) e não pode depender de banco ou de estado global.
+    Chamar o scraper gera os imóveis um a um (uso fora do pipeline);
+    coletar() entrega os imóveis página a página.
+    """
+
+    def __init__(self, nome, paginas, parse):
+        self.nome = nome
+        self.paginas = paginas
+        self.parse = parse
+
+    def __call__(self):
+        for imoveis in self.coletar():
+            yield from imoveis
+
+    def coletar(self):
+        """Gera a lista de imóveis de cada página, na ordem das páginas"""
+        logger.info(f"🔍 Iniciando scraper {self.nome}...")
+        etapa = etapa_parse_atual.get() or EtapaParse(workers=0)
+        pendentes = deque()
+        total = 0
+
+        for pagina in self.paginas:
+            try:
+                logger.info(f"📡 Acessando: {pagina.url}")
+                resultado = buscar_pagina(pagina.url)
+            except Exception as e:
+                logger.error(f"❌ Erro {self.nome} ({pagina.url}): {e}")
+                continue
+            if resultado.inalterada:
+                total += len(resultado.imoveis)
+                yield resultado.imoveis
+                continue
+            response = resultado.response
+            pendentes.append((pagina, etapa.enviar(self.parse, response.content, response.status_code, pagina.parametros)))
+
+            # Entrega o que já foi parseado sem esperar as páginas seguintes
+            while pendentes and pendentes[0][1].done():
+                imoveis = self._concluir(*pendentes.popleft())
+                total += len(imoveis)
+                yield imoveis
+
+        while pendentes:
+            imoveis = self._concluir(*pendentes.popleft())
+            total += len(imoveis)
+            yield imoveis
+
+        logger.info(f"✅ {self.nome} finalizado: {total} imóveis coletados")
+
+    def _concluir(self, pagina, futuro):
+        try:
+            imoveis, segundos = futuro.result()
+        except Exception as e:
+            # Página fica sem checkpoint e conta como falha no relatório do site
+            logger.error(f"❌ Erro no parse {self.nome} ({pagina.url}): {e}")
+            return []
+        acumular_etapa('parse', segundos)
+        registrar_pagina(pagina.url, imoveis)
+        return imoveis
+
+
+def coletar(scraper, tamanho_lote=LOTE_GERADOR):
+    """Imóveis de um scraper em lotes.
+
+    ScraperPaginas entregam um lote por página; scrapers escritos como
+    geradores (yield de cada imóvel) são agrupados em lotes de tamanho_lote;
+    funções que devolvem uma lista entregam tudo de uma vez.
+    """
+    if isinstance(scraper, ScraperPaginas):
+        yield from scraper.coletar()
+        return
+    imoveis = scraper()
+    if isinstance(imoveis, list):
+        yield imoveis
+        return
+    iterador = iter(imoveis)
+    while lote := list(islice(iterador, tamanho_lote)):
+        yield lote
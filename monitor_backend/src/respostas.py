@@ -0,0 +1,106 @@
+import gzip
+import os
+from datetime import date
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider, _default
+from src.cache import cache_respostas
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele o JSON usa o módulo json da biblioteca padrão
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele as respostas são comprimidas só com gzip
+    brotli = None
+
+# Serialização e compressão das respostas da API. O JSON sai pelo orjson
+# (bytes direto, sem passar por str) e as respostas grandes são comprimidas
+# com brotli ou gzip conforme o Accept-Encoding do cliente (as que vêm do
+# cache de respostas guardam o corpo comprimido junto da entrada). Respostas
+# em stream (NDJSON, exportação, SSE) e arquivos estáticos não passam por aqui.
+COMPRESSAO_MINIMO = int(os.environ.get('COMPRESSAO_MINIMO', 1024))  # bytes; menores vão sem compressão
+COMPRESSAO_NIVEL_GZIP = 6
+COMPRESSAO_QUALIDADE_BROTLI = 4  # bem mais rápido que o padrão (11) com tamanho próximo ao gzip 9
+
+TIPOS_COMPRIMIVEIS = ('application/json', 'application/javascript', 'text/')
+
+
+def _padrao(objeto):
+    """Tipos fora do JSON: datas em ISO 8601 (como os to_dict), o resto como no Flask"""
+    if isinstance(objeto, date):
+        return objeto.isoformat()
+    return _default(objeto)
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """Provedor JSON do Flask com orjson (cai para o json padrão se não instalado)"""
+
+    default = staticmethod(_padrao)
+    sort_keys = False  # chaves na ordem em que as views montam os dicionários
+
+    def _orjson(self, obj):
+        opcoes = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=_padrao, option=opcoes)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)  # saída indentada para leitura
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._orjson(obj) + b'\n', mimetype=self.mimetype)
+
+
+def _comprimir(corpo, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(corpo, quality=COMPRESSAO_QUALIDADE_BROTLI)
+    return gzip.compress(corpo, compresslevel=COMPRESSAO_NIVEL_GZIP, mtime=0)
+
+def registrar_compressao(app):
+    """Comprime (brotli ou gzip) as respostas acima de COMPRESSAO_MINIMO bytes"""
+    codificacoes = (['br'] if brotli else []) + ['gzip']
+
+    @app.after_request
+    def comprimir_resposta(resposta):
+        if (resposta.status_code != 200 or resposta.direct_passthrough or resposta.is_streamed
+                or 'Content-Encoding' in resposta.headers
+                or not (resposta.mimetype or '').startswith(TIPOS_COMPRIMIVEIS)):
+            return resposta
+        corpo = resposta.get_data()
+        if len(corpo) < COMPRESSAO_MINIMO:
+            return resposta
+        resposta.vary.add('Accept-Encoding')
+        codificacao = request.accept_encodings.best_match(codificacoes)
+        if codificacao is None:
+            return resposta
+        # Respostas do cache são comprimidas uma vez por versão dos dados
+        entrada = g.get('entrada_cache')
+        if entrada is not None and entrada['corpo'] != corpo:
+            entrada = None
+        comprimido = entrada['comprimidos'].get(codificacao) if entrada else None
+        if comprimido is None:
+            comprimido = _comprimir(corpo, codificacao)
+            if entrada:
+                cache_respostas.guardar_comprimido(entrada, codificacao, comprimido)
+        resposta.set_data(comprimido)
+        resposta.headers['Content-Encoding'] = codificacao
+        # O corpo comprimido é outra representação do mesmo recurso: ETag fraco
+        etag, _ = resposta.get_etag()
+        if etag:
+            resposta.set_etag(etag, weak=True)
+        return resposta
+
+    @app.teardown_request
+    def descartar_entrada_cache(_erro=None):
+        # O app context pode ser reaproveitado pela próxima requisição
+        g.pop('entrada_cache', None)
@@ -1,127 +1,323 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
 from src.database import db
 from src.models.imovel import Imovel, ExecucaoScraper
-from src.scrapers_gerais import executar_todos_scrapers
-import threading
+from src.busca import filtrar_texto
+from src.estatisticas import inicio_do_dia, resumo_estatisticas
+from src.historico import mudancas_preco
+from src.duplicatas import anuncios_duplicados, grupos_duplicatas
+from src.exportacao import FORMATOS, exportar, pacote_ausente
+from src.analise_mercado import DIMENSOES, METRICAS, base_mercado
+from src.facetas import DIMENSOES_FACETA, contar_facetas, linhas_consulta, linhas_registros, linhas_rollup
+from src.cache import resposta_cacheada
+from src.armazem_json import armazem_json
+from src.eventos import canal_eventos, formatar_sse
+from src.jobs import enfileirar_job, despertar_worker
+from src.monitoramento import estado_monitoramento
+import base64
+import queue
 import time
 import traceback
 import json
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
+from sqlalchemy import tuple_
 
 monitor_bp = Blueprint('monitor', __name__)
 
-# Variável global para controlar execução dos scrapers
-scraper_em_execucao = False
-ultimo_resultado = []
+def _execucoes_gerais():
+    """Execuções "Todos os Scrapers" (sem as linhas por site), mais recentes primeiro"""
+    return ExecucaoScraper.query.filter(ExecucaoScraper.execucao_pai_id.is_(None)).order_by(
+        ExecucaoScraper.data_execucao.desc()
+    )
 
 @monitor_bp.route('/executar-monitoramento', methods=['POST'])
 def executar_monitoramento():
-    """Executa todos os scrapers e atualiza o banco de dados"""
-    global scraper_em_execucao, ultimo_resultado
-    
-    if scraper_em_execucao:
+    """Enfileira a execução dos scrapers (um único job ativo entre todos os processos)"""
+    job_id = enfileirar_job('monitoramento')
+    if job_id is None:
         return jsonify({
             'status': 'erro',
             'mensagem': 'Monitoramento já está em execução'
         }), 400
     
-    # Executar scrapers em thread separada
-    app = current_app._get_current_object()  # Obter referência da aplicação atual
-    thread = threading.Thread(target=executar_scrapers_background, args=(app,))
-    thread.daemon = True
-    thread.start()
+    # O worker embutido deste processo pega o job na hora; os demais na próxima verificação
+    despertar_worker()
     
     return jsonify({
         'status': 'sucesso',
-        'mensagem': 'Monitoramento iniciado'
+        'mensagem': 'Monitoramento iniciado',
+        'job_id': job_id
     })
 
 @monitor_bp.route('/status-monitoramento', methods=['GET'])
 def status_monitoramento():
     """Retorna o status atual do monitoramento"""
-    global scraper_em_execucao, ultimo_resultado
-    
     # Buscar última execução no banco
     try:
-        ultima_execucao = ExecucaoScraper.query.order_by(ExecucaoScraper.data_execucao.desc()).first()
+        estado = estado_monitoramento()
+        ultima_execucao = _execucoes_gerais().first()
         
         return jsonify({
-            'em_execucao': scraper_em_execucao,
-            'ultimo_resultado': ultimo_resultado,
+            'em_execucao': estado['em_execucao'],
+            'ultimo_resultado': estado['resultado'] or [],
+            'progresso': estado['progresso'],
+            'job_id': estado['job_id'],
             'ultima_execucao': ultima_execucao.to_dict() if ultima_execucao else None
         })
     except Exception as e:
         return jsonify({
-            'em_execucao': scraper_em_execucao,
-            'ultimo_resultado': ultimo_resultado,
+            'em_execucao': False,
+            'ultimo_resultado': [],
             'ultima_execucao': None,
             'erro': str(e)
         })
 
+# Intervalos (s) do stream SSE: releitura do estado no banco (para jobs
+# executados por outro processo) e comentários de keep-alive
+SSE_INTERVALO_ESTADO = 3
+SSE_KEEP_ALIVE = 15
+
+@monitor_bp.route('/eventos', methods=['GET'])
+def eventos_monitoramento():
+    """Stream SSE com o progresso do monitoramento (substitui o polling do status)"""
+    fila = canal_eventos.assinar()
+
+    def gerar():
+        try:
+            yield 'retry: 3000\n\n'
+            estado = estado_monitoramento()
+            yield formatar_sse('estado', estado)
+            ultimo_envio = time.monotonic()
+            while True:
+                try:
+                    tipo, dados = fila.get(timeout=SSE_INTERVALO_ESTADO)
+                except queue.Empty:
+                    # Sem eventos locais: o job pode estar rodando em outro processo
+                    novo_estado = estado_monitoramento()
+                    if novo_estado != estado:
+                        estado = novo_estado
+                        ultimo_envio = time.monotonic()
+                        yield formatar_sse('estado', estado)
+                    elif time.monotonic() - ultimo_envio >= SSE_KEEP_ALIVE:
+                        # Mantém proxies e o navegador com a conexão aberta
+                        ultimo_envio = time.monotonic()
+                        yield ': keep-alive\n\n'
+                    continue
+                ultimo_envio = time.monotonic()
+                yield formatar_sse(tipo, dados)
+        finally:
+            canal_eventos.cancelar(fila)
+
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Filtros numéricos por faixa: parâmetro -> (coluna, operador, conversão do valor)
+FILTROS_FAIXA = {
+    'preco_min': (Imovel.preco_centavos, '>=', lambda v: int(round(float(v) * 100))),
+    'preco_max': (Imovel.preco_centavos, '<=', lambda v: int(round(float(v) * 100))),
+    'area_min': (Imovel.area_m2, '>=', float),
+    'area_max': (Imovel.area_m2, '<=', float),
+    'preco_m2_min': (Imovel.preco_m2, '>=', float),
+    'preco_m2_max': (Imovel.preco_m2, '<=', float),
+    'quartos_min': (Imovel.quartos_num, '>=', int),
+    'banheiros_min': (Imovel.banheiros_num, '>=', int),
+    'vagas_min': (Imovel.vagas_num, '>=', int),
+}
+
+# Tamanho de página da listagem (?limite=)
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+# Ordenações aceitas em ?ordenar= (todas atendidas por índices compostos)
+ORDENACOES = {
+    'data_coleta': Imovel.data_coleta,
+    'preco': Imovel.preco_centavos,
+    'area': Imovel.area_m2,
+    'preco_m2': Imovel.preco_m2,
+    'quartos': Imovel.quartos_num,
+}
+
+# Valores de ?tipo_negocio= aceitos pelos filtros -> valor gravado
+TIPOS_NEGOCIO = {'Locação': 'LOCAÇÃO', 'Vendas': 'VENDA'}
+
+def _apenas_novos(args):
+    return args.get('apenas_novos', 'false').lower() == 'true'
+
+def aplicar_filtros(query, args):
+    """Aplica à query os filtros da listagem a partir dos parâmetros da requisição"""
+    tipo_negocio = args.get('tipo_negocio')
+    tipo_imovel = args.get('tipo_imovel')
+    bairro = args.get('bairro')
+    imobiliaria = args.get('imobiliaria')
+    apenas_novos = _apenas_novos(args)
+    
+    query = query.filter(Imovel.ativo == True)
+    
+    if tipo_negocio in TIPOS_NEGOCIO:
+        query = query.filter(Imovel.tipo_negocio == TIPOS_NEGOCIO[tipo_negocio])
+    
+    # Filtros textuais pelo índice de texto completo (insensível a acentos):
+    # (texto, colunas, prefixo, frase)
+    condicoes_texto = []
+    if tipo_imovel and tipo_imovel != 'Todos':
+        condicoes_texto.append((tipo_imovel, ['tipo_imovel'], True, False))
+    if bairro and bairro != 'Todos':
+        condicoes_texto.append((bairro, ['bairro'], False, True))
+    if args.get('q'):
+        condicoes_texto.append((args.get('q'), None, True, False))
+    query = filtrar_texto(query, condicoes_texto)
+    
+    if imobiliaria and imobiliaria != 'Todas':
+        query = query.filter(Imovel.imobiliaria == imobiliaria)
+    
+    # Filtro para imóveis novos (coletados hoje, dia UTC: a data entra na chave do cache)
+    if apenas_novos:
+        query = query.filter(Imovel.data_coleta >= inicio_do_dia())
+    
+    for coluna, operador, valor in faixas_filtro(args):
+        query = query.filter(coluna >= valor if operador == '>=' else coluna <= valor)
+    
+    return query
+
+def faixas_filtro(args):
+    """Valida os filtros por faixa: [(coluna, operador, valor convertido)]"""
+    faixas = []
+    for parametro, (coluna, operador, converter) in FILTROS_FAIXA.items():
+        valor = args.get(parametro)
+        if valor in (None, ''):
+            continue
+        try:
+            faixas.append((coluna, operador, converter(valor.replace(',', '.'))))
+        except ValueError:
+            raise ValueError(f"Parâmetro inválido: {parametro}={args.get(parametro)}")
+    return faixas
+
+def _ordenacao(args):
+    """Valida ?ordenar= (padrão data_coleta) e ?ordem=asc|desc (padrão desc)"""
+    ordenar = args.get('ordenar', 'data_coleta')
+    ordem = args.get('ordem', 'desc').lower()
+    if ordenar not in ORDENACOES:
+        raise ValueError(f"Ordenação inválida: {ordenar}. Use uma de: {', '.join(ORDENACOES)}")
+    if ordem not in ('asc', 'desc'):
+        raise ValueError(f"Ordem inválida: {ordem}. Use asc ou desc")
+    return ordenar, ordem
+
+def codificar_cursor(imovel, args):
+    """Cursor opaco com a chave de ordenação do último imóvel da página (objeto ou linha)"""
+    ordenar, ordem = _ordenacao(args)
+    valor = getattr(imovel, ORDENACOES[ordenar].key)
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    bruto = json.dumps([ordenar, ordem, valor, imovel.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+def _decodificar_cursor(cursor, ordenar, ordem):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        ordenar_cursor, ordem_cursor, valor, ultimo_id = json.loads(bruto)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if (ordenar_cursor, ordem_cursor) != (ordenar, ordem):
+        raise ValueError("Cursor gerado para outra ordenação")
+    if ordenar == 'data_coleta' and valor is not None:
+        valor = datetime.fromisoformat(valor)
+    return valor, ultimo_id
+
+def aplicar_ordenacao(query, args):
+    """Ordena pela chave (coluna, id) e, com ?cursor=, continua após a página anterior.
+    
+    A paginação é por keyset: a próxima página é lida a partir da última
+    chave vista usando o mesmo índice da ordenação, sem OFFSET. Ao ordenar
+    por um campo numérico, imóveis sem esse valor ficam de fora.
+    """
+    ordenar, ordem = _ordenacao(args)
+    coluna = ORDENACOES[ordenar]
+    if ordenar != 'data_coleta':
+        query = query.filter(coluna.isnot(None))
+    
+    cursor = args.get('cursor')
+    if cursor:
+        valor, ultimo_id = _decodificar_cursor(cursor, ordenar, ordem)
+        chave = tuple_(coluna, Imovel.id)
+        query = query.filter(chave > (valor, ultimo_id) if ordem == 'asc' else chave < (valor, ultimo_id))
+    
+    if ordem == 'asc':
+        return query.order_by(coluna.asc(), Imovel.id.asc())
+    return query.order_by(coluna.desc(), Imovel.id.desc())
+
+def _limite(args):
+    try:
+        limite = int(args.get('limite', LIMITE_PADRAO))
+    except ValueError:
+        raise ValueError(f"Parâmetro inválido: limite={args.get('limite')}")
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+def _data_parametro(args, nome, padrao):
+    """Lê um parâmetro de data ISO 8601 (ex.: 2025-07-01 ou 2025-07-01T08:00)"""
+    valor = args.get(nome)
+    if not valor:
+        return padrao
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Parâmetro inválido: {nome}={valor}")
+
+def _inteiro_parametro(args, nome):
+    valor = args.get(nome)
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"Parâmetro inválido: {nome}={valor}")
+
+# Colunas da listagem, na ordem de Imovel.to_dict()
+COLUNAS_LISTAGEM = [getattr(Imovel, campo) for campo in Imovel.CAMPOS_DICT]
+
+def _dicionarios(linhas):
+    """Tuplas de COLUNAS_LISTAGEM -> dicionários no formato de to_dict()"""
+    campos = Imovel.CAMPOS_DICT
+    return [dict(zip(campos, linha)) for linha in linhas]
+
+def _stream_ndjson(query):
+    """Gera uma linha JSON por imóvel lendo o resultado em blocos (memória constante)"""
+    provedor = current_app.json
+    consulta = query.with_entities(*COLUNAS_LISTAGEM).statement
+    for linhas in db.session.execute(consulta, execution_options={'yield_per': 1000}).partitions():
+        yield ''.join(provedor.dumps(imovel) + '\n' for imovel in _dicionarios(linhas))
+
 @monitor_bp.route('/imoveis', methods=['GET'])
+@resposta_cacheada(por_dia=_apenas_novos)
 def listar_imoveis():
     """Lista imóveis com filtros opcionais"""
     try:
-        # Parâmetros de filtro
-        tipo_negocio = request.args.get('tipo_negocio')
-        tipo_imovel = request.args.get('tipo_imovel')
-        bairro = request.args.get('bairro')
-        imobiliaria = request.args.get('imobiliaria')
-        apenas_novos = request.args.get('apenas_novos', 'false').lower() == 'true'
-        
         # SOLUÇÃO ALTERNATIVA: Carregar imóveis do arquivo JSON se o banco estiver vazio
-        imoveis_do_banco = Imovel.query.filter(Imovel.ativo == True).count()
+        # (basta saber se existe algum ativo: evita um COUNT sobre a tabela inteira)
+        banco_vazio = db.session.query(Imovel.id).filter(Imovel.ativo == True).first() is None
         
-        if imoveis_do_banco == 0:
-            # Tentar carregar do arquivo JSON
+        if banco_vazio:
+            # Os dados do arquivo não seguem a versão do banco: não cachear
+            g.sem_cache = True
+            
             try:
-                with open('imoveis_coletados.json', 'r', encoding='utf-8') as f:
-                    imoveis_json = json.load(f)
-                
-                # Filtrar imóveis do JSON conforme os parâmetros
-                imoveis_filtrados = []
-                
-                for imovel in imoveis_json:
-                    # Aplicar filtros
-                    incluir = True
-                    
-                    if tipo_negocio and tipo_negocio != 'Todos':
-                        if tipo_negocio == 'Locação' and imovel.get('tipo_negocio') != 'LOCAÇÃO':
-                            incluir = False
-                        elif tipo_negocio == 'Vendas' and imovel.get('tipo_negocio') != 'VENDA':
-                            incluir = False
-                    
-                    if incluir and tipo_imovel and tipo_imovel != 'Todos':
-                        if not imovel.get('tipo_imovel') or tipo_imovel.lower() not in imovel.get('tipo_imovel', '').lower():
-                            incluir = False
-                    
-                    if incluir and bairro and bairro != 'Todos':
-                        if not imovel.get('endereco') or bairro.lower() not in imovel.get('endereco', '').lower():
-                            incluir = False
-                    
-                    if incluir and imobiliaria and imobiliaria != 'Todas':
-                        if imovel.get('imobiliaria') != imobiliaria:
-                            incluir = False
-                    
-                    # Adicionar à lista filtrada
-                    if incluir:
-                        # Adicionar campos necessários para compatibilidade
-                        imovel['id'] = imovel.get('codigo', '0')
-                        imovel['data_coleta'] = datetime.utcnow().isoformat()
-                        imovel['ativo'] = True
-                        imoveis_filtrados.append(imovel)
-                
-                # Ordenar por data (mais recentes primeiro)
-                imoveis_filtrados.sort(key=lambda x: x.get('data_coleta', ''), reverse=True)
-                
-                # Limitar a 50 resultados
-                imoveis_filtrados = imoveis_filtrados[:50]
+                ordenar, ordem = _ordenacao(request.args)
+                faixas = [(coluna.key, operador, valor) for coluna, operador, valor in faixas_filtro(request.args)]
+                limite = _limite(request.args)
+            except ValueError as e:
+                return jsonify({'status': 'erro', 'mensagem': str(e)}), 400
+            
+            # Armazém em memória do arquivo (recarregado só quando o arquivo muda)
+            try:
+                imoveis_filtrados = armazem_json.buscar(
+                    request.args, faixas, ORDENACOES[ordenar].key, ordem, limite
+                )
                 
                 return jsonify({
                     'status': 'sucesso',
                     'total': len(imoveis_filtrados),
                     'imoveis': imoveis_filtrados,
+                    'next_cursor': None,
                     'fonte': 'json'  # Indicar que veio do JSON
                 })
                 
@@ -135,37 +331,28 @@ def listar_imoveis():
                 })
         
         # FLUXO NORMAL: Buscar do banco de dados
-        # Query base
-        query = Imovel.query.filter(Imovel.ativo == True)
-        
-        # Aplicar filtros
-        if tipo_negocio and tipo_negocio != 'Todos':
-            if tipo_negocio == 'Locação':
-                query = query.filter(Imovel.tipo_negocio == 'LOCAÇÃO')
-            elif tipo_negocio == 'Vendas':
-                query = query.filter(Imovel.tipo_negocio == 'VENDA')
-        
-        if tipo_imovel and tipo_imovel != 'Todos':
-            query = query.filter(Imovel.tipo_imovel.ilike(f'%{tipo_imovel}%'))
-        
-        if bairro and bairro != 'Todos':
-            query = query.filter(Imovel.endereco.ilike(f'%{bairro}%'))
-        
-        if imobiliaria and imobiliaria != 'Todas':
-            query = query.filter(Imovel.imobiliaria == imobiliaria)
+        try:
+            query = aplicar_filtros(Imovel.query, request.args)
+            query = aplicar_ordenacao(query, request.args)
+            limite = _limite(request.args)
+        except ValueError as e:
+            return jsonify({'status': 'erro', 'mensagem': str(e)}), 400
         
-        # Filtro para imóveis novos (últimas 24 horas)
-        if apenas_novos:
-            ontem = datetime.utcnow() - timedelta(days=1)
-            query = query.filter(Imovel.data_coleta >= ontem)
+        # Exportação completa em NDJSON, sem limite de página
+        if request.args.get('format') == 'ndjson':
+            return Response(stream_with_context(_stream_ndjson(query)), mimetype='application/x-ndjson')
         
-        # Ordenar por data de coleta (mais recentes primeiro)
-        imoveis = query.order_by(Imovel.data_coleta.desc()).limit(50).all()
+        # Busca uma linha a mais para saber se existe próxima página; só as
+        # colunas da resposta, como tuplas (sem objetos Imovel nem to_dict)
+        linhas = query.with_entities(*COLUNAS_LISTAGEM).limit(limite + 1).all()
+        proxima_pagina = len(linhas) > limite
+        linhas = linhas[:limite]
         
         return jsonify({
             'status': 'sucesso',
-            'total': len(imoveis),
-            'imoveis': [imovel.to_dict() for imovel in imoveis],
+            'total': len(linhas),
+            'imoveis': _dicionarios(linhas),
+            'next_cursor': codificar_cursor(linhas[-1], request.args) if proxima_pagina else None,
             'fonte': 'banco'  # Indicar que veio do banco
         })
         
@@ -180,39 +367,113 @@ def listar_imoveis():
             'erro_detalhado': erro_detalhado
         }), 500
 
+@monitor_bp.route('/exportar', methods=['GET'])
+def exportar_imoveis():
+    """Exporta todos os imóveis filtrados (?formato=csv|xlsx|parquet, mesmos filtros de /imoveis)"""
+    try:
+        formato = request.args.get('formato', 'csv').lower()
+        if formato not in FORMATOS:
+            return jsonify({
+                'status': 'erro',
+                'mensagem': f"Formato inválido: {formato}. Use um de: {', '.join(FORMATOS)}"
+            }), 400
+        pacote = pacote_ausente(formato)
+        if pacote:
+            return jsonify({
+                'status': 'erro',
+                'mensagem': f"Exportação em {formato} indisponível: instale o pacote {pacote}"
+            }), 501
+        
+        try:
+            query = aplicar_filtros(Imovel.query, request.args)
+            query = aplicar_ordenacao(query, request.args)
+        except ValueError as e:
+            return jsonify({'status': 'erro', 'mensagem': str(e)}), 400
+        
+        _, extensao, mimetype = FORMATOS[formato]
+        nome = f"imoveis_{datetime.utcnow():%Y%m%d_%H%M}.{extensao}"
+        # CSV vai comprimido em gzip para quem aceita (o navegador descompacta ao salvar)
+        comprimir = formato == 'csv' and request.accept_encodings['gzip'] > 0
+        
+        resposta = Response(stream_with_context(exportar(query, formato, comprimir)), mimetype=mimetype)
+        resposta.headers['Content-Disposition'] = f'attachment; filename="{nome}"'
+        if formato == 'csv':
+            resposta.headers['Vary'] = 'Accept-Encoding'
+            if comprimir:
+                resposta.headers['Content-Encoding'] = 'gzip'
+        return resposta
+    except Exception as e:
+        return jsonify({
+            'status': 'erro',
+            'mensagem': f"Erro ao exportar imóveis: {str(e)}"
+        }), 500
+
+@monitor_bp.route('/facetas', methods=['GET'])
+@resposta_cacheada(por_dia=_apenas_novos)
+def facetas():
+    """Valores de tipo_negocio, tipo_imovel, bairro e imobiliaria com a contagem para o filtro atual"""
+    try:
+        # Os demais filtros da listagem valem para todas as facetas
+        outros_filtros = {k: v for k, v in request.args.items() if k not in DIMENSOES_FACETA}
+        filtros = {}
+        for dimensao in DIMENSOES_FACETA:
+            valor = request.args.get(dimensao)
+            if valor and valor not in ('Todos', 'Todas'):
+                filtros[dimensao] = TIPOS_NEGOCIO.get(valor, valor) if dimensao == 'tipo_negocio' else valor
+        
+        try:
+            faixas = faixas_filtro(request.args)
+        except ValueError as e:
+            return jsonify({'status': 'erro', 'mensagem': str(e)}), 400
+        apenas_novos = _apenas_novos(request.args)
+        
+        banco_vazio = db.session.query(Imovel.id).filter(Imovel.ativo == True).first() is None
+        if banco_vazio:
+            # Mesma contingência de /imoveis: contar os imóveis do arquivo JSON
+            g.sem_cache = True
+            try:
+                faixas_json = [(coluna.key, operador, valor) for coluna, operador, valor in faixas]
+                linhas = linhas_registros(armazem_json.buscar(outros_filtros, faixas_json, limite=None))
+            except (FileNotFoundError, json.JSONDecodeError):
+                linhas = []
+        elif request.args.get('q') or apenas_novos or faixas:
+            # Filtros que os rollups não cobrem: um GROUP BY sobre os imóveis filtrados
+            linhas = linhas_consulta(aplicar_filtros(Imovel.query, outros_filtros))
+        else:
+            linhas = linhas_rollup()
+        
+        contagens, total = contar_facetas(linhas, filtros)
+        rotulos_negocio = {gravado: valor for valor, gravado in TIPOS_NEGOCIO.items()}
+        for opcao in contagens['tipo_negocio']:
+            opcao['valor'] = rotulos_negocio.get(opcao['valor'], opcao['valor'])
+        
+        return jsonify({
+            'status': 'sucesso',
+            'total': total,
+            'facetas': contagens
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'erro',
+            'mensagem': f"Erro ao carregar facetas: {str(e)}"
+        }), 500
+
 @monitor_bp.route('/estatisticas', methods=['GET'])
+@resposta_cacheada(por_dia=True)  # novos_hoje
 def estatisticas():
     """Retorna estatísticas do sistema"""
     try:
-        # Total de imóveis ativos
-        total_imoveis = Imovel.query.filter(Imovel.ativo == True).count()
-        
-        # Imóveis por tipo de negócio
-        locacao = Imovel.query.filter(and_(Imovel.ativo == True, Imovel.tipo_negocio == 'LOCAÇÃO')).count()
-        venda = Imovel.query.filter(and_(Imovel.ativo == True, Imovel.tipo_negocio == 'VENDA')).count()
+        # Contagens lidas dos rollups mantidos pela ingestão
+        resumo = resumo_estatisticas()
         
-        # Imóveis por imobiliária
-        imobiliarias = db.session.query(
-            Imovel.imobiliaria,
-            db.func.count(Imovel.id).label('total')
-        ).filter(Imovel.ativo == True).group_by(Imovel.imobiliaria).all()
-        
-        # Imóveis novos (últimas 24 horas)
-        ontem = datetime.utcnow() - timedelta(days=1)
-        novos_hoje = Imovel.query.filter(and_(
-            Imovel.ativo == True,
-            Imovel.data_coleta >= ontem
-        )).count()
+        # Anúncios do mesmo imóvel em outra imobiliária contam uma vez
+        resumo['imoveis_unicos'] = resumo['total_imoveis'] - anuncios_duplicados()
         
         # Última execução
-        ultima_execucao = ExecucaoScraper.query.order_by(ExecucaoScraper.data_execucao.desc()).first()
+        ultima_execucao = _execucoes_gerais().first()
         
         return jsonify({
-            'total_imoveis': total_imoveis,
-            'locacao': locacao,
-            'venda': venda,
-            'novos_hoje': novos_hoje,
-            'por_imobiliaria': [{'nome': nome, 'total': total} for nome, total in imobiliarias],
+            **resumo,
             'ultima_execucao': ultima_execucao.to_dict() if ultima_execucao else None
         })
     except Exception as e:
@@ -221,96 +482,138 @@ def estatisticas():
             'mensagem': f"Erro ao carregar estatísticas: {str(e)}"
         }), 500
 
-@monitor_bp.route('/historico-execucoes', methods=['GET'])
-def historico_execucoes():
-    """Retorna histórico das execuções dos scrapers"""
+@monitor_bp.route('/analise-mercado', methods=['GET'])
+@resposta_cacheada
+def analise_mercado():
+    """Percentis, média e contagem de ?metrica= (preco_m2, preco, area) por grupo.
+    
+    ?agrupar= lista as dimensões separadas por vírgula (padrão: bairro);
+    tipo_negocio, bairro, tipo_imovel, quartos e imobiliaria filtram os imóveis.
+    """
     try:
-        execucoes = ExecucaoScraper.query.order_by(ExecucaoScraper.data_execucao.desc()).limit(20).all()
+        agrupar = [d.strip() for d in request.args.get('agrupar', 'bairro').split(',') if d.strip()]
+        metrica = request.args.get('metrica', 'preco_m2')
+        invalidas = [d for d in agrupar if d not in DIMENSOES]
+        if invalidas:
+            return jsonify({
+                'status': 'erro',
+                'mensagem': f"Dimensão inválida: {', '.join(invalidas)}. Use: {', '.join(DIMENSOES)}"
+            }), 400
+        if metrica not in METRICAS:
+            return jsonify({
+                'status': 'erro',
+                'mensagem': f"Métrica inválida: {metrica}. Use uma de: {', '.join(METRICAS)}"
+            }), 400
+        
+        filtros = {}
+        for dimensao in DIMENSOES:
+            valor = request.args.get(dimensao)
+            if valor and valor not in ('Todos', 'Todas'):
+                filtros[dimensao] = TIPOS_NEGOCIO.get(valor, valor) if dimensao == 'tipo_negocio' else valor
+        try:
+            if 'quartos' in filtros:
+                filtros['quartos'] = _inteiro_parametro(request.args, 'quartos')
+            minimo = _inteiro_parametro(request.args, 'minimo') or 1
+        except ValueError as e:
+            return jsonify({'status': 'erro', 'mensagem': str(e)}), 400
+        
+        base = base_mercado()
+        grupos = base.analisar(agrupar, filtros, metrica, minimo)
         
         return jsonify({
-            'execucoes': [execucao.to_dict() for execucao in execucoes]
+            'status': 'sucesso',
+            'metrica': metrica,
+            'imoveis_considerados': sum(g['quantidade'] for g in grupos),
+            'total': len(grupos),
+            'grupos': grupos
         })
     except Exception as e:
         return jsonify({
             'status': 'erro',
-            'mensagem': f"Erro ao carregar histórico: {str(e)}"
+            'mensagem': f"Erro ao calcular análise de mercado: {str(e)}"
         }), 500
 
-def executar_scrapers_background(app):
-    """Executa os scrapers em background e salva no banco"""
-    global scraper_em_execucao, ultimo_resultado
-    
-    # Usar contexto da aplicação para acessar o banco de dados
-    with app.app_context():
-        scraper_em_execucao = True
-        inicio = time.time()
+@monitor_bp.route('/mudancas-preco', methods=['GET'])
+@resposta_cacheada(por_dia=lambda args: not args.get('desde'))  # padrão relativo a hoje
+def listar_mudancas_preco():
+    """Imóveis cujo preço mudou desde ?desde= (ISO 8601, padrão: últimos 7 dias)"""
+    try:
+        try:
+            desde = _data_parametro(request.args, 'desde', datetime.utcnow() - timedelta(days=7))
+            limite = _limite(request.args)
+        except ValueError as e:
+            return jsonify({'status': 'erro', 'mensagem': str(e)}), 400
         
+        imobiliaria = request.args.get('imobiliaria')
+        mudancas = mudancas_preco(
+            desde,
+            imobiliaria=imobiliaria if imobiliaria != 'Todas' else None,
+            tipo_negocio=TIPOS_NEGOCIO.get(request.args.get('tipo_negocio')),
+            limite=limite
+        )
+        
+        return jsonify({
+            'status': 'sucesso',
+            'desde': desde.isoformat(),
+            'total': len(mudancas),
+            'mudancas': mudancas
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'erro',
+            'mensagem': f"Erro ao carregar mudanças de preço: {str(e)}"
+        }), 500
+
+@monitor_bp.route('/duplicatas', methods=['GET'])
+@resposta_cacheada
+def listar_duplicatas():
+    """Imóveis anunciados por mais de uma imobiliária (?imobiliaria=, ?apos=<grupo_id>)"""
+    try:
         try:
-            # Registrar início da execução
-            execucao = ExecucaoScraper(
-                scraper_nome='Todos os Scrapers',
-                status='EM_ANDAMENTO'
-            )
-            db.session.add(execucao)
-            db.session.commit()
-            
-            # Executar scrapers
-            imoveis_coletados = executar_todos_scrapers()
-            
-            # Salvar imóveis no banco
-            novos_imoveis = 0
-            for imovel_data in imoveis_coletados:
-                try:
-                    # Verificar se já existe
-                    existe = Imovel.query.filter(and_(
-                        Imovel.imobiliaria == imovel_data.get('imobiliaria'),
-                        Imovel.codigo == imovel_data.get('codigo'),
-                        Imovel.tipo_negocio == imovel_data.get('tipo_negocio')
-                    )).first()
-                    
-                    if not existe:
-                        novo_imovel = Imovel.from_scraper_data(imovel_data)
-                        db.session.add(novo_imovel)
-                        novos_imoveis += 1
-                except Exception as e:
-                    print(f"Erro ao processar imóvel: {str(e)}")
-                    continue
-            
-            db.session.commit()
-            
-            # Atualizar execução com sucesso
-            tempo_execucao = time.time() - inicio
-            execucao.status = 'SUCESSO'
-            execucao.imoveis_coletados = novos_imoveis
-            execucao.tempo_execucao = tempo_execucao
-            db.session.commit()
-            
-            ultimo_resultado = {
-                'status': 'sucesso',
-                'total_coletados': len(imoveis_coletados),
-                'novos_imoveis': novos_imoveis,
-                'tempo_execucao': tempo_execucao,
-                'data_execucao': datetime.utcnow().isoformat()
-            }
-            
-        except Exception as e:
-            # Registrar erro
-            erro_detalhado = traceback.format_exc()
-            print(f"ERRO NA EXECUÇÃO DOS SCRAPERS: {erro_detalhado}")
-            
-            tempo_execucao = time.time() - inicio
-            execucao.status = 'ERRO'
-            execucao.erro_mensagem = str(e)
-            execucao.tempo_execucao = tempo_execucao
-            db.session.commit()
-            
-            ultimo_resultado = {
-                'status': 'erro',
-                'erro': str(e),
-                'tempo_execucao': tempo_execucao,
-                'data_execucao': datetime.utcnow().isoformat()
-            }
+            limite = _limite(request.args)
+            apos = _inteiro_parametro(request.args, 'apos')
+        except ValueError as e:
+            return jsonify({'status': 'erro', 'mensagem': str(e)}), 400
         
-        finally:
-            scraper_em_execucao = False
+        imobiliaria = request.args.get('imobiliaria')
+        grupos = grupos_duplicatas(
+            imobiliaria=imobiliaria if imobiliaria != 'Todas' else None,
+            apos=apos,
+            limite=limite
+        )
+        
+        return jsonify({
+            'status': 'sucesso',
+            'total': len(grupos),
+            'grupos': grupos,
+            'proximo': grupos[-1]['grupo_id'] if len(grupos) == limite else None
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'erro',
+            'mensagem': f"Erro ao carregar duplicatas: {str(e)}"
+        }), 500
 
+@monitor_bp.route('/historico-execucoes', methods=['GET'])
+@resposta_cacheada
+def historico_execucoes():
+    """Retorna histórico das execuções dos scrapers"""
+    try:
+        execucoes = _execucoes_gerais().limit(20).all()
+        
+        # Linhas por site de cada execução listada, em uma consulta
+        sites = {}
+        filhas = ExecucaoScraper.query.filter(
+            ExecucaoScraper.execucao_pai_id.in_([execucao.id for execucao in execucoes])
+        ).order_by(ExecucaoScraper.id)
+        for filha in filhas:
+            sites.setdefault(filha.execucao_pai_id, []).append(filha.to_dict())
+        
+        return jsonify({
+            'execucoes': [{**execucao.to_dict(), 'sites': sites.get(execucao.id, [])} for execucao in execucoes]
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'erro',
+            'mensagem': f"Erro ao carregar histórico: {str(e)}"
+        }), 500
@@ -1,8 +1,15 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
+import os
+import queue
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from src.incremental import coleta_atual
+from src.pipeline import Pagina, ScraperPaginas, EtapaParse, etapa_parse_atual, coletar
+from src.parsing import selecionar, texto
+from src import metricas
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -90,171 +97,136 @@ def gerar_url_santa_maria(codigo, titulo, tipo_negocio):
         # Fallback
         return f"https://santamaria.com.br/imovel/apartamento-{codigo}-smi"
 
-def scraper_plaza_chapeco():
-    """Scraper para Plaza Chapecó com URLs corrigidas"""
-    logger.info("🔍 Iniciando scraper Plaza Chapecó...")
+def parse_plaza_chapeco(conteudo, status_code, tipo_negocio):
+    """Parse de uma página de listagem do Plaza Chapecó"""
     imoveis = []
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
+    if status_code != 200:
+        logger.warning(f"⚠️ Plaza Chapecó ({tipo_negocio}): Status {status_code}")
+        return imoveis
+    
+    # Encontrar links de bairros (XPath pré-compilado sobre a árvore lxml)
+    links_bairros = selecionar(conteudo, 'plaza_chapeco', 'links_bairros')
+    logger.info(f"✅ Plaza Chapecó ({tipo_negocio}): {len(links_bairros)} bairros encontrados")
     
-    urls_base = [
-        ('https://plazachapeco.com.br/alugar-imoveis-chapeco-sc/', 'LOCAÇÃO'),
-        ('https://plazachapeco.com.br/comprar-imoveis-chapeco-sc/', 'VENDA')
-    ]
+    # Gerar imóveis baseados nos bairros encontrados
+    codigo_base = 14000 if tipo_negocio == 'LOCAÇÃO' else 13000
     
-    for url_base, tipo_negocio in urls_base:
+    for i, link in enumerate(links_bairros[:15]):  # Limitar a 15 bairros
         try:
-            logger.info(f"📡 Acessando: {url_base}")
-            response = requests.get(url_base, headers=headers, timeout=10)
+            href = link.get('href', '')
+            texto_link = texto(link)
+            
+            # Extrair nome do bairro
+            bairro_match = re.search(r'bairro-([^-]+)', href)
+            bairro = bairro_match.group(1).replace('%C3%A1', 'á').replace('%C3%A9', 'é') if bairro_match else 'Centro'
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+            # Gerar múltiplos imóveis por bairro
+            for j in range(3):  # 3 imóveis por bairro
+                codigo = str(codigo_base + (i * 10) + j)
+                
+                # Variar tipos de imóveis
+                tipos = ['Apartamento', 'Casa', 'Comercial']
+                tipo_imovel = tipos[j % len(tipos)]
+                
+                # Gerar dados realistas
+                quartos = [1, 2, 3][j % 3]
+                area = [45, 65, 85][j % 3]
+                preco_base = 1500 if tipo_negocio == 'LOCAÇÃO' else 350000
+                preco = preco_base + (i * 100) + (j * 50)
                 
-                # Encontrar links de bairros
-                links_bairros = soup.select('a[href*="/bairro-"]')
-                logger.info(f"✅ Plaza Chapecó ({tipo_negocio}): {len(links_bairros)} bairros encontrados")
+                titulo = f"{tipo_imovel} para {'alugar' if tipo_negocio == 'LOCAÇÃO' else 'venda'} com {quartos} quartos, {area}m² no {bairro} em Chapecó"
                 
-                # Gerar imóveis baseados nos bairros encontrados
-                codigo_base = 14000 if tipo_negocio == 'LOCAÇÃO' else 13000
+                # Gerar URL correta
+                url_imovel = gerar_url_plaza_chapeco(codigo, titulo, tipo_negocio)
                 
-                for i, link in enumerate(links_bairros[:15]):  # Limitar a 15 bairros
-                    try:
-                        href = link.get('href', '')
-                        texto_link = link.get_text(strip=True)
-                        
-                        # Extrair nome do bairro
-                        bairro_match = re.search(r'bairro-([^-]+)', href)
-                        bairro = bairro_match.group(1).replace('%C3%A1', 'á').replace('%C3%A9', 'é') if bairro_match else 'Centro'
-                        
-                        # Gerar múltiplos imóveis por bairro
-                        for j in range(3):  # 3 imóveis por bairro
-                            codigo = str(codigo_base + (i * 10) + j)
-                            
-                            # Variar tipos de imóveis
-                            tipos = ['Apartamento', 'Casa', 'Comercial']
-                            tipo_imovel = tipos[j % len(tipos)]
-                            
-                            # Gerar dados realistas
-                            quartos = [1, 2, 3][j % 3]
-                            area = [45, 65, 85][j % 3]
-                            preco_base = 1500 if tipo_negocio == 'LOCAÇÃO' else 350000
-                            preco = preco_base + (i * 100) + (j * 50)
-                            
-                            titulo = f"{tipo_imovel} para {'alugar' if tipo_negocio == 'LOCAÇÃO' else 'venda'} com {quartos} quartos, {area}m² no {bairro} em Chapecó"
-                            
-                            # Gerar URL correta
-                            url_imovel = gerar_url_plaza_chapeco(codigo, titulo, tipo_negocio)
-                            
-                            imovel = {
-                                'imobiliaria': 'Plaza Chapecó',
-                                'codigo': codigo,
-                                'titulo': titulo,
-                                'tipo_imovel': tipo_imovel,
-                                'preco': f"R$ {preco:,.0f}".replace(',', '.'),
-                                'area': f"{area}m²",
-                                'quartos': str(quartos),
-                                'banheiros': str(min(quartos, 2)),
-                                'vagas': '1',
-                                'endereco': f"{bairro}, Chapecó, SC",
-                                'bairro': bairro,
-                                'tipo_negocio': tipo_negocio,
-                                'url': url_imovel
-                            }
-                            
-                            imoveis.append(imovel)
-                            
-                    except Exception as e:
-                        logger.warning(f"Erro ao processar bairro {i}: {e}")
-                        continue
-                        
-            else:
-                logger.warning(f"⚠️ Plaza Chapecó ({tipo_negocio}): Status {response.status_code}")
+                imovel = {
+                    'imobiliaria': 'Plaza Chapecó',
+                    'codigo': codigo,
+                    'titulo': titulo,
+                    'tipo_imovel': tipo_imovel,
+                    'preco': f"R$ {preco:,.0f}".replace(',', '.'),
+                    'area': f"{area}m²",
+                    'quartos': str(quartos),
+                    'banheiros': str(min(quartos, 2)),
+                    'vagas': '1',
+                    'endereco': f"{bairro}, Chapecó, SC",
+                    'bairro': bairro,
+                    'tipo_negocio': tipo_negocio,
+                    'url': url_imovel
+                }
+                
+                imoveis.append(imovel)
                 
         except Exception as e:
-            logger.error(f"❌ Erro Plaza Chapecó ({tipo_negocio}): {e}")
+            logger.warning(f"Erro ao processar bairro {i}: {e}")
+            continue
     
-    logger.info(f"✅ Plaza Chapecó finalizado: {len(imoveis)} imóveis coletados")
     return imoveis
 
-def scraper_santa_maria():
-    """Scraper para Santa Maria com URLs corrigidas"""
-    logger.info("🔍 Iniciando scraper Santa Maria...")
+# Scraper para Plaza Chapecó com URLs corrigidas
+scraper_plaza_chapeco = ScraperPaginas('Plaza Chapecó', [
+    Pagina('https://plazachapeco.com.br/alugar-imoveis-chapeco-sc/', {'tipo_negocio': 'LOCAÇÃO'}),
+    Pagina('https://plazachapeco.com.br/comprar-imoveis-chapeco-sc/', {'tipo_negocio': 'VENDA'}),
+], parse_plaza_chapeco)
+
+def parse_santa_maria(conteudo, status_code, tipo_negocio):
+    """Parse de uma página de listagem do Santa Maria"""
     imoveis = []
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-    }
-    
-    urls_base = [
-        ('https://santamaria.com.br/alugar', 'LOCAÇÃO'),
-        ('https://santamaria.com.br/comprar-prontos', 'VENDA')
-    ]
-    
-    for url_base, tipo_negocio in urls_base:
-        try:
-            logger.info(f"📡 Acessando: {url_base}")
-            response = requests.get(url_base, headers=headers, timeout=10)
+    if "Habilite o Javascript" in conteudo.decode('utf-8', errors='replace') or status_code != 200:
+        logger.warning(f"⚠️ Santa Maria ({tipo_negocio}): Site requer JavaScript")
+        # Gerar dados realistas baseados em códigos conhecidos
+        codigo_base = 7000 if tipo_negocio == 'LOCAÇÃO' else 6000
+        
+        bairros = ['Centro', 'Santa Maria', 'Efapi', 'Universitário']
+        tipos = ['Apartamento', 'Casa']
+        
+        for i in range(4):  # 4 imóveis por tipo de negócio
+            codigo = str(codigo_base + i * 100)
+            tipo_imovel = tipos[i % len(tipos)]
+            bairro = bairros[i % len(bairros)]
             
-            if "Habilite o Javascript" in response.text or response.status_code != 200:
-                logger.warning(f"⚠️ Santa Maria ({tipo_negocio}): Site requer JavaScript")
-                # Gerar dados realistas baseados em códigos conhecidos
-                codigo_base = 7000 if tipo_negocio == 'LOCAÇÃO' else 6000
-                
-                bairros = ['Centro', 'Santa Maria', 'Efapi', 'Universitário']
-                tipos = ['Apartamento', 'Casa']
-                
-                for i in range(4):  # 4 imóveis por tipo de negócio
-                    codigo = str(codigo_base + i * 100)
-                    tipo_imovel = tipos[i % len(tipos)]
-                    bairro = bairros[i % len(bairros)]
-                    
-                    quartos = [1, 2, 3][i % 3]
-                    area = [50, 70, 90][i % 3]
-                    preco_base = 2000 if tipo_negocio == 'LOCAÇÃO' else 400000
-                    preco = preco_base + (i * 200)
-                    
-                    titulo = f"{tipo_imovel} para {'locação' if tipo_negocio == 'LOCAÇÃO' else 'venda'} com {quartos} quartos, {area}m² no {bairro} em Chapecó"
-                    
-                    # Gerar URL correta
-                    url_imovel = gerar_url_santa_maria(codigo, titulo, tipo_negocio)
-                    
-                    imovel = {
-                        'imobiliaria': 'Santa Maria',
-                        'codigo': codigo,
-                        'titulo': titulo,
-                        'tipo_imovel': tipo_imovel,
-                        'preco': f"R$ {preco:,.0f}".replace(',', '.'),
-                        'area': f"{area}m²",
-                        'quartos': str(quartos),
-                        'banheiros': str(min(quartos, 2)),
-                        'vagas': '1',
-                        'endereco': f"{bairro}, Chapecó, SC",
-                        'bairro': bairro,
-                        'tipo_negocio': tipo_negocio,
-                        'url': url_imovel
-                    }
-                    
-                    imoveis.append(imovel)
-                    
-        except Exception as e:
-            logger.error(f"❌ Erro Santa Maria ({tipo_negocio}): {e}")
+            quartos = [1, 2, 3][i % 3]
+            area = [50, 70, 90][i % 3]
+            preco_base = 2000 if tipo_negocio == 'LOCAÇÃO' else 400000
+            preco = preco_base + (i * 200)
+            
+            titulo = f"{tipo_imovel} para {'locação' if tipo_negocio == 'LOCAÇÃO' else 'venda'} com {quartos} quartos, {area}m² no {bairro} em Chapecó"
+            
+            # Gerar URL correta
+            url_imovel = gerar_url_santa_maria(codigo, titulo, tipo_negocio)
+            
+            imovel = {
+                'imobiliaria': 'Santa Maria',
+                'codigo': codigo,
+                'titulo': titulo,
+                'tipo_imovel': tipo_imovel,
+                'preco': f"R$ {preco:,.0f}".replace(',', '.'),
+                'area': f"{area}m²",
+                'quartos': str(quartos),
+                'banheiros': str(min(quartos, 2)),
+                'vagas': '1',
+                'endereco': f"{bairro}, Chapecó, SC",
+                'bairro': bairro,
+                'tipo_negocio': tipo_negocio,
+                'url': url_imovel
+            }
+            
+            imoveis.append(imovel)
     
-    logger.info(f"✅ Santa Maria finalizado: {len(imoveis)} imóveis coletados")
     return imoveis
 
+# Scraper para Santa Maria com URLs corrigidas
+scraper_santa_maria = ScraperPaginas('Santa Maria', [
+    Pagina('https://santamaria.com.br/alugar', {'tipo_negocio': 'LOCAÇÃO'}),
+    Pagina('https://santamaria.com.br/comprar-prontos', {'tipo_negocio': 'VENDA'}),
+], parse_santa_maria)
+
 def scraper_casa_imoveis():
-    """Scraper para Casa Imóveis com URLs funcionais"""
+    """Scraper para Casa Imóveis com URLs funcionais (gera os imóveis um a um)"""
     logger.info("🔍 Iniciando scraper Casa Imóveis...")
-    imoveis = []
+    total = 0
     
     # Gerar dados estruturados para Casa Imóveis
     bairros = ['Centro', 'Efapi', 'Universitário', 'Desbravador', 'Vila Real', 'Santa Maria', 'Presidente Médici', 'São Cristóvão']
@@ -294,34 +266,228 @@ def scraper_casa_imoveis():
                 'url': url_imovel
             }
             
-            imoveis.append(imovel)
+            total += 1
+            yield imovel
     
-    logger.info(f"✅ Casa Imóveis finalizado: {len(imoveis)} imóveis coletados")
-    return imoveis
+    logger.info(f"✅ Casa Imóveis finalizado: {total} imóveis coletados")
+
+# Registro dos scrapers executados em cada monitoramento
+SCRAPERS = [
+    ('Plaza Chapeco', scraper_plaza_chapeco),
+    ('Santa Maria', scraper_santa_maria),
+    ('Casa Imoveis', scraper_casa_imoveis)
+]
+
+# Configuração da execução concorrente (sobrescrevível por variáveis de ambiente)
+SCRAPER_MAX_WORKERS = int(os.environ.get('SCRAPER_MAX_WORKERS', 8))
+SCRAPER_TIMEOUT_SITE = float(os.environ.get('SCRAPER_TIMEOUT_SITE', 120))
+SCRAPER_TIMEOUT_TOTAL = float(os.environ.get('SCRAPER_TIMEOUT_TOTAL', 600))
+
+# Lotes de imóveis aguardando a thread chamadora (ingestão) antes de os sites esperarem
+SCRAPER_FILA_LOTES = 32
+
+def _executar_scraper_cronometrado(nome, scraper_func, inicios, entregar, ao_evento=None, controle=None,
+                                   etapas=None, etapa_parse=None):
+    """Executa um scraper entregando os imóveis em lotes (por página nos ScraperPaginas).
+
+    Registra o instante de início (usado no controle de prazo) e o tempo por
+    etapa: fetch (somado pelo cliente HTTP) e parse (medido no processo de
+    parse ou, nas funções simples, o restante do tempo do scraper).
+    """
+    inicios[nome] = time.monotonic()
+    logger.info(f"\n--- Executando {nome} ---")
+    if ao_evento:
+        ao_evento('scraper_inicio', {'scraper': nome})
+    # Checkpoints das páginas deste site (buscar_pagina / registrar_pagina)
+    token = coleta_atual.set(controle.site(nome) if controle else None)
+    token_parse = etapa_parse_atual.set(etapa_parse)
+    tempos = {}
+    token_etapas = metricas.etapas_atuais.set(tempos)
+    inicio = time.perf_counter()
+    try:
+        for imoveis in coletar(scraper_func):
+            entregar(imoveis)
+    finally:
+        total = time.perf_counter() - inicio
+        tempo_fetch = tempos.get('fetch', 0.0)
+        tempo_parse = tempos['parse'] if 'parse' in tempos else max(0.0, total - tempo_fetch)
+        metricas.scraper_etapas.observar(tempo_fetch, site=nome, etapa='fetch')
+        metricas.scraper_etapas.observar(tempo_parse, site=nome, etapa='parse')
+        if etapas is not None:
+            etapas[nome] = {'tempo_fetch': tempo_fetch, 'tempo_parse': tempo_parse}
+        metricas.etapas_atuais.reset(token_etapas)
+        etapa_parse_atual.reset(token_parse)
+        coleta_atual.reset(token)
+
+def _relatorio_sucesso(nome, coletado, tempo, controle):
+    relatorio = {
+        'status': 'SUCESSO',
+        'imoveis': coletado['imoveis'],
+        'imobiliarias': sorted(coletado['imobiliarias']),
+        'tempo_execucao': tempo,
+        'erro': None
+    }
+    if controle and nome in controle.sites:
+        relatorio.update(controle.sites[nome].relatorio())
+    return relatorio
+
+def executar_scrapers(max_workers=None, timeout_site=None, timeout_total=None, concorrente=True, ao_evento=None,
+                      controle=None, ao_imoveis=None, parse_workers=None):
+    """Executa os scrapers e retorna (imóveis, relatório por site).
+
+    No modo concorrente cada site roda em uma thread do pool e tem seu próprio
+    prazo (timeout_site, contado a partir do início do site); a execução inteira
+    respeita timeout_total. Sites que estouram o prazo são marcados como TIMEOUT
+    e os resultados dos demais são devolvidos normalmente.
+
+    As threads dos sites fazem o fetch; o parse dos ScraperPaginas roda no
+    pool de processos do pipeline (src/pipeline.py, parse_workers processos,
+    padrão PARSE_WORKERS). Os imóveis chegam página a página na thread que
+    chamou a função: com ao_imoveis(imoveis) eles são repassados assim que
+    chegam, em vez de acumulados na lista devolvida (que fica vazia).
+
+    ao_evento(tipo, dados), se informado, é chamado no início e no fim de cada
+    site ('scraper_inicio' / 'scraper_fim') para acompanhamento do progresso.
+    Com um ControleIncremental (src/incremental.py) as páginas sem alteração
+    desde a última execução não são parseadas de novo. O relatório de cada
+    site traz também tempo_fetch e tempo_parse (em segundos).
+    """
+    max_workers = max_workers or SCRAPER_MAX_WORKERS
+    timeout_site = timeout_site or SCRAPER_TIMEOUT_SITE
+    timeout_total = timeout_total or SCRAPER_TIMEOUT_TOTAL
+
+    todos_imoveis = []
+    relatorio = {}
+    etapas = {}
+    coletados = {nome: {'imoveis': 0, 'imobiliarias': set()} for nome, _ in SCRAPERS}
+    inicio_execucao = time.monotonic()
+
+    def receber(nome, imoveis):
+        if nome in relatorio:
+            return  # site já encerrado por prazo: o restante é descartado
+        coletados[nome]['imoveis'] += len(imoveis)
+        coletados[nome]['imobiliarias'].update(imovel['imobiliaria'] for imovel in imoveis)
+        if ao_imoveis:
+            ao_imoveis(imoveis)
+        else:
+            todos_imoveis.extend(imoveis)
+
+    def finalizar_site(nome):
+        info = relatorio[nome]
+        info.update(etapas.get(nome, {}))  # sites em TIMEOUT ainda não têm os tempos por etapa
+        metricas.scraper_execucoes.inc(site=nome, status=info['status'])
+        metricas.scraper_imoveis.inc(info['imoveis'], site=nome)
+        if ao_evento:
+            ao_evento('scraper_fim', {
+                'scraper': nome,
+                'status': info['status'],
+                'imoveis': info['imoveis'],
+                'tempo_execucao': round(info['tempo_execucao'], 2),
+                'concluidos': len(relatorio),
+                'total': len(SCRAPERS)
+            })
+
+    etapa_parse = EtapaParse(parse_workers)
+    if not concorrente:
+        with etapa_parse:
+            for nome, scraper_func in SCRAPERS:
+                inicio = time.monotonic()
+                try:
+                    _executar_scraper_cronometrado(nome, scraper_func, {}, lambda imoveis, nome=nome: receber(nome, imoveis),
+                                                   ao_evento, controle, etapas, etapa_parse)
+                    relatorio[nome] = _relatorio_sucesso(nome, coletados[nome], 0.0, controle)
+                    logger.info(f"✅ {nome}: {coletados[nome]['imoveis']} imóveis coletados")
+                except Exception as e:
+                    relatorio[nome] = {'status': 'ERRO', 'imoveis': coletados[nome]['imoveis'], 'erro': str(e)}
+                    logger.error(f"❌ Erro em {nome}: {e}")
+                relatorio[nome]['tempo_execucao'] = time.monotonic() - inicio
+                finalizar_site(nome)
+        return todos_imoveis, relatorio
+
+    # Cada site publica (nome, imóveis) a cada lote e (nome, None) ao terminar.
+    # A fila é limitada: se a ingestão atrasar, os sites esperam.
+    saida = queue.Queue(maxsize=SCRAPER_FILA_LOTES)
+    encerrada = threading.Event()
+
+    def publicar(item):
+        while not encerrada.is_set():  # depois do fim da execução (timeouts) o lote é descartado
+            try:
+                saida.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    inicios = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scraper')
+    futuros = {}
+    for nome, scraper_func in SCRAPERS:
+        futuro = executor.submit(_executar_scraper_cronometrado, nome, scraper_func, inicios,
+                                 lambda imoveis, nome=nome: publicar((nome, imoveis)),
+                                 ao_evento, controle, etapas, etapa_parse)
+        futuro.add_done_callback(lambda _, nome=nome: publicar((nome, None)))
+        futuros[nome] = futuro
+    pendentes = set(futuros)
+    prazo_total = inicio_execucao + timeout_total
+
+    try:
+        while pendentes:
+            agora = time.monotonic()
+
+            # Próximo prazo a vencer: o total ou o de algum site já iniciado
+            prazos = [prazo_total] + [inicios[nome] + timeout_site for nome in pendentes if nome in inicios]
+            espera = max(0, min(prazos) - agora)
+
+            try:
+                nome, imoveis = saida.get(timeout=espera)
+            except queue.Empty:
+                nome = None
+
+            if nome is not None and imoveis is not None:
+                receber(nome, imoveis)
+            elif nome in pendentes:
+                pendentes.discard(nome)
+                tempo = time.monotonic() - inicios.get(nome, inicio_execucao)
+                try:
+                    futuros[nome].result()
+                    relatorio[nome] = _relatorio_sucesso(nome, coletados[nome], tempo, controle)
+                    logger.info(f"✅ {nome}: {coletados[nome]['imoveis']} imóveis coletados em {tempo:.1f}s")
+                except Exception as e:
+                    relatorio[nome] = {'status': 'ERRO', 'imoveis': coletados[nome]['imoveis'], 'tempo_execucao': tempo, 'erro': str(e)}
+                    logger.error(f"❌ Erro em {nome}: {e}")
+                finalizar_site(nome)
+
+            # Marcar sites que estouraram o próprio prazo ou o prazo total
+            agora = time.monotonic()
+            for nome in list(pendentes):
+                if futuros[nome].done():
+                    continue  # o fim já está na fila
+                estourou_site = nome in inicios and agora - inicios[nome] >= timeout_site
+                if estourou_site or agora >= prazo_total:
+                    pendentes.discard(nome)
+                    futuros[nome].cancel()
+                    tempo = agora - inicios[nome] if nome in inicios else 0.0
+                    motivo = 'prazo do site' if estourou_site else 'prazo total da execução'
+                    relatorio[nome] = {'status': 'TIMEOUT', 'imoveis': coletados[nome]['imoveis'], 'tempo_execucao': tempo,
+                                      'erro': f"Excedeu o {motivo}"}
+                    logger.error(f"⏱️ {nome}: excedeu o {motivo} ({tempo:.1f}s)")
+                    finalizar_site(nome)
+    finally:
+        # Não esperar threads travadas: os resultados já concluídos são devolvidos
+        encerrada.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        etapa_parse.fechar()
+
+    return todos_imoveis, relatorio
 
 def executar_todos_scrapers():
     """Executa todos os scrapers e retorna lista consolidada"""
     logger.info("🚀 Iniciando execução de todos os scrapers...")
     
-    todos_imoveis = []
-    
-    # Executar scrapers
-    scrapers = [
-        ('Plaza Chapeco', scraper_plaza_chapeco),
-        ('Santa Maria', scraper_santa_maria),
-        ('Casa Imoveis', scraper_casa_imoveis)
-    ]
-    
-    for nome, scraper_func in scrapers:
-        try:
-            logger.info(f"\n--- Executando {nome} ---")
-            imoveis = scraper_func()
-            todos_imoveis.extend(imoveis)
-            logger.info(f"✅ {nome}: {len(imoveis)} imóveis coletados")
-        except Exception as e:
-            logger.error(f"❌ Erro em {nome}: {e}")
+    todos_imoveis, relatorio = executar_scrapers()
     
     logger.info(f"\n=== TOTAL: {len(todos_imoveis)} imóveis coletados ===")
+    for nome, info in relatorio.items():
+        logger.info(f"{nome}: {info['status']} | {info['imoveis']} imóveis | {info['tempo_execucao']:.1f}s")
     
     # Log de alguns exemplos para verificação
     for imovel in todos_imoveis[:5]: